@@ -1,15 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, datetime
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db, engine, read_engine
+from app.db.sqlite_profile import pool_stats, sqlite_stats
 from app.api.controllers.base_controller import get_current_user, require_role
 from app.services import (
     user_service, vendor_service, product_service, restaurant_booking_service,
     event_request_flow_service, station_request_flow_service, request_flow_service,
-    location_service, review_service
+    location_service, review_service, vendor_review_service, product_review_service, export_service
 )
 from app.models.user import User
+from app.core.principal_cache import principal_cache
+from app.core.suggest_index import suggest_index
+from app.core.location_snapshot import location_snapshot
+from app.core.lookups import lookup_registry
+from app.core.leaderboard import product_leaderboard, vendor_leaderboard
+from app.core.password_hashing import password_hashing_executor
+from app.core.sql_instrumentation import route_sql_summary
+from app.core.slow_query_log import slow_query_log, LOG_LEVELS
+from app.core.config import settings
+from app.core.pagination import MAX_PAGE_SIZE
+from app.core.streaming_export import EXPORT_FORMAT_PATTERN, export_response
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -21,26 +34,31 @@ require_admin_role = require_role("admin")
 def get_all_users(
     role: Optional[str] = None,
     search: Optional[str] = None,
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, le=500),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
     current_user: User = Depends(require_admin_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Lista tutti gli utenti con filtri"""
-    if search:
-        users = user_service.search_users_by_name(db, search)
-    elif role:
-        users = user_service.get_users_by_role(db, role)
-    else:
-        users = user_service.get_all(db, skip, limit)
-    
-    return {"users": users, "total": user_service.count(db)}
+    """Lista tutti gli utenti con filtri (paginata con `cursor`; `include_total` aggiunge il conteggio)"""
+    page = user_service.get_users_page(db, role, search, cursor, limit, include_total)
+    return page.to_response("users")
+
+@router.get("/users/export")
+def export_users(
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    role: Optional[str] = None,
+    current_user: User = Depends(require_admin_role)
+):
+    """Export in streaming (NDJSON o CSV) di tutti gli utenti"""
+    statement = export_service.users_statement(role)
+    return export_response(export_service.stream(statement, format), format, "users")
 
 @router.get("/users/{user_id}")
 def get_user_details(
     user_id: int,
     current_user: User = Depends(require_admin_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dettagli completi di un utente"""
     user = user_service.get_user_with_relations(db, user_id)
@@ -63,6 +81,20 @@ def update_user_role(
     
     return {"message": "User role updated successfully", "user": updated_user}
 
+@router.put("/users/{user_id}/status")
+def update_user_status(
+    user_id: int,
+    is_active: bool,
+    current_user: User = Depends(require_admin_role),
+    db: Session = Depends(get_db)
+):
+    """Attiva o disattiva un utente"""
+    updated_user = user_service.set_active(db, user_id, is_active)
+    if not updated_user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return {"message": "User status updated successfully", "user": updated_user}
+
 @router.delete("/users/{user_id}")
 def delete_user(
     user_id: int,
@@ -80,24 +112,21 @@ def delete_user(
 @router.get("/vendors")
 def get_all_vendors(
     search: Optional[str] = None,
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, le=500),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
     current_user: User = Depends(require_admin_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Lista tutti i vendor"""
-    if search:
-        vendors = vendor_service.search_vendors_by_name(db, search)
-    else:
-        vendors = vendor_service.get_all(db, skip, limit)
-    
-    return {"vendors": vendors, "total": vendor_service.count(db)}
+    """Lista tutti i vendor (paginata con `cursor`; `include_total` aggiunge il conteggio)"""
+    page = vendor_service.get_vendors_page(db, search, cursor, limit, include_total)
+    return page.to_response("vendors")
 
 @router.get("/vendors/{vendor_id}")
 def get_vendor_details(
     vendor_id: int,
     current_user: User = Depends(require_admin_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dettagli completi di un vendor"""
     vendor = vendor_service.get_vendor_with_location(db, vendor_id)
@@ -123,7 +152,7 @@ def delete_vendor(
 @router.get("/requests/events/pending")
 def get_pending_event_requests(
     current_user: User = Depends(require_admin_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Richieste eventi in sospeso"""
     requests = event_request_flow_service.get_pending_event_requests(db)
@@ -158,7 +187,7 @@ def reject_event_request(
 @router.get("/requests/stations/pending")
 def get_pending_station_requests(
     current_user: User = Depends(require_admin_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Richieste stazioni in sospeso"""
     requests = station_request_flow_service.get_pending_station_requests(db)
@@ -194,7 +223,7 @@ def reject_station_request(
 @router.get("/dashboard")
 def get_admin_dashboard(
     current_user: User = Depends(require_admin_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dashboard amministratore con statistiche generali"""
     # Statistiche utenti
@@ -241,7 +270,7 @@ def get_user_analytics(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     current_user: User = Depends(require_admin_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Analytics sugli utenti"""
     # Distribuzione per ruolo
@@ -256,7 +285,7 @@ def get_user_analytics(
 @router.get("/analytics/reviews")
 def get_review_analytics(
     current_user: User = Depends(require_admin_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Analytics sulle recensioni"""
     recent_reviews = review_service.get_recent_reviews(db, 20)
@@ -272,17 +301,48 @@ def get_review_analytics(
         "rating_distribution": rating_distribution
     }
 
+@router.get("/reviews/export")
+def export_reviews(
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    current_user: User = Depends(require_admin_role)
+):
+    """Export in streaming (NDJSON o CSV) di tutte le recensioni"""
+    statement = export_service.reviews_statement(from_date, to_date)
+    return export_response(export_service.stream(statement, format), format, "reviews")
+
+@router.delete("/reviews/{review_id}")
+def delete_review(
+    review_id: int,
+    current_user: User = Depends(require_admin_role),
+    db: Session = Depends(get_db)
+):
+    """Elimina una recensione (moderazione)"""
+    success = review_service.delete_review(db, review_id)
+    if success:
+        return {"message": "Review deleted successfully"}
+    else:
+        raise HTTPException(status_code=404, detail="Review not found")
+
 # === GESTIONE SISTEMA ===
 @router.get("/logs")
 def get_system_logs(
     level: Optional[str] = None,
     limit: int = Query(100, le=1000),
-    current_user: User = Depends(require_admin_role),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_admin_role)
 ):
-    """Log di sistema (placeholder)"""
-    # In un'implementazione reale, questo leggerebbe i log effettivi
-    return {"message": "System logs endpoint - to be implemented"}
+    """Log delle query SQL lente, dalla più recente, con piano di esecuzione"""
+    if level and level.upper() not in LOG_LEVELS:
+        raise HTTPException(status_code=400, detail=f"Invalid level. Use one of: {', '.join(LOG_LEVELS)}")
+
+    logs = slow_query_log.entries(level=level, limit=limit)
+    return {
+        "logs": logs,
+        "total": len(logs),
+        "threshold_ms": slow_query_log.threshold_ms,
+        "full_scans": sum(1 for entry in logs if entry["full_scan"])
+    }
 
 @router.post("/maintenance/mode")
 def toggle_maintenance_mode(
@@ -294,15 +354,56 @@ def toggle_maintenance_mode(
     # In un'implementazione reale, questo gestirebbe uno stato globale
     return {"message": f"Maintenance mode {'enabled' if enabled else 'disabled'}"}
 
+@router.get("/system/sql-stats")
+def get_sql_stats(
+    current_user: User = Depends(require_admin_role)
+):
+    """Riepilogo per route di query, tempo SQL e sospetti N+1 (finestra mobile)"""
+    return {
+        "sample_rate": settings.SQL_INSTRUMENTATION_SAMPLE_RATE,
+        "n_plus_one_threshold": settings.SQL_N_PLUS_ONE_THRESHOLD,
+        "routes": route_sql_summary.summary()
+    }
+
+@router.delete("/system/sql-stats")
+def reset_sql_stats(
+    current_user: User = Depends(require_admin_role)
+):
+    """Azzera il riepilogo SQL per route"""
+    route_sql_summary.reset()
+    return {"message": "SQL stats reset"}
+
+@router.post("/system/lookups/reload")
+def reload_lookups(
+    current_user: User = Depends(require_admin_role),
+    db: Session = Depends(get_read_db)
+):
+    """Ricarica il registro delle tabelle di lookup (ruoli, stati, categorie...) di questo worker"""
+    lookup_registry.reload(db)
+    return {"message": "Lookups reloaded", "lookups": lookup_registry.stats()}
+
+@router.post("/system/leaderboards/refresh")
+def refresh_leaderboards(
+    current_user: User = Depends(require_admin_role),
+    db: Session = Depends(get_read_db)
+):
+    """Ricalcola subito le classifiche di prodotti e vendor più votati di questo worker"""
+    product_review_service.refresh_leaderboard(db)
+    vendor_review_service.refresh_leaderboard(db)
+    return {
+        "message": "Leaderboards refreshed",
+        "leaderboards": {"products": product_leaderboard.stats(), "vendors": vendor_leaderboard.stats()}
+    }
+
 @router.get("/system/health")
 def system_health_check(
     current_user: User = Depends(require_admin_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Controllo salute del sistema"""
     # Verifica connessione database
     try:
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1"))
         db_status = "healthy"
     except Exception:
         db_status = "unhealthy"
@@ -310,5 +411,13 @@ def system_health_check(
     return {
         "status": "healthy" if db_status == "healthy" else "unhealthy",
         "database": db_status,
+        "pools": {"write": pool_stats(engine), "read": pool_stats(read_engine)},
+        "sqlite": sqlite_stats(engine) if db_status == "healthy" else {},
+        "principal_cache": principal_cache.stats(),
+        "suggest_index": suggest_index.stats(),
+        "location_snapshot": location_snapshot.stats(),
+        "lookups": lookup_registry.stats(),
+        "leaderboards": {"products": product_leaderboard.stats(), "vendors": vendor_leaderboard.stats()},
+        "password_hashing": password_hashing_executor.stats(),
         "timestamp": datetime.utcnow()
     }
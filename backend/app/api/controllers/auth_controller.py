@@ -2,10 +2,11 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from starlette.concurrency import run_in_threadpool
 from app.core.auth import (
-    authenticate_user, create_access_token, get_current_active_user,
-    get_current_active_user_bearer, get_password_hash
+    authenticate_user_async, create_access_token, get_current_active_user,
+    get_current_active_user_bearer, get_password_hash_async
 )
 from app.core.config import settings
 from app.services.user_service import UserService
@@ -34,10 +35,11 @@ user_service = UserService()
     description="Crea un nuovo account utente nella piattaforma",
     responses={
         201: {"description": "Utente creato con successo"},
-        400: {"description": "Email già in uso"}
+        400: {"description": "Email già in uso"},
+        503: {"description": "Servizio di hashing saturo, riprovare"}
     }
 )
-def register(
+async def register(
     user_data: UserRegister,
     db: Session = Depends(get_db)
 ):
@@ -59,28 +61,33 @@ def register(
     - 6: event_organizer
     """
     # Verifica se l'utente esiste già
-    existing_user = user_service.get_user_by_email(db, user_data.email)
+    existing_user = await run_in_threadpool(user_service.get_user_by_email, db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Hash della password
-    hashed_password = get_password_hash(user_data.password)
+    # Hash della password (executor bcrypt dedicato)
+    hashed_password = await get_password_hash_async(user_data.password)
     
     # Crea l'utente usando il metodo corretto
-    new_user = user_service.create_user(
-        db=db,
-        email=user_data.email,
-        password_hash=hashed_password,
-        first_name=user_data.first_name,
-        last_name=user_data.last_name,
-        phone=user_data.phone,
-        role_type_id=user_data.role_id,
-        language=user_data.language,
-        profile_picture=user_data.profile_picture
-    )
+    def create_user():
+        user = user_service.create_user(
+            db=db,
+            email=user_data.email,
+            password_hash=hashed_password,
+            first_name=user_data.first_name,
+            last_name=user_data.last_name,
+            phone=user_data.phone,
+            role_type_id=user_data.role_id,
+            language=user_data.language,
+            profile_picture=user_data.profile_picture
+        )
+        user.role_type  # carica il ruolo fuori dall'event loop
+        return user
+    
+    new_user = await run_in_threadpool(create_user)
     
     return UserResponse(
         id=new_user.id,
@@ -103,10 +110,11 @@ def register(
     description="Autentica un utente e restituisce il token JWT",
     responses={
         200: {"description": "Login effettuato con successo"},
-        401: {"description": "Credenziali non valide"}
+        401: {"description": "Credenziali non valide"},
+        503: {"description": "Servizio di hashing saturo, riprovare"}
     }
 )
-def login(
+async def login(
     user_credentials: UserLogin,
     db: Session = Depends(get_db)
 ):
@@ -123,7 +131,7 @@ def login(
     Authorization: Bearer <access_token>
     ```
     """
-    user = authenticate_user(db, user_credentials.email, user_credentials.password)
+    user = await authenticate_user_async(db, user_credentials.email, user_credentials.password)
     if not user or not isinstance(user, User):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -211,7 +219,7 @@ def logout():
     return {"message": "Successfully logged out"}
 
 @router.get("/roles")
-def get_available_roles(db: Session = Depends(get_db)):
+def get_available_roles(db: Session = Depends(get_read_db)):
     """Lista dei ruoli disponibili per la registrazione"""
     roles = user_service.get_all_roles(db)
     return {"roles": [{"id": role.id, "name": role.name} for role in roles]}
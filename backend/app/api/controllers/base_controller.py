@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import Optional
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.services import user_service, location_service
 from app.models.user import User
 
@@ -61,7 +61,7 @@ def require_role(required_role: str):
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
     ):
-        if current_user.role_type.name != required_role:
+        if current_user.role_name != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Access denied. Required role: {required_role}"
@@ -80,7 +80,7 @@ def health_check():
 @router.get("/locations/search")
 def search_locations(
     search: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Cerca location per indirizzo - disponibile a tutti"""
     return location_service.search_by_address(db, search)
\ No newline at end of file
@@ -1,15 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date, time
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db, get_async_db
 from app.api.controllers.base_controller import get_current_user, require_role
 from app.services import (
-    product_service, product_availability_service, product_reservation_service,
-    vendor_service, restaurant_booking_service, restaurant_seat_service,
-    vendor_review_service, product_review_service, event_service, event_seat_service
+    product_service, product_availability_service, product_reservation_service, restaurant_booking_service,
+    vendor_review_service, product_review_service, event_seat_service,
+    async_product_service, async_vendor_service, async_restaurant_seat_service, async_event_service
 )
 from app.models.user import User
+from app.core.pagination import MAX_PAGE_SIZE
+from app.schemas import CartReservationRequest
 
 router = APIRouter(prefix="/consumer", tags=["Consumer"])
 
@@ -18,28 +22,39 @@ require_consumer_role = require_role("consumer")
 
 # === PRODOTTI E MERCATI ===
 @router.get("/products")
-def get_available_products(
+async def get_available_products(
     category: Optional[str] = None,
     search: Optional[str] = None,
     market_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Visualizza prodotti disponibili oggi"""
-    if search:
-        products = product_service.search_products_by_name(db, search)
-    elif category:
-        products = product_service.get_products_by_category(db, category)
-    elif market_id:
-        products = product_service.get_available_products_today(db, market_id)
-    else:
-        products = product_service.get_available_products_today(db)
+    page = await async_product_service.get_products_page(
+        db, category, search, market_id, cursor, limit, include_total
+    )
+    return page.to_response("products")
+
+@router.get("/products/top-rated")
+def get_top_rated_products(
+    category: Optional[str] = None,
+    market_id: Optional[int] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Prodotti più votati (media bayesiana), in generale, per categoria o per market"""
+    if category and market_id is not None:
+        raise HTTPException(status_code=400, detail="Filter by category or by market, not both")
     
+    products = product_review_service.get_top_rated_products(db, limit, category, market_id)
     return {"products": products}
 
 @router.get("/products/{product_id}")
 def get_product_details(
     product_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dettagli prodotto con disponibilità e recensioni"""
     product = product_service.get_product_with_details(db, product_id)
@@ -49,17 +64,30 @@ def get_product_details(
     # Disponibilità oggi
     availability = product_availability_service.get_product_availability(db, product_id, date.today())
     
-    # Recensioni
-    reviews = product_review_service.get_product_reviews(db, product_id)
+    # Recensioni (prima pagina, le successive da /products/{product_id}/reviews)
+    reviews = product_review_service.get_product_reviews_page(db, product_id)
     avg_rating = product_review_service.get_product_average_rating(db, product_id)
     
     return {
         "product": product,
         "availability": availability,
-        "reviews": reviews,
+        "reviews": reviews.items,
+        "reviews_next_cursor": reviews.next_cursor,
         "average_rating": avg_rating
     }
 
+@router.get("/products/{product_id}/reviews")
+def get_product_reviews(
+    product_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    """Recensioni di un prodotto, dalla più recente"""
+    page = product_review_service.get_product_reviews_page(db, product_id, cursor, limit, include_total)
+    return page.to_response("reviews")
+
 @router.post("/products/{product_id}/reserve")
 def reserve_product(
     product_id: int,
@@ -82,14 +110,48 @@ def reserve_product(
     
     return {"message": "Reservation created successfully", "reservation": reservation}
 
+@router.post("/cart/reserve")
+def reserve_cart(
+    cart: CartReservationRequest,
+    current_user: User = Depends(require_consumer_role),
+    db: Session = Depends(get_db)
+):
+    """Prenota più prodotti in un'unica transazione, tutto-o-niente o parziale"""
+    items = [
+        {"product_id": item.product_id, "date": item.reservation_date,
+         "time_slot": item.time_slot, "desired_quantity": item.quantity}
+        for item in cart.items
+    ]
+    results = product_reservation_service.create_cart_reservations(
+        db, current_user.id, items, cart.all_or_nothing
+    )
+    reserved = sum(1 for result in results if result["status"] == "reserved")
+    
+    if not reserved:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Cannot reserve cart", "items": jsonable_encoder(results)}
+        )
+    
+    return {
+        "message": "Cart reserved successfully" if reserved == len(results) else "Cart partially reserved",
+        "reserved": reserved,
+        "items": results
+    }
+
 @router.get("/my-reservations")
 def get_my_reservations(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
     current_user: User = Depends(require_consumer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Le mie prenotazioni prodotti"""
-    reservations = product_reservation_service.get_user_reservations(db, current_user.id)
-    return {"reservations": reservations}
+    page = product_reservation_service.get_user_reservations_page(
+        db, current_user.id, cursor, limit, include_total
+    )
+    return page.to_response("reservations")
 
 @router.delete("/reservations/{reservation_id}")
 def cancel_reservation(
@@ -111,31 +173,27 @@ def cancel_reservation(
 
 # === RISTORANTI ===
 @router.get("/restaurants")
-def get_restaurants(
+async def get_restaurants(
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Lista ristoranti disponibili"""
-    if search:
-        vendors = vendor_service.search_vendors_by_name(db, search)
-        # Filtra solo i ristoranti
-        restaurants = [v for v in vendors if hasattr(v, 'restaurant') and v.restaurant]
-    else:
-        # Implementare query specifica per ristoranti
-        restaurants = []  # Placeholder
-    
-    return {"restaurants": restaurants}
+    """Lista ristoranti disponibili, in ordine alfabetico"""
+    page = await async_vendor_service.get_restaurants_page(db, search, cursor, limit, include_total)
+    return page.to_response("restaurants")
 
 @router.get("/restaurants/{restaurant_id}/availability")
-def check_restaurant_availability(
+async def check_restaurant_availability(
     restaurant_id: int,
     booking_date: date,
     time_slot: time,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Verifica disponibilità ristorante"""
-    available_seats = restaurant_seat_service.get_available_seats(db, restaurant_id, booking_date, time_slot)
-    total_seats = restaurant_seat_service.get_restaurant_total_seats(db, restaurant_id)
+    available_seats = await async_restaurant_seat_service.get_available_seats(db, restaurant_id, booking_date, time_slot)
+    total_seats = await async_restaurant_seat_service.get_restaurant_total_seats(db, restaurant_id)
     
     return {
         "date": booking_date,
@@ -166,22 +224,27 @@ def book_restaurant(
 
 # === EVENTI ===
 @router.get("/events")
-def get_upcoming_events(
-    limit: int = Query(10, le=50),
-    db: Session = Depends(get_db)
+async def get_upcoming_events(
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50),
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Eventi in programma"""
-    events = event_service.get_upcoming_events(db, limit)
-    return {"events": events}
+    page = await async_event_service.get_upcoming_events_page(db, cursor, limit, include_total)
+    return page.to_response("events")
 
 @router.get("/events/available")
-def get_available_events(
+async def get_available_events(
     from_date: Optional[date] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Eventi con posti disponibili"""
-    events = event_service.get_available_events(db, from_date)
-    return {"events": events}
+    page = await async_event_service.get_available_events_page(db, from_date, cursor, limit, include_total)
+    return page.to_response("events")
 
 @router.post("/events/{event_id}/join")
 def join_event(
@@ -198,6 +261,28 @@ def join_event(
     return {"message": "Successfully joined event", "seat": seat}
 
 # === RECENSIONI ===
+@router.get("/vendors/top-rated")
+def get_top_rated_vendors(
+    vendor_type: Optional[str] = Query(None, pattern="^(market|restaurant|activity|warehouse)$"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Vendor più votati (media bayesiana), anche per tipo"""
+    vendors = vendor_review_service.get_top_rated_vendors(db, limit, vendor_type)
+    return {"vendors": vendors}
+
+@router.get("/vendors/{vendor_id}/reviews")
+def get_vendor_reviews(
+    vendor_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    """Recensioni di un vendor, dalla più recente"""
+    page = vendor_review_service.get_vendor_reviews_page(db, vendor_id, cursor, limit, include_total)
+    return page.to_response("reviews")
+
 @router.post("/vendors/{vendor_id}/review")
 def create_vendor_review(
     vendor_id: int,
@@ -236,14 +321,19 @@ def create_product_review(
 
 @router.get("/my-reviews")
 def get_my_reviews(
+    vendor_cursor: Optional[str] = None,
+    product_cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(require_consumer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Le mie recensioni"""
-    vendor_reviews = vendor_review_service.get_user_vendor_reviews(db, current_user.id)
-    product_reviews = product_review_service.get_user_product_reviews(db, current_user.id)
+    """Le mie recensioni (due liste con cursori indipendenti)"""
+    vendor_reviews = vendor_review_service.get_user_vendor_reviews_page(db, current_user.id, vendor_cursor, limit)
+    product_reviews = product_review_service.get_user_product_reviews_page(db, current_user.id, product_cursor, limit)
     
     return {
-        "vendor_reviews": vendor_reviews,
-        "product_reviews": product_reviews
+        "vendor_reviews": vendor_reviews.items,
+        "vendor_reviews_next_cursor": vendor_reviews.next_cursor,
+        "product_reviews": product_reviews.items,
+        "product_reviews_next_cursor": product_reviews.next_cursor
     }
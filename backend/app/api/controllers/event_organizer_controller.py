@@ -2,13 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, datetime
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.api.controllers.base_controller import get_current_user, require_role
 from app.services import (
     event_request_flow_service, location_service, vendor_service,
     user_service, product_service
 )
 from app.models.user import User
+from app.schemas import DistanceMatrixRequest
 
 router = APIRouter(prefix="/event-organizer", tags=["Event Organizer"])
 
@@ -20,7 +21,7 @@ require_event_organizer_role = require_role("event_organizer")
 def get_my_event_requests(
     status: Optional[str] = None,
     current_user: User = Depends(require_event_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Le mie richieste eventi"""
     requests = event_request_flow_service.get_requests_by_organizer(
@@ -32,7 +33,7 @@ def get_my_event_requests(
 def get_event_request_details(
     request_id: int,
     current_user: User = Depends(require_event_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dettagli di una mia richiesta evento"""
     request = event_request_flow_service.get_request_with_details(db, request_id)
@@ -107,7 +108,7 @@ def search_available_locations(
     min_capacity: Optional[int] = None,
     event_date: Optional[date] = None,
     current_user: User = Depends(require_event_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Cerca location disponibili per eventi"""
     locations = location_service.search_available_event_locations(
@@ -115,11 +116,26 @@ def search_available_locations(
     )
     return {"locations": locations}
 
+@router.post("/locations/distance-matrix")
+def get_distance_matrix(
+    request: DistanceMatrixRequest,
+    current_user: User = Depends(require_event_organizer_role),
+    db: Session = Depends(get_read_db)
+):
+    """Matrice delle distanze (km) tra location di partenza e di arrivo"""
+    matrix = location_service.get_distance_matrix(db, request.origin_ids, request.destination_ids)
+    if matrix["missing_ids"]:
+        raise HTTPException(
+            status_code=404,
+            detail={"message": "Locations not found", "missing_ids": matrix["missing_ids"]}
+        )
+    return matrix
+
 @router.get("/locations/{location_id}")
 def get_location_details(
     location_id: int,
     current_user: User = Depends(require_event_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dettagli di una location"""
     location = location_service.get_location_with_availability(db, location_id)
@@ -155,7 +171,7 @@ def search_event_vendors(
     vendor_type: Optional[str] = None,
     search: Optional[str] = None,
     current_user: User = Depends(require_event_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Cerca vendor per eventi"""
     if location_id:
@@ -197,7 +213,7 @@ def contact_vendor(
 def get_event_participants(
     request_id: int,
     current_user: User = Depends(require_event_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Partecipanti registrati all'evento"""
     # Verifica proprietà
@@ -234,7 +250,7 @@ def approve_participant(
 def get_event_supplies(
     request_id: int,
     current_user: User = Depends(require_event_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Forniture necessarie per l'evento"""
     # Verifica proprietà
@@ -267,7 +283,7 @@ def search_supply_products(
     category: Optional[str] = None,
     search: Optional[str] = None,
     current_user: User = Depends(require_event_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Cerca prodotti per forniture eventi"""
     if category:
@@ -283,7 +299,7 @@ def search_supply_products(
 @router.get("/dashboard")
 def get_event_organizer_dashboard(
     current_user: User = Depends(require_event_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dashboard event organizer"""
     # Statistiche richieste
@@ -319,7 +335,7 @@ def get_event_organizer_dashboard(
 def get_event_analytics(
     period: str = Query("month", regex="^(week|month|quarter|year)$"),
     current_user: User = Depends(require_event_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Analytics sugli eventi organizzati"""
     analytics = event_request_flow_service.get_event_analytics_for_organizer(
@@ -331,7 +347,7 @@ def get_event_analytics(
 @router.get("/analytics/locations")
 def get_location_usage_analytics(
     current_user: User = Depends(require_event_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Analytics sull'utilizzo delle location"""
     location_stats = event_request_flow_service.get_location_usage_for_organizer(
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, time
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.api.controllers.base_controller import get_current_user, require_role
 from app.services import (
     product_service, product_availability_service, product_reservation_service,
     vendor_service, market_service, warehouse_service, station_booking_service,
-    warehouse_spot_service
+    warehouse_spot_service, export_service, VersionConflictError
 )
 from app.models.user import User
+from app.core.streaming_export import EXPORT_FORMAT_PATTERN, export_response
+from app.schemas import AvailabilityCalendarRequest
 
 router = APIRouter(prefix="/farmer", tags=["Farmer"])
 
@@ -20,18 +22,17 @@ require_farmer_role = require_role("farmer")
 @router.get("/my-markets")
 def get_my_markets(
     current_user: User = Depends(require_farmer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """I miei mercati"""
-    vendors = vendor_service.get_vendors_by_owner(db, current_user.id)
-    markets = [v for v in vendors if hasattr(v, 'market') and v.market]
+    markets = vendor_service.get_vendors_by_owner(db, current_user.id, vendor_type="market")
     return {"markets": markets}
 
 @router.get("/my-products")
 def get_my_products(
     market_id: Optional[int] = None,
     current_user: User = Depends(require_farmer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """I miei prodotti"""
     if market_id:
@@ -43,8 +44,7 @@ def get_my_products(
         products = product_service.get_market_products(db, market_id)
     else:
         # Tutti i prodotti di tutti i mercati dell'utente
-        my_vendors = vendor_service.get_vendors_by_owner(db, current_user.id)
-        my_markets = [v for v in my_vendors if hasattr(v, 'market') and v.market]
+        my_markets = vendor_service.get_vendors_by_owner(db, current_user.id, vendor_type="market")
         products = []
         for market in my_markets:
             products.extend(product_service.get_market_products(db, market.id))
@@ -107,7 +107,7 @@ def get_product_availability(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     current_user: User = Depends(require_farmer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Disponibilità di un prodotto"""
     # Verifica proprietà
@@ -155,6 +155,29 @@ def set_product_availability(
     
     return {"message": "Availability set successfully", "availability": availability}
 
+@router.post("/availability/calendar")
+def set_availability_calendar(
+    calendar: AvailabilityCalendarRequest,
+    current_user: User = Depends(require_farmer_role),
+    db: Session = Depends(get_db)
+):
+    """Imposta in blocco disponibilità e prezzi per più prodotti su un intervallo di date o uno schema settimanale"""
+    # Verifica proprietà di tutti i prodotti con una sola query
+    product_ids = {entry.product_id for entry in calendar.entries}
+    foreign_ids = product_ids - product_service.get_owned_product_ids(db, current_user.id, list(product_ids))
+    if foreign_ids:
+        raise HTTPException(status_code=403, detail=f"Access denied to products {sorted(foreign_ids)}")
+    
+    try:
+        summary = product_availability_service.upsert_calendar(
+            db, [entry.model_dump() for entry in calendar.entries],
+            calendar.start_date, calendar.end_date, calendar.weekdays
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"message": "Availability calendar set successfully", "summary": summary}
+
 @router.put("/products/{product_id}/availability/{availability_date}")
 def update_product_availability(
     product_id: int,
@@ -162,10 +185,11 @@ def update_product_availability(
     available_quantity: Optional[int] = None,
     daily_price: Optional[float] = None,
     discounted_price: Optional[float] = None,
+    version: Optional[int] = None,
     current_user: User = Depends(require_farmer_role),
     db: Session = Depends(get_db)
 ):
-    """Aggiorna disponibilità esistente"""
+    """Aggiorna disponibilità esistente (con `version` risponde 409 se è stata modificata nel frattempo)"""
     # Verifica proprietà
     product = product_service.get_by_id(db, product_id)
     if not product or product.market.vendor.owner_id != current_user.id:
@@ -183,7 +207,12 @@ def update_product_availability(
     if discounted_price is not None:
         update_data["discounted_price"] = discounted_price
     
-    updated_availability = product_availability_service.update(db, availability.id, **update_data)
+    try:
+        updated_availability = product_availability_service.update(
+            db, availability.id, expected_version=version, **update_data
+        )
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return {"message": "Availability updated successfully", "availability": updated_availability}
 
 # === GESTIONE PRENOTAZIONI ===
@@ -192,7 +221,7 @@ def get_product_reservations(
     product_id: Optional[int] = None,
     reservation_date: Optional[date] = None,
     current_user: User = Depends(require_farmer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Prenotazioni per i miei prodotti"""
     if product_id:
@@ -215,22 +244,33 @@ def get_product_reservations(
     
     return {"reservations": reservations}
 
+@router.get("/reservations/export")
+def export_product_reservations(
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    product_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    current_user: User = Depends(require_farmer_role)
+):
+    """Export in streaming (NDJSON o CSV) delle prenotazioni per i miei prodotti"""
+    statement = export_service.farmer_reservations_statement(current_user.id, product_id, from_date, to_date)
+    return export_response(export_service.stream(statement, format), format, "reservations")
+
 # === GESTIONE MAGAZZINO ===
 @router.get("/my-warehouses")
 def get_my_warehouses(
     current_user: User = Depends(require_farmer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """I miei magazzini"""
-    vendors = vendor_service.get_vendors_by_owner(db, current_user.id)
-    warehouses = [v for v in vendors if hasattr(v, 'warehouse') and v.warehouse]
+    warehouses = vendor_service.get_vendors_by_owner(db, current_user.id, vendor_type="warehouse")
     return {"warehouses": warehouses}
 
 @router.get("/warehouse-bookings")
 def get_warehouse_bookings(
     warehouse_id: Optional[int] = None,
     current_user: User = Depends(require_farmer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Prenotazioni nei miei magazzini"""
     if warehouse_id:
@@ -249,11 +289,23 @@ def get_warehouse_bookings(
     
     return {"bookings": bookings}
 
+@router.get("/warehouse-bookings/export")
+def export_warehouse_bookings(
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    warehouse_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    current_user: User = Depends(require_farmer_role)
+):
+    """Export in streaming (NDJSON o CSV) delle prenotazioni nei miei magazzini"""
+    statement = export_service.station_bookings_statement(current_user.id, warehouse_id, from_date, to_date)
+    return export_response(export_service.stream(statement, format), format, "warehouse-bookings")
+
 @router.get("/warehouse/{warehouse_id}/spots")
 def get_warehouse_spots(
     warehouse_id: int,
     current_user: User = Depends(require_farmer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Spot del mio magazzino"""
     # Verifica proprietà
@@ -268,10 +320,11 @@ def get_warehouse_spots(
 def update_spot_fee(
     spot_id: int,
     new_fee: float,
+    version: Optional[int] = None,
     current_user: User = Depends(require_farmer_role),
     db: Session = Depends(get_db)
 ):
-    """Aggiorna la tariffa di uno spot"""
+    """Aggiorna la tariffa di uno spot (con `version` risponde 409 se è stata modificata nel frattempo)"""
     # Verifica proprietà (attraverso warehouse)
     spot = warehouse_spot_service.get_by_id(db, spot_id)
     if not spot:
@@ -282,14 +335,17 @@ def update_spot_fee(
     if warehouse_owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Access denied to this spot")
     
-    updated_spot = warehouse_spot_service.update_spot_fee(db, spot_id, new_fee)
+    try:
+        updated_spot = warehouse_spot_service.update_spot_fee(db, spot_id, new_fee, expected_version=version)
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return {"message": "Spot fee updated successfully", "spot": updated_spot}
 
 # === STATISTICS ===
 @router.get("/dashboard")
 def get_farmer_dashboard(
     current_user: User = Depends(require_farmer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dashboard con statistiche del farmer"""
     # Prodotti totali
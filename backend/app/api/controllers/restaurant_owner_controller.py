@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, time
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.api.controllers.base_controller import get_current_user, require_role
 from app.services import (
     vendor_service, restaurant_service, restaurant_table_service, 
-    restaurant_seat_service, menu_item_service, restaurant_booking_service
+    restaurant_seat_service, menu_item_service, restaurant_booking_service,
+    export_service, VersionConflictError
 )
 from app.models.user import User
+from app.core.pagination import MAX_PAGE_SIZE
+from app.core.streaming_export import EXPORT_FORMAT_PATTERN, export_response
 
 router = APIRouter(prefix="/restaurant-owner", tags=["Restaurant Owner"])
 
@@ -19,11 +22,10 @@ require_restaurant_owner_role = require_role("restaurant_owner")
 @router.get("/my-restaurants")
 def get_my_restaurants(
     current_user: User = Depends(require_restaurant_owner_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """I miei ristoranti"""
-    vendors = vendor_service.get_vendors_by_owner(db, current_user.id)
-    restaurants = [v for v in vendors if hasattr(v, 'restaurant') and v.restaurant]
+    restaurants = vendor_service.get_vendors_by_owner(db, current_user.id, vendor_type="restaurant")
     return {"restaurants": restaurants}
 
 # === GESTIONE TAVOLI ===
@@ -31,7 +33,7 @@ def get_my_restaurants(
 def get_restaurant_tables(
     restaurant_id: int,
     current_user: User = Depends(require_restaurant_owner_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Tavoli del ristorante"""
     # Verifica proprietà
@@ -56,12 +58,8 @@ def create_table(
     if not restaurant or restaurant.vendor.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Access denied to this restaurant")
     
-    # Crea il tavolo
-    table = restaurant_table_service.create_table(db, name, restaurant_id)
-    
-    # Crea i posti per il tavolo
-    for _ in range(seats_count):
-        restaurant_seat_service.create_seat(db, table.id)
+    # Crea il tavolo e i suoi posti
+    table = restaurant_table_service.create_table_with_seats(db, name, restaurant_id, seats_count)
     
     return {"message": "Table created successfully", "table": table}
 
@@ -88,7 +86,7 @@ def get_restaurant_menu(
     restaurant_id: int,
     category: Optional[str] = None,
     current_user: User = Depends(require_restaurant_owner_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Menu del ristorante"""
     # Verifica proprietà
@@ -131,10 +129,11 @@ def update_menu_item(
     name: Optional[str] = None,
     price: Optional[float] = None,
     description: Optional[str] = None,
+    version: Optional[int] = None,
     current_user: User = Depends(require_restaurant_owner_role),
     db: Session = Depends(get_db)
 ):
-    """Aggiorna una voce di menu"""
+    """Aggiorna una voce di menu (con `version` risponde 409 se è stata modificata nel frattempo)"""
     menu_item = menu_item_service.get_by_id(db, item_id)
     if not menu_item or menu_item.restaurant.vendor.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Access denied to this menu item")
@@ -147,7 +146,10 @@ def update_menu_item(
     if description is not None:
         update_data["description"] = description
     
-    updated_item = menu_item_service.update(db, item_id, **update_data)
+    try:
+        updated_item = menu_item_service.update(db, item_id, expected_version=version, **update_data)
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return {"message": "Menu item updated successfully", "menu_item": updated_item}
 
 @router.delete("/menu-items/{item_id}")
@@ -172,22 +174,41 @@ def delete_menu_item(
 def get_restaurant_bookings(
     restaurant_id: int,
     booking_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
     current_user: User = Depends(require_restaurant_owner_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Prenotazioni del ristorante"""
+    """Prenotazioni del ristorante in ordine di orario"""
     # Verifica proprietà
     restaurant = restaurant_service.get_by_id(db, restaurant_id)
     if not restaurant or restaurant.vendor.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Access denied to this restaurant")
     
-    if booking_date:
-        bookings = restaurant_booking_service.get_restaurant_bookings_by_date(db, restaurant_id, booking_date)
-    else:
-        # Prenotazioni di oggi per default
-        bookings = restaurant_booking_service.get_restaurant_bookings_by_date(db, restaurant_id, date.today())
+    # Prenotazioni di oggi per default
+    page = restaurant_booking_service.get_restaurant_bookings_page(
+        db, restaurant_id, booking_date or date.today(), cursor, limit, include_total
+    )
+    return page.to_response("bookings")
+
+@router.get("/restaurants/{restaurant_id}/bookings/export")
+def export_restaurant_bookings(
+    restaurant_id: int,
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    current_user: User = Depends(require_restaurant_owner_role),
+    db: Session = Depends(get_read_db)
+):
+    """Export in streaming (NDJSON o CSV) delle prenotazioni del ristorante"""
+    # Verifica proprietà
+    vendor = vendor_service.get_by_id(db, restaurant_id)
+    if not vendor or vendor.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied to this restaurant")
     
-    return {"bookings": bookings}
+    statement = export_service.restaurant_bookings_statement(restaurant_id, from_date, to_date)
+    return export_response(export_service.stream(statement, format), format, f"restaurant-{restaurant_id}-bookings")
 
 @router.get("/restaurants/{restaurant_id}/bookings/{booking_date}/{time_slot}")
 def get_bookings_by_time_slot(
@@ -195,7 +216,7 @@ def get_bookings_by_time_slot(
     booking_date: date,
     time_slot: time,
     current_user: User = Depends(require_restaurant_owner_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Prenotazioni per un orario specifico"""
     # Verifica proprietà
@@ -211,7 +232,7 @@ def get_daily_availability(
     restaurant_id: int,
     booking_date: date,
     current_user: User = Depends(require_restaurant_owner_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Disponibilità del ristorante per una data"""
     # Verifica proprietà
@@ -244,12 +265,11 @@ def get_daily_availability(
 @router.get("/dashboard")
 def get_restaurant_owner_dashboard(
     current_user: User = Depends(require_restaurant_owner_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dashboard del proprietario di ristorante"""
     # I miei ristoranti
-    vendors = vendor_service.get_vendors_by_owner(db, current_user.id)
-    restaurants = [v for v in vendors if hasattr(v, 'restaurant') and v.restaurant]
+    restaurants = vendor_service.get_vendors_by_owner(db, current_user.id, vendor_type="restaurant")
     
     # Statistiche aggregate
     total_tables = 0
@@ -288,7 +308,7 @@ def get_restaurant_owner_dashboard(
 def get_opening_hours(
     restaurant_id: int,
     current_user: User = Depends(require_restaurant_owner_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Orari di apertura del ristorante"""
     # Verifica proprietà
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.db.session import get_read_db
+from app.services import search_service, suggest_service
+from app.services.search_service import PUBLIC_ENTITY_TYPES
+from app.core.suggest_index import SUGGEST_KINDS
+from app.core.pagination import MAX_PAGE_SIZE
+
+router = APIRouter(tags=["Search"])
+
+@router.get("/search")
+def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Testo da cercare"),
+    types: Optional[List[str]] = Query(None, description="Tipi di risultato: product, vendor, menu_item, location"),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """Ricerca full-text su prodotti, vendor, voci di menu e location, ordinata per rilevanza - disponibile a tutti"""
+    invalid_types = sorted(set(types or []) - set(PUBLIC_ENTITY_TYPES))
+    if invalid_types:
+        raise HTTPException(status_code=400, detail=f"Unsupported search types: {invalid_types}")
+    
+    page = search_service.search(db, q, types, cursor, limit)
+    return page.to_response("results")
+
+@router.get("/suggest")
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100, description="Prefisso digitato"),
+    types: Optional[List[str]] = Query(None, description="Tipi di suggerimento: product, vendor, category, zip"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Completamenti per prefisso dall'indice in memoria, ordinati per popolarità - disponibile a tutti"""
+    invalid_types = sorted(set(types or []) - set(SUGGEST_KINDS))
+    if invalid_types:
+        raise HTTPException(status_code=400, detail=f"Unsupported suggestion types: {invalid_types}")
+    
+    return {"suggestions": suggest_service.suggest(q, types, limit)}
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.services.user_service import user_service
 from app.models.user import User
 from app.api.controllers.base_controller import get_current_user
@@ -135,7 +135,7 @@ def delete_profile_picture(
 )
 def get_user_profile_picture(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Ottiene la foto profilo di un utente specifico"""
     user = user_service.get_by_id(db=db, id=user_id)
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, datetime
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.api.controllers.base_controller import get_current_user, require_role
 from app.services import (
     activity_service, vendor_service, product_service, 
@@ -19,7 +19,7 @@ require_workshop_host_role = require_role("workshop_host")
 @router.get("/activities")
 def get_my_activities(
     current_user: User = Depends(require_workshop_host_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Le mie attività/workshop"""
     activities = activity_service.get_activities_by_host(db, current_user.id)
@@ -29,7 +29,7 @@ def get_my_activities(
 def get_activity_details(
     activity_id: int,
     current_user: User = Depends(require_workshop_host_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dettagli di una mia attività"""
     activity = activity_service.get_activity_with_bookings(db, activity_id)
@@ -91,7 +91,7 @@ def get_activity_bookings(
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     current_user: User = Depends(require_workshop_host_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Prenotazioni per una mia attività"""
     # Verifica proprietà
@@ -149,7 +149,7 @@ def get_activity_sessions(
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     current_user: User = Depends(require_workshop_host_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Sessioni/orari di una mia attività"""
     # Verifica proprietà
@@ -223,7 +223,7 @@ def delete_activity_session(
 def get_activity_materials(
     activity_id: int,
     current_user: User = Depends(require_workshop_host_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Materiali necessari per l'attività"""
     # Verifica proprietà
@@ -255,7 +255,7 @@ def add_activity_material(
 @router.get("/dashboard")
 def get_workshop_host_dashboard(
     current_user: User = Depends(require_workshop_host_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dashboard workshop host"""
     # Statistiche attività
@@ -285,7 +285,7 @@ def get_workshop_host_dashboard(
 def get_booking_analytics(
     period: str = Query("month", regex="^(week|month|quarter|year)$"),
     current_user: User = Depends(require_workshop_host_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Analytics sulle prenotazioni"""
     analytics = activity_service.get_booking_analytics_for_host(
@@ -297,7 +297,7 @@ def get_booking_analytics(
 @router.get("/analytics/participants")
 def get_participant_analytics(
     current_user: User = Depends(require_workshop_host_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Analytics sui partecipanti"""
     participant_stats = activity_service.get_participant_analytics_for_host(
@@ -9,7 +9,8 @@ from app.api.controllers import (
     admin_controller,
     workshop_host_controller,
     event_organizer_controller,
-    user_controller
+    user_controller,
+    search_controller
 )
 
 # Costante per il prefisso API
@@ -74,3 +75,10 @@ api_router.include_router(
     prefix=API_V1_PREFIX,
     tags=["👤 User Management"]
 )
+
+# Include la ricerca unificata (pubblica)
+api_router.include_router(
+    search_controller.router,
+    prefix=API_V1_PREFIX,
+    tags=["🔎 Search"]
+)
@@ -11,7 +11,11 @@ from pydantic import BaseModel, ValidationError
 from app.db.session import get_db
 from app.services.user_service import UserService
 from app.models.user import User
+from app.models.enums import RoleType
 from app.core.config import settings
+from app.core.principal_cache import CachedPrincipal, principal_cache
+from app.core.password_hashing import password_hashing_executor
+from starlette.concurrency import run_in_threadpool
 
 # Configurazione password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -55,6 +59,14 @@ def get_password_hash(password: str) -> str:
     """Hash della password"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifica la password nell'executor dedicato a bcrypt"""
+    return await password_hashing_executor.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash della password nell'executor dedicato a bcrypt"""
+    return await password_hashing_executor.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crea un token JWT"""
     to_encode = data.copy()
@@ -87,55 +99,113 @@ def authenticate_user(db: Session, email: str, password: str) -> Union[User, boo
         return False
     return user
 
-def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
-    """Ottiene l'utente corrente dal token JWT"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def _decode_user_id(token: str) -> int:
+    """Estrae l'ID utente dal token JWT"""
+    credentials_exception = AuthenticationError()
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id_str: Optional[str] = payload.get("sub")
         if user_id_str is None:
             raise credentials_exception
-        user_id = int(user_id_str)
+        return int(user_id_str)
     except (JWTError, ValueError):
         raise credentials_exception
-    
-    user = user_service.get_by_id(db, user_id)
-    if user is None:
-        raise credentials_exception
-    return user
 
-def get_current_user_bearer(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Ottiene l'utente corrente dal token JWT usando HTTPBearer"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
+def resolve_principal(db: Session, user_id: int) -> Optional[CachedPrincipal]:
+    """Risolve il principal dalla cache o, in caso di miss, con una sola query"""
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    
+    row = db.query(
+        User.id, User.role_type_id, RoleType.name, User.is_active, User.language
+    ).join(RoleType, User.role_type_id == RoleType.id).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    
+    principal = CachedPrincipal(
+        id=row[0], role_type_id=row[1], role_name=row[2], is_active=row[3], language=row[4]
     )
-    try:
-        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id_str: Optional[str] = payload.get("sub")
-        if user_id_str is None:
-            raise credentials_exception
-        user_id = int(user_id_str)
-    except (JWTError, ValueError):
-        raise credentials_exception
+    principal_cache.set(principal)
+    return principal
+
+class CurrentUser:
+    """
+    Utente autenticato risolto dalla cache dei principal.
+    Espone subito id, ruolo, stato e lingua; qualsiasi altro attributo
+    carica il modello User completo alla prima richiesta.
+    """
     
-    user = user_service.get_by_id(db, user_id)
-    if user is None:
-        raise credentials_exception
+    def __init__(self, principal: CachedPrincipal, db: Session):
+        self._principal = principal
+        self._db = db
+        self._user: Optional[User] = None
+    
+    @property
+    def id(self) -> int:
+        return self._principal.id
+    
+    @property
+    def role_type_id(self) -> int:
+        return self._principal.role_type_id
+    
+    @property
+    def role_name(self) -> str:
+        return self._principal.role_name
+    
+    @property
+    def is_active(self) -> bool:
+        return self._principal.is_active
+    
+    @property
+    def language(self) -> str:
+        return self._principal.language
+    
+    def get_user(self) -> User:
+        """Carica (una sola volta) il modello User completo"""
+        if self._user is None:
+            user = user_service.get_by_id(self._db, self._principal.id)
+            if user is None:
+                principal_cache.invalidate(self._principal.id)
+                raise AuthenticationError()
+            self._user = user
+        return self._user
+    
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get_user(), name)
+
+def _get_current_principal(user_id: int, db: Session) -> CurrentUser:
+    principal = resolve_principal(db, user_id)
+    if principal is None:
+        raise AuthenticationError()
+    return CurrentUser(principal, db)
+
+async def authenticate_user_async(db: Session, email: str, password: str) -> Union[User, bool]:
+    """Autentica un utente senza occupare il threadpool condiviso durante bcrypt"""
+    user = await run_in_threadpool(user_service.get_user_by_email, db, email)
+    if not user:
+        return False
+    if not await verify_password_async(password, user.password_hash):
+        return False
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)) -> CurrentUser:
+    """Ottiene l'utente corrente dal token JWT"""
+    return _get_current_principal(_decode_user_id(token), db)
+
+def get_current_user_bearer(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)) -> CurrentUser:
+    """Ottiene l'utente corrente dal token JWT usando HTTPBearer"""
+    return _get_current_principal(_decode_user_id(credentials.credentials), db)
+
+def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """Dipendenza per ottenere l'utente corrente attivo"""
     if current_user.is_active is not True:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_current_active_user_bearer(current_user: User = Depends(get_current_user_bearer)) -> User:
+def get_current_active_user_bearer(current_user: CurrentUser = Depends(get_current_user_bearer)) -> CurrentUser:
     """Dipendenza per ottenere l'utente corrente attivo usando HTTPBearer"""
     if current_user.is_active is not True:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -143,8 +213,8 @@ def get_current_active_user_bearer(current_user: User = Depends(get_current_user
 
 def require_role(required_role: str):
     """Factory per creare dipendenze che richiedono un ruolo specifico"""
-    def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
-        if current_user.role_type.name != required_role:
+    def role_checker(current_user: CurrentUser = Depends(get_current_active_user)) -> CurrentUser:
+        if current_user.role_name != required_role:
             raise AuthorizationError(
                 detail=f"Role '{required_role}' required"
             )
@@ -153,8 +223,8 @@ def require_role(required_role: str):
 
 def require_roles(*required_roles: str):
     """Factory per creare dipendenze che richiedono uno dei ruoli specificati"""
-    def roles_checker(current_user: User = Depends(get_current_active_user)) -> User:
-        if current_user.role_type.name not in required_roles:
+    def roles_checker(current_user: CurrentUser = Depends(get_current_active_user)) -> CurrentUser:
+        if current_user.role_name not in required_roles:
             raise AuthorizationError(
                 detail=f"One of roles {required_roles} required"
             )
@@ -19,12 +19,65 @@ class Settings:
     # Database
     RESET_DB_ON_STARTUP: bool = os.getenv("RESET_DB_ON_STARTUP", "true").lower() == "true"
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+
+    # Avvio rapido: i reset copiano un database template già popolato (solo SQLite su file)
+    DB_TEMPLATE_ENABLED: bool = os.getenv("DB_TEMPLATE_ENABLED", "true").lower() == "true"
+    DB_TEMPLATE_DIR: str = os.getenv("DB_TEMPLATE_DIR", "")
+
+    # Profilo di produzione SQLite (PRAGMA applicati a ogni nuova connessione)
+    SQLITE_WAL: bool = os.getenv("SQLITE_WAL", "true").lower() == "true"
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+    SQLITE_TEMP_STORE: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+    # Pool di sola lettura usato dagli endpoint GET (get_read_db)
+    READ_POOL_SIZE: int = int(os.getenv("READ_POOL_SIZE", "10"))
+    READ_POOL_MAX_OVERFLOW: int = int(os.getenv("READ_POOL_MAX_OVERFLOW", "20"))
     
     # JWT
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
-    
+
+    # Cache dei principal autenticati (0 per disabilitare)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    PRINCIPAL_CACHE_MAX_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+
+    # Indice in memoria per /suggest (numero massimo di chiavi, 0 per disabilitare; chiavi esaminate per richiesta)
+    SUGGEST_MAX_ENTRIES: int = int(os.getenv("SUGGEST_MAX_ENTRIES", "500000"))
+    SUGGEST_MAX_SCAN: int = int(os.getenv("SUGGEST_MAX_SCAN", "2000"))
+
+    # Snapshot NumPy delle coordinate per le matrici di distanza (secondi prima della ricarica)
+    LOCATION_SNAPSHOT_TTL_SECONDS: float = float(os.getenv("LOCATION_SNAPSHOT_TTL_SECONDS", "300"))
+
+    # Classifiche dei più votati (posizioni tenute per gruppo, secondi tra due ricalcoli, peso del voto medio globale)
+    LEADERBOARD_SIZE: int = int(os.getenv("LEADERBOARD_SIZE", "100"))
+    LEADERBOARD_REFRESH_SECONDS: float = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "300"))
+    LEADERBOARD_PRIOR_WEIGHT: float = float(os.getenv("LEADERBOARD_PRIOR_WEIGHT", "5"))
+
+    # Executor dedicato per bcrypt (thread e richieste in attesa oltre le quali si risponde 503)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+    # Strumentazione SQL per richiesta (frazione di richieste campionate, 0 per disabilitare)
+    SQL_INSTRUMENTATION_SAMPLE_RATE: float = float(os.getenv("SQL_INSTRUMENTATION_SAMPLE_RATE", "1.0"))
+    SQL_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+    SQL_ROUTE_SUMMARY_WINDOW: int = int(os.getenv("SQL_ROUTE_SUMMARY_WINDOW", "200"))
+
+    # Log delle query lente (soglie in ms, 0 per disabilitare; file opzionale a rotazione)
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+    SLOW_QUERY_ERROR_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_ERROR_THRESHOLD_MS", "1000"))
+    SLOW_QUERY_LOG_SIZE: int = int(os.getenv("SLOW_QUERY_LOG_SIZE", "1000"))
+    SLOW_QUERY_LOG_FILE: str = os.getenv("SLOW_QUERY_LOG_FILE", "")
+    SLOW_QUERY_LOG_MAX_BYTES: int = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    SLOW_QUERY_LOG_BACKUPS: int = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+    # Export in streaming (righe lette per blocco dal cursore, byte accumulati prima di ogni invio)
+    EXPORT_YIELD_PER: int = int(os.getenv("EXPORT_YIELD_PER", "1000"))
+    EXPORT_FLUSH_BYTES: int = int(os.getenv("EXPORT_FLUSH_BYTES", str(64 * 1024)))
+
     # Server
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
@@ -47,6 +100,39 @@ class Settings:
             return f"sqlite:///{db_path}"
         return self.DATABASE_URL
 
+    @property
+    def is_sqlite_file(self) -> bool:
+        """True se il database è un file SQLite (non in memoria)"""
+        return self.database_url.startswith("sqlite:///") and ":memory:" not in self.database_url
+
+    @property
+    def sqlite_path(self) -> str:
+        """Path assoluto del file SQLite (stringa vuota per altri database)"""
+        return self.database_url.replace("sqlite:///", "") if self.is_sqlite_file else ""
+
+    @property
+    def read_database_url(self) -> str:
+        """URL per le connessioni di sola lettura (mode=ro per i file SQLite)"""
+        if self.is_sqlite_file:
+            return f"sqlite:///file:{self.sqlite_path}?mode=ro&uri=true"
+        return self.database_url
+
+    @property
+    def async_database_url(self) -> str:
+        """URL del database con il driver asincrono corrispondente (aiosqlite, asyncpg, aiomysql)"""
+        url = self.database_url
+        async_drivers = {
+            "sqlite": "sqlite+aiosqlite",
+            "postgresql": "postgresql+asyncpg",
+            "postgres": "postgresql+asyncpg",
+            "mysql": "mysql+aiomysql",
+        }
+        scheme, separator, rest = url.partition("://")
+        dialect = scheme.split("+", 1)[0]
+        if dialect in async_drivers:
+            return f"{async_drivers[dialect]}{separator}{rest}"
+        return url
+
 # Istanza globale delle configurazioni
 settings = Settings()
 
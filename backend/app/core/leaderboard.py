@@ -0,0 +1,129 @@
+"""
+Classifiche in memoria dei prodotti e vendor più votati: media bayesiana e top-K per gruppo
+
+La media semplice mette in cima chi ha una sola recensione da 5: il punteggio è la media bayesiana
+(C·m + somma) / (C + n), con m voto medio globale e C recensioni "virtuali" a quel voto, calcolata
+in SQL dai riepiloghi (rating_summaries) invece che dalle singole recensioni. Il caricamento scorre
+le righe una volta e per ogni gruppo (tutti, categoria, market, tipo di vendor) tiene un min-heap
+di al massimo K voci: la memoria dipende da gruppi·K, non dal numero di recensioni. Ogni classifica
+è una tupla già ordinata e una lettura è una slice.
+Scaduto l'intervallo di ricalcolo, il primo lettore ricarica mentre gli altri continuano a leggere
+le classifiche precedenti; solo il primo caricamento è bloccante. Le classifiche sono per processo.
+"""
+
+import heapq
+import threading
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+
+GroupKey = Tuple[Hashable, ...]
+
+# Gruppo che contiene tutte le voci
+ALL: GroupKey = ("all",)
+
+
+class LeaderboardRow(NamedTuple):
+    """Riga prodotta dal caricamento: gruppi di appartenenza oltre ad ALL"""
+    entity_id: int
+    groups: Tuple[GroupKey, ...]
+    score: float
+    review_count: int
+    average: float
+
+
+class LeaderboardEntry(NamedTuple):
+    entity_id: int
+    score: float
+    review_count: int
+    average: float
+
+
+def bayesian_score(rating_sum: float, review_count: int, prior_mean: float, prior_weight: float) -> float:
+    """Media bayesiana: il voto medio globale pesa come `prior_weight` recensioni"""
+    return (prior_weight * prior_mean + rating_sum) / (prior_weight + review_count)
+
+
+def top_k(rows: Iterable[LeaderboardRow], size: int) -> Dict[GroupKey, Tuple[LeaderboardEntry, ...]]:
+    """Prime `size` voci di ogni gruppo (punteggio, poi numero di recensioni, poi id più basso)"""
+    heaps: Dict[GroupKey, list] = {}
+    for row in rows:
+        item = (row.score, row.review_count, -row.entity_id, row.average)
+        for group in (ALL,) + tuple(row.groups):
+            heap = heaps.setdefault(group, [])
+            if len(heap) < size:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+    return {
+        group: tuple(
+            LeaderboardEntry(-negative_id, score, review_count, average)
+            for score, review_count, negative_id, average in sorted(heap, reverse=True)
+        )
+        for group, heap in heaps.items()
+    }
+
+
+class Leaderboard:
+    """Classifiche top-K per gruppo con ricalcolo periodico, thread-safe"""
+
+    def __init__(self, size: int, refresh_seconds: float):
+        self.size = size
+        self.refresh_seconds = refresh_seconds
+        self._boards: Optional[Mapping[GroupKey, Tuple[LeaderboardEntry, ...]]] = None
+        self._lock = threading.Lock()
+        self.loaded_at = 0.0
+        self.loads = 0
+        self.load_ms: Optional[float] = None
+
+    def refresh(self, load: Callable[[], Iterable[LeaderboardRow]]) -> None:
+        """Ricalcola subito tutte le classifiche (`load` restituisce le righe con il punteggio)"""
+        with self._lock:
+            self._refresh(load)
+
+    def _refresh(self, load: Callable[[], Iterable[LeaderboardRow]]) -> None:
+        started = time.perf_counter()
+        boards = top_k(load(), self.size)
+        self._boards = MappingProxyType(boards)
+        self.loaded_at = time.monotonic()
+        self.loads += 1
+        self.load_ms = (time.perf_counter() - started) * 1000
+
+    def _current(self, load: Callable[[], Iterable[LeaderboardRow]]) -> Mapping[GroupKey, Tuple[LeaderboardEntry, ...]]:
+        if self._boards is None:
+            with self._lock:
+                if self._boards is None:
+                    self._refresh(load)
+        elif time.monotonic() - self.loaded_at >= self.refresh_seconds and self._lock.acquire(blocking=False):
+            # Un solo lettore ricalcola, gli altri leggono le classifiche correnti
+            try:
+                if time.monotonic() - self.loaded_at >= self.refresh_seconds:
+                    self._refresh(load)
+            finally:
+                self._lock.release()
+        return self._boards
+
+    def top(self, load: Callable[[], Iterable[LeaderboardRow]], group: GroupKey = ALL,
+            limit: int = 10) -> List[LeaderboardEntry]:
+        """Prime `limit` voci del gruppo (al massimo `size`)"""
+        return list(self._current(load).get(group, ())[:limit])
+
+    def stats(self) -> dict:
+        """Contatori per il monitoraggio delle classifiche"""
+        boards = self._boards
+        return {
+            "groups": len(boards) if boards is not None else None,
+            "entries": sum(len(board) for board in boards.values()) if boards is not None else None,
+            "size": self.size,
+            "refresh_seconds": self.refresh_seconds,
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1) if boards is not None else None,
+            "loads": self.loads,
+            "load_ms": round(self.load_ms, 1) if self.load_ms is not None else None,
+        }
+
+
+# Istanze globali delle classifiche
+product_leaderboard = Leaderboard(size=settings.LEADERBOARD_SIZE, refresh_seconds=settings.LEADERBOARD_REFRESH_SECONDS)
+vendor_leaderboard = Leaderboard(size=settings.LEADERBOARD_SIZE, refresh_seconds=settings.LEADERBOARD_REFRESH_SECONDS)
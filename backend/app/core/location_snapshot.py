@@ -0,0 +1,102 @@
+"""
+Snapshot in memoria delle coordinate delle location come array NumPy e haversine vettorizzata
+
+Le matrici di distanza molti-a-molti (origini x destinazioni) si calcolano con una sola espressione
+NumPy invece di N·M chiamate Python. Lo snapshot tiene id ordinati e lat/lon in radianti (float64)
+più il coseno della latitudine precalcolato; gli id si risolvono in posizioni con searchsorted.
+Viene ricaricato alla scadenza del TTL, quando si chiede un id che non contiene (location creata
+da un altro worker) o dopo un'invalidazione esplicita. Lo snapshot è per processo, come la cache
+dei principal: le coordinate modificate da altri worker si riallineano alla scadenza del TTL.
+"""
+
+import itertools
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.db.spatial_index import EARTH_RADIUS_KM
+
+
+class LocationCoordinates:
+    """Coordinate di tutte le location, ordinate per id"""
+    __slots__ = ("ids", "lat", "lon", "cos_lat", "loaded_at")
+
+    def __init__(self, rows: Sequence[Tuple[int, float, float]]):
+        # fromiter sulle righe appiattite: np.array su una lista di Row è un ordine di grandezza più lento
+        data = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.float64, count=3 * len(rows)).reshape(-1, 3)
+        order = np.argsort(data[:, 0], kind="stable")
+        self.ids = data[order, 0].astype(np.int64)
+        self.lat = np.radians(data[order, 1])
+        self.lon = np.radians(data[order, 2])
+        self.cos_lat = np.cos(self.lat)
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def positions(self, ids: Iterable[int]) -> Tuple[np.ndarray, List[int]]:
+        """Posizioni degli id nello snapshot e id non presenti"""
+        wanted = np.asarray(list(ids), dtype=np.int64)
+        positions = np.searchsorted(self.ids, wanted)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == wanted[found]
+        return positions, sorted(set(wanted[~found].tolist()))
+
+
+def haversine_matrix(lat1: np.ndarray, lon1: np.ndarray, cos_lat1: np.ndarray,
+                     lat2: np.ndarray, lon2: np.ndarray, cos_lat2: np.ndarray) -> np.ndarray:
+    """Distanze in km tra ogni punto 1 (righe) e ogni punto 2 (colonne); coordinate in radianti"""
+    sin_dlat = np.sin((lat2[np.newaxis, :] - lat1[:, np.newaxis]) / 2)
+    sin_dlon = np.sin((lon2[np.newaxis, :] - lon1[:, np.newaxis]) / 2)
+    a = sin_dlat ** 2 + np.outer(cos_lat1, cos_lat2) * sin_dlon ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class LocationSnapshot:
+    """Snapshot condiviso con TTL e ricarica su richiesta, thread-safe"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._coordinates: Optional[LocationCoordinates] = None
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.load_ms: Optional[float] = None
+        self.invalidations = 0
+
+    def get(self, load: Callable[[], Sequence[Tuple[int, float, float]]], force: bool = False) -> LocationCoordinates:
+        """Snapshot corrente; `load` restituisce le righe (id, lat, lon) se va ricaricato"""
+        with self._lock:
+            coordinates = self._coordinates
+            expired = coordinates is None or time.monotonic() - coordinates.loaded_at >= self.ttl_seconds
+            if force or expired:
+                started = time.perf_counter()
+                coordinates = LocationCoordinates(load())
+                self._coordinates = coordinates
+                self.loads += 1
+                self.load_ms = (time.perf_counter() - started) * 1000
+            return coordinates
+
+    def invalidate(self) -> None:
+        """Forza la ricarica alla prossima richiesta (coordinate modificate da questo worker)"""
+        with self._lock:
+            if self._coordinates is not None:
+                self._coordinates = None
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        """Contatori per il monitoraggio dello snapshot"""
+        with self._lock:
+            return {
+                "locations": len(self._coordinates) if self._coordinates is not None else None,
+                "ttl_seconds": self.ttl_seconds,
+                "loads": self.loads,
+                "invalidations": self.invalidations,
+                "load_ms": round(self.load_ms, 1) if self.load_ms is not None else None,
+            }
+
+
+# Istanza globale dello snapshot
+location_snapshot = LocationSnapshot(ttl_seconds=settings.LOCATION_SNAPSHOT_TTL_SECONDS)
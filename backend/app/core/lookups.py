@@ -0,0 +1,123 @@
+"""
+Registro in memoria delle tabelle di lookup (models/enums.py): corrispondenza id <-> nome
+
+Ruoli, stati delle richieste, rating, giorni, categorie, unità di misura, colture e categorie di
+menu cambiano solo con il seed o con interventi amministrativi, ma i servizi li cercavano per nome
+a ogni chiamata (una query o una JOIN in più). Il registro li carica tutti all'avvio in tabelle
+immutabili: i servizi traducono il nome in id prima della query e filtrano direttamente sulla
+foreign key. `reload()` sostituisce in blocco tutte le tabelle; un nome sconosciuto provoca una
+ricarica (es. riga aggiunta dopo l'avvio) prima di rispondere None, al massimo una ogni
+MISS_RELOAD_INTERVAL_SECONDS perché nomi inesistenti non costino query a ogni richiesta.
+Il registro è per processo.
+"""
+
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple, Type
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.enums import (
+    ContactInfoType, CropType, DayWeek, MenuCategory, ProductCategory, Rating, RequestStatus, RoleType, UnitMeasure
+)
+
+# Intervallo minimo tra due ricariche causate da un nome o id sconosciuto
+MISS_RELOAD_INTERVAL_SECONDS = 5.0
+
+LOOKUP_MODELS = (
+    RoleType, ContactInfoType, DayWeek, ProductCategory, UnitMeasure, Rating, RequestStatus, CropType, MenuCategory
+)
+
+
+class LookupRow(NamedTuple):
+    id: int
+    name: str
+    description: Optional[str] = None
+
+
+class LookupTable:
+    """Righe di una tabella di lookup in ordine di id, con indici per id e per nome (sola lettura)"""
+    __slots__ = ("rows", "by_id", "by_name")
+
+    def __init__(self, rows: Tuple[LookupRow, ...]):
+        self.rows = rows
+        self.by_id: Mapping[int, LookupRow] = MappingProxyType({row.id: row for row in rows})
+        self.by_name: Mapping[str, LookupRow] = MappingProxyType({row.name: row for row in rows})
+
+    def id(self, name: str) -> Optional[int]:
+        row = self.by_name.get(name)
+        return row.id if row is not None else None
+
+    def name(self, lookup_id: int) -> Optional[str]:
+        row = self.by_id.get(lookup_id)
+        return row.name if row is not None else None
+
+
+class LookupRegistry:
+    """Tabelle di lookup caricate in blocco; ogni ricarica sostituisce atomicamente l'intero insieme"""
+
+    def __init__(self):
+        self._tables: Mapping[Type[Any], LookupTable] = MappingProxyType({})
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.loads = 0
+        self.load_ms: Optional[float] = None
+
+    def reload(self, db: Session) -> None:
+        """Rilegge tutte le tabelle di lookup (hook esplicito dopo seed o modifiche amministrative)"""
+        started = time.perf_counter()
+        tables: Dict[Type[Any], LookupTable] = {}
+        for model in LOOKUP_MODELS:
+            description = getattr(model, "description", None)
+            columns = [model.id, model.name] + ([description] if description is not None else [])
+            rows = db.execute(select(*columns).order_by(model.id)).all()
+            tables[model] = LookupTable(tuple(LookupRow(*row) for row in rows))
+        with self._lock:
+            self._tables = MappingProxyType(tables)
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+            self.loads += 1
+            self.load_ms = (time.perf_counter() - started) * 1000
+
+    def table(self, db: Session, model: Type[Any]) -> LookupTable:
+        """Tabella di lookup del modello (caricata al primo uso se l'avvio non l'ha già fatto)"""
+        if not self.loaded:
+            self.reload(db)
+        return self._tables[model]
+
+    def _reload_on_miss(self, db: Session) -> bool:
+        if time.monotonic() - self.loaded_at < MISS_RELOAD_INTERVAL_SECONDS:
+            return False
+        self.reload(db)
+        return True
+
+    def id(self, db: Session, model: Type[Any], name: str) -> Optional[int]:
+        """Id della riga con quel nome, None se non esiste nemmeno dopo una ricarica"""
+        lookup_id = self.table(db, model).id(name)
+        if lookup_id is None and self._reload_on_miss(db):
+            lookup_id = self._tables[model].id(name)
+        return lookup_id
+
+    def name(self, db: Session, model: Type[Any], lookup_id: int) -> Optional[str]:
+        """Nome della riga con quell'id, None se non esiste nemmeno dopo una ricarica"""
+        name = self.table(db, model).name(lookup_id)
+        if name is None and self._reload_on_miss(db):
+            name = self._tables[model].name(lookup_id)
+        return name
+
+    def stats(self) -> dict:
+        """Contatori per il monitoraggio del registro"""
+        tables = self._tables
+        return {
+            "loaded": self.loaded,
+            "tables": {model.__tablename__: len(table.rows) for model, table in tables.items()},
+            "loads": self.loads,
+            "load_ms": round(self.load_ms, 1) if self.load_ms is not None else None,
+        }
+
+
+# Istanza globale del registro
+lookup_registry = LookupRegistry()
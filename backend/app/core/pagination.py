@@ -0,0 +1,115 @@
+"""
+Paginazione keyset (cursore) su (chiave di ordinamento, id)
+
+Invece di OFFSET, ogni pagina riparte dall'ultima riga della precedente con
+`WHERE (sort_key, id) > (:last_sort_key, :last_id)`: il costo non cresce con la profondità della
+pagina e l'indice sulla chiave viene usato per posizionarsi. Il cursore è un token opaco
+(JSON in base64 url-safe) con i valori dell'ultima riga e il nome delle chiavi di ordinamento.
+Le chiavi di ordinamento devono essere NOT NULL e l'ultima deve essere univoca (l'id).
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime, time
+from typing import Any, Dict, Generic, List, Optional, Sequence, TypeVar
+from sqlalchemy import tuple_
+
+T = TypeVar("T")
+
+# Dimensione massima di una pagina accettata dagli endpoint
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursorError(ValueError):
+    """Cursore malformato o generato per un ordinamento diverso"""
+
+
+class Page(Generic[T]):
+    """Una pagina di risultati con il cursore per la successiva e, se richiesto, il totale"""
+
+    def __init__(self, items: List[T], next_cursor: Optional[str], total: Optional[int] = None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+    def to_response(self, key: str) -> Dict[str, Any]:
+        """Corpo della risposta: `{key: items, "next_cursor": ...}` più `total` se calcolato"""
+        response = {key: self.items, "next_cursor": self.next_cursor}
+        if self.total is not None:
+            response["total"] = self.total
+        return response
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, time):
+        return {"t": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "t" in value:
+            return time.fromisoformat(value["t"])
+        raise InvalidCursorError("Unsupported cursor value")
+    return value
+
+
+def _key_names(keys: Sequence) -> List[str]:
+    return [key.key for key in keys]
+
+
+def encode_cursor(keys: Sequence, values: Sequence[Any]) -> str:
+    payload = {"k": _key_names(keys), "v": [_encode_value(value) for value in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(keys: Sequence, cursor: str) -> List[Any]:
+    """Valori dell'ultima riga della pagina precedente"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        names, values = payload["k"], payload["v"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise InvalidCursorError("Malformed cursor")
+    if names != _key_names(keys) or len(values) != len(keys):
+        raise InvalidCursorError("Cursor does not match this listing")
+    try:
+        return [_decode_value(value) for value in values]
+    except ValueError:
+        raise InvalidCursorError("Malformed cursor")
+
+
+def apply_keyset(query, keys: Sequence, cursor: Optional[str], limit: int, descending: bool = False):
+    """
+    Aggiunge a una Query o Select il filtro dopo il cursore, l'ordinamento per `keys`
+    e LIMIT limit + 1 (la riga in più dice se esiste una pagina successiva)
+    """
+    if cursor:
+        values = decode_cursor(keys, cursor)
+        if len(keys) == 1:
+            condition = keys[0] < values[0] if descending else keys[0] > values[0]
+        else:
+            row, after = tuple_(*keys), tuple_(*values)
+            condition = row < after if descending else row > after
+        query = query.filter(condition)
+    ordering = [key.desc() if descending else key.asc() for key in keys]
+    return query.order_by(None).order_by(*ordering).limit(limit + 1)
+
+
+def build_page(rows: List[T], keys: Sequence, limit: int, total: Optional[int] = None) -> Page[T]:
+    """Taglia la riga in più e calcola il cursore della pagina successiva"""
+    if len(rows) <= limit:
+        return Page(rows, None, total)
+    items = rows[:limit]
+    last = items[-1]
+    return Page(items, encode_cursor(keys, [getattr(last, key.key) for key in keys]), total)
@@ -0,0 +1,118 @@
+"""
+Executor dedicato per hashing e verifica delle password (bcrypt)
+
+bcrypt impiega centinaia di millisecondi per chiamata: eseguirlo nel threadpool
+di default di Starlette blocca i worker condivisi con tutti gli altri endpoint.
+Qui le operazioni passano da un pool separato e di dimensione fissa, con una coda
+limitata: quando è satura la richiesta fallisce subito con 503 invece di accodarsi.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+
+class PasswordHashingUnavailableError(HTTPException):
+    def __init__(self, detail: str = "Authentication service busy, retry shortly"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "1"},
+        )
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class PasswordHashingExecutor:
+    """Pool di thread limitato con coda a capacità fissa e metriche di latenza"""
+
+    def __init__(self, max_workers: int, max_queue: int, latency_window: int = 1000):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._hash_latencies: Deque[float] = deque(maxlen=latency_window)
+        self._wait_latencies: Deque[float] = deque(maxlen=latency_window)
+        self.completed = 0
+        self.rejected = 0
+
+    def _acquire_slot(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHashingUnavailableError()
+            self._pending += 1
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _timed_call(self, submitted_at: float, fn: Callable[..., Any], *args: Any) -> Any:
+        started_at = time.perf_counter()
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            finished_at = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+                self._wait_latencies.append(started_at - submitted_at)
+                self._hash_latencies.append(finished_at - started_at)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Esegue fn nel pool dedicato; solleva 503 se la coda è piena"""
+        self._acquire_slot()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, self._timed_call, time.perf_counter(), fn, *args
+            )
+        finally:
+            self._release_slot()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Profondità della coda e latenze (ms) sulle ultime operazioni"""
+        with self._lock:
+            hash_latencies = sorted(self._hash_latencies)
+            wait_latencies = sorted(self._wait_latencies)
+            stats = {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._running,
+                "queue_depth": max(0, self._pending - self._running),
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+        for name, values in (("hash_latency_ms", hash_latencies), ("queue_wait_ms", wait_latencies)):
+            stats[name] = {
+                "p50": round(_percentile(values, 0.50) * 1000, 2),
+                "p95": round(_percentile(values, 0.95) * 1000, 2),
+                "p99": round(_percentile(values, 0.99) * 1000, 2),
+                "max": round(values[-1] * 1000, 2),
+            } if values else None
+        return stats
+
+
+# Istanza globale dell'executor
+password_hashing_executor = PasswordHashingExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
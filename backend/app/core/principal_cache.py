@@ -0,0 +1,108 @@
+"""
+Cache in-process dei principal autenticati (utente -> ruolo, stato, lingua)
+
+Evita di interrogare il database ad ogni richiesta autenticata: le dipendenze
+di autenticazione risolvono l'utente corrente da questa cache e caricano il
+modello User completo solo quando serve davvero.
+La cache è per processo: con più worker l'invalidazione esplicita vale solo
+per il worker che esegue la modifica, gli altri si riallineano alla scadenza del TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+
+
+class CachedPrincipal(NamedTuple):
+    """Dati minimi dell'utente necessari per autenticazione e autorizzazione"""
+    id: int
+    role_type_id: int
+    role_name: str
+    is_active: bool
+    language: str
+
+
+class PrincipalCache:
+    """Cache LRU con TTL e dimensione massima, thread-safe"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple[float, CachedPrincipal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, user_id: int) -> Optional[CachedPrincipal]:
+        """Restituisce il principal in cache, None se assente o scaduto"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return principal
+
+    def set(self, principal: CachedPrincipal) -> None:
+        """Inserisce o aggiorna un principal, eliminando i meno usati oltre la capacità"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        """Rimuove un utente dalla cache (cambio ruolo, disattivazione, eliminazione)"""
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Svuota completamente la cache"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Contatori per il monitoraggio della cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Istanza globale della cache
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
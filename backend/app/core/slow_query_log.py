@@ -0,0 +1,148 @@
+"""
+Log delle query lente: ring buffer in memoria, spill opzionale su file a rotazione ed EXPLAIN QUERY PLAN
+"""
+
+import json
+import logging
+import re
+from collections import OrderedDict, deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from threading import Lock
+from typing import List, Optional
+from app.core.config import settings
+
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+_SENSITIVE_PARAM = re.compile(r"password|passwd|secret|token|hash|email|phone", re.IGNORECASE)
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE|INSERT)\b", re.IGNORECASE)
+_MAX_PARAM_LENGTH = 64
+
+
+def redact_parameters(parameters, names: Optional[List[str]] = None):
+    """Oscura i parametri sensibili (per nome) e tronca le stringhe lunghe"""
+    def redact(name, value):
+        if name and _SENSITIVE_PARAM.search(name):
+            return "***"
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return f"<{len(value)} bytes>"
+        if isinstance(value, str) and len(value) > _MAX_PARAM_LENGTH:
+            return value[:_MAX_PARAM_LENGTH] + "…"
+        if value is None or isinstance(value, (int, float, bool, str)):
+            return value
+        return str(value)
+
+    if isinstance(parameters, dict):
+        return {key: redact(key, value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        names = list(names or [])
+        return [
+            redact(names[index] if index < len(names) else None, value)
+            for index, value in enumerate(parameters)
+        ]
+    return parameters
+
+
+def is_full_scan(plan: List[str]) -> bool:
+    """True se il piano contiene uno SCAN di tabella senza indice"""
+    return any(step.startswith("SCAN") and "USING" not in step for step in plan)
+
+
+class SlowQueryLog:
+    """Ring buffer limitato delle query oltre la soglia, con piano di esecuzione per fingerprint"""
+
+    def __init__(self, threshold_ms: float, error_threshold_ms: float, max_entries: int,
+                 log_file: str = "", max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 max_cached_plans: int = 1000):
+        self.threshold_ms = threshold_ms
+        self.error_threshold_ms = error_threshold_ms
+        self._entries = deque(maxlen=max_entries)
+        self._plans: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._max_cached_plans = max_cached_plans
+        self._lock = Lock()
+        self._file_logger = None
+        if log_file:
+            handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._file_logger = logging.getLogger("farmer_market.slow_queries")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(handler)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def _explain(self, dbapi_connection, statement: str, parameters) -> List[str]:
+        """EXPLAIN QUERY PLAN eseguito su un cursore grezzo della stessa connessione"""
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [row[-1] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def _plan_for(self, fingerprint: str, dialect_name: str, dbapi_connection, statement, parameters, executemany):
+        with self._lock:
+            if fingerprint in self._plans:
+                self._plans.move_to_end(fingerprint)
+                return self._plans[fingerprint]
+        if dialect_name != "sqlite" or executemany or not _EXPLAINABLE.match(statement):
+            return None
+        try:
+            plan = self._explain(dbapi_connection, statement, parameters)
+        except Exception as exc:
+            return [f"EXPLAIN failed: {exc}"]
+        with self._lock:
+            self._plans[fingerprint] = plan
+            if len(self._plans) > self._max_cached_plans:
+                self._plans.popitem(last=False)
+        return plan
+
+    def record(self, *, statement: str, fingerprint: str, parameters, parameter_names, duration_ms: float,
+               route: Optional[str], dialect_name: str, dbapi_connection, executemany: bool) -> None:
+        """Registra una query lenta (chiamato dall'hook after_cursor_execute)"""
+        plan = self._plan_for(fingerprint, dialect_name, dbapi_connection, statement, parameters, executemany)
+        full_scan = is_full_scan(plan) if plan else False
+        entry = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "level": "ERROR" if duration_ms >= self.error_threshold_ms else "WARNING",
+            "route": route,
+            "duration_ms": round(duration_ms, 2),
+            "statement": statement,
+            "fingerprint": fingerprint,
+            "parameters": (
+                f"<{len(parameters)} rows>" if executemany
+                else redact_parameters(parameters, parameter_names)
+            ),
+            "query_plan": plan,
+            "full_scan": full_scan,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        if self._file_logger is not None:
+            self._file_logger.info(json.dumps(entry, default=str))
+
+    def entries(self, level: Optional[str] = None, limit: int = 100) -> List[dict]:
+        """Voci più recenti con livello almeno `level`"""
+        min_level = LOG_LEVELS.get(level.upper(), 0) if level else 0
+        with self._lock:
+            snapshot = list(self._entries)
+        matching = [entry for entry in reversed(snapshot) if LOG_LEVELS[entry["level"]] >= min_level]
+        return matching[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+
+# Istanza globale del log delle query lente
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    error_threshold_ms=settings.SLOW_QUERY_ERROR_THRESHOLD_MS,
+    max_entries=settings.SLOW_QUERY_LOG_SIZE,
+    log_file=settings.SLOW_QUERY_LOG_FILE,
+    max_bytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+    backup_count=settings.SLOW_QUERY_LOG_BACKUPS,
+)
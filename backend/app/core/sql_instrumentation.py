@@ -0,0 +1,229 @@
+"""
+Strumentazione SQL per richiesta: conteggio query, tempo SQL, fingerprint ripetuti e rilevamento N+1
+"""
+
+import random
+import re
+import time
+from collections import Counter, OrderedDict, deque
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.slow_query_log import slow_query_log
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|:\w+|%\(\w+\)s)(?:\s*,\s*(?:\?|:\w+|%\(\w+\)s))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalizza uno statement SQL togliendo letterali e liste di parametri"""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class RequestSQLStats:
+    """Statistiche SQL raccolte durante una singola richiesta"""
+
+    __slots__ = ("query_count", "sql_time_ms", "fingerprints", "started_at")
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_time_ms = 0.0
+        self.fingerprints: Counter = Counter()
+        self.started_at = time.perf_counter()
+
+    def record(self, statement_fingerprint: str, duration_ms: float) -> None:
+        self.query_count += 1
+        self.sql_time_ms += duration_ms
+        self.fingerprints[statement_fingerprint] += 1
+
+    def n_plus_one(self, threshold: int) -> List[dict]:
+        """Statement ripetuti almeno `threshold` volte nella stessa richiesta"""
+        return [
+            {"fingerprint": statement, "count": count}
+            for statement, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+
+_current_stats: ContextVar[Optional[RequestSQLStats]] = ContextVar("sql_request_stats", default=None)
+_current_scope: ContextVar[Optional[dict]] = ContextVar("sql_request_scope", default=None)
+
+
+def current_request_stats() -> Optional[RequestSQLStats]:
+    """Statistiche della richiesta corrente (None se non campionata)"""
+    return _current_stats.get()
+
+
+def _current_route() -> Optional[str]:
+    scope = _current_scope.get()
+    if scope is None:
+        return None
+    return f"{scope.get('method', 'GET')} {_route_template(scope)}"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Inizio sul contesto dello statement: se l'esecuzione fallisce non resta nulla sulla connessione
+    if slow_query_log.enabled or _current_stats.get() is not None:
+        context._sql_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_sql_query_start", None)
+    if started is None:
+        return
+    context._sql_query_start = None
+    duration_ms = (time.perf_counter() - started) * 1000
+    stats = _current_stats.get()
+    is_slow = slow_query_log.enabled and duration_ms >= slow_query_log.threshold_ms
+    if stats is None and not is_slow:
+        return
+
+    statement_fingerprint = fingerprint(statement)
+    if stats is not None:
+        stats.record(statement_fingerprint, duration_ms)
+    if is_slow:
+        compiled = getattr(context, "compiled", None)
+        slow_query_log.record(
+            statement=statement,
+            fingerprint=statement_fingerprint,
+            parameters=parameters,
+            parameter_names=getattr(compiled, "positiontup", None),
+            duration_ms=duration_ms,
+            route=_current_route(),
+            dialect_name=conn.dialect.name,
+            dbapi_connection=conn.connection.dbapi_connection,
+            executemany=executemany,
+        )
+
+
+def install_sql_instrumentation(engine: Engine) -> None:
+    """Registra gli hook before/after_cursor_execute sull'engine (sincrono)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RouteSQLSummary:
+    """Riepilogo a finestra mobile delle statistiche SQL per route"""
+
+    def __init__(self, window: int, max_routes: int = 500):
+        self.window = window
+        self.max_routes = max_routes
+        self._routes: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = Lock()
+
+    def add(self, route: str, stats: RequestSQLStats, duration_ms: float, n_plus_one: List[dict]) -> None:
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = {
+                    "samples": deque(maxlen=self.window),
+                    "fingerprints": Counter(),
+                }
+                self._routes[route] = entry
+                if len(self._routes) > self.max_routes:
+                    self._routes.popitem(last=False)
+            entry["samples"].append((stats.query_count, stats.sql_time_ms, duration_ms, bool(n_plus_one)))
+            for suspect in n_plus_one:
+                entry["fingerprints"][suspect["fingerprint"]] += 1
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            routes = {route: (list(entry["samples"]), entry["fingerprints"].most_common(5))
+                      for route, entry in self._routes.items()}
+
+        result = {}
+        for route, (samples, suspects) in routes.items():
+            queries = sorted(sample[0] for sample in samples)
+            sql_times = [sample[1] for sample in samples]
+            durations = [sample[2] for sample in samples]
+            result[route] = {
+                "requests": len(samples),
+                "avg_queries": round(sum(queries) / len(queries), 2),
+                "p95_queries": queries[min(len(queries) - 1, int(len(queries) * 0.95))],
+                "max_queries": queries[-1],
+                "avg_sql_ms": round(sum(sql_times) / len(sql_times), 2),
+                "avg_request_ms": round(sum(durations) / len(durations), 2),
+                "sql_time_ratio": round(sum(sql_times) / sum(durations), 3) if sum(durations) else 0.0,
+                "n_plus_one_requests": sum(1 for sample in samples if sample[3]),
+                "n_plus_one_suspects": [{"fingerprint": statement, "requests": count} for statement, count in suspects],
+            }
+        return dict(sorted(result.items(), key=lambda item: item[1]["avg_sql_ms"], reverse=True))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+def _route_template(scope) -> str:
+    """Template della route completa di prefisso dei router inclusi (es. /api/v1/consumer/events/{event_id})"""
+    path = scope.get("path", "")
+    route_path = getattr(scope.get("route"), "path", None)
+    if not route_path:
+        return path
+    path_segments = path.strip("/").split("/")
+    route_segments = route_path.strip("/").split("/")
+    prefix = path_segments[:max(0, len(path_segments) - len(route_segments))]
+    return "/" + "/".join(prefix + route_segments) if prefix else route_path
+
+
+class SQLInstrumentationMiddleware:
+    """Middleware ASGI: campiona le richieste, aggiunge Server-Timing e alimenta il riepilogo per route"""
+
+    def __init__(self, app, sample_rate: float = 1.0, n_plus_one_threshold: int = 5, summary: "RouteSQLSummary" = None):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.summary = summary if summary is not None else route_sql_summary
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        scope_token = _current_scope.set(scope)
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _current_scope.reset(scope_token)
+            return
+
+        stats = RequestSQLStats()
+        token = _current_stats.set(stats)
+        n_plus_one: List[dict] = []
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                n_plus_one.extend(stats.n_plus_one(self.n_plus_one_threshold))
+                duration_ms = (time.perf_counter() - stats.started_at) * 1000
+                timing = (
+                    f'sql;dur={stats.sql_time_ms:.1f};desc="{stats.query_count} queries", '
+                    f"app;dur={duration_ms:.1f}"
+                )
+                if n_plus_one:
+                    timing += f';desc="N+1 suspected x{n_plus_one[0]["count"]}"'
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            _current_scope.reset(scope_token)
+            route_path = _route_template(scope)
+            duration_ms = (time.perf_counter() - stats.started_at) * 1000
+            self.summary.add(f"{scope.get('method', 'GET')} {route_path}", stats, duration_ms, n_plus_one)
+
+
+# Istanza globale del riepilogo per route
+route_sql_summary = RouteSQLSummary(window=settings.SQL_ROUTE_SUMMARY_WINDOW)
@@ -0,0 +1,82 @@
+"""
+Export in streaming NDJSON/CSV: righe Core lette a blocchi dal cursore e codificate direttamente in byte
+
+Il generatore apre una propria connessione di sola lettura (la sessione della richiesta può essere
+già chiusa mentre la risposta è ancora in invio), legge con `stream_results`/`yield_per` senza
+istanziare oggetti ORM e accumula le righe codificate fino a EXPORT_FLUSH_BYTES prima di ogni chunk.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, time
+from typing import Iterable, Iterator, List, Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+from app.core.config import settings
+from app.db.session import read_engine
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Pattern per il parametro `format` degli endpoint di export
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv)$"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def ndjson_chunks(rows: Iterable, columns: List[str], flush_bytes: int) -> Iterator[bytes]:
+    """Una riga JSON per record, inviate a blocchi di almeno `flush_bytes`"""
+    buffer: List[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= flush_bytes:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def csv_chunks(rows: Iterable, columns: List[str], flush_bytes: int) -> Iterator[bytes]:
+    """CSV con intestazione, inviato a blocchi di almeno `flush_bytes`"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= flush_bytes:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def stream_statement(statement: Select, export_format: str, engine: Optional[Engine] = None,
+                     yield_per: Optional[int] = None, flush_bytes: Optional[int] = None) -> Iterator[bytes]:
+    """Esegue lo statement su una connessione dedicata e ne produce i chunk codificati"""
+    encoder = csv_chunks if export_format == "csv" else ndjson_chunks
+    with (engine or read_engine).connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=yield_per or settings.EXPORT_YIELD_PER
+        ).execute(statement)
+        yield from encoder(result, list(result.keys()), flush_bytes or settings.EXPORT_FLUSH_BYTES)
+
+
+def export_response(chunks: Iterator[bytes], export_format: str, filename: str) -> StreamingResponse:
+    """StreamingResponse con media type e nome file per il formato richiesto"""
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
@@ -0,0 +1,233 @@
+"""
+Indice in memoria per l'autocompletamento: array ordinato di chiavi normalizzate e ricerca per prefisso
+
+Ogni voce (tipo, riferimento) ha un testo, un peso di popolarità e più chiavi: il testo intero e le
+sue parti a partire dalle parole successive ("Pomodoro San Marzano" -> "pomodoro san marzano",
+"san marzano", "marzano"), così "marz" completa anche a metà nome. Le chiavi sono normalizzate
+(minuscole, senza accenti) e tenute in una lista ordinata: un prefisso corrisponde a un intervallo
+trovato con bisect, da cui si scelgono le voci più popolari. Il numero totale di chiavi è limitato
+da SUGGEST_MAX_ENTRIES (al caricamento restano le voci più popolari) e al massimo SUGGEST_MAX_SCAN
+chiavi vengono esaminate per richiesta. I migliori risultati per prefisso restano in una cache LRU,
+invalidata per prefisso a ogni modifica delle voci: i prefissi brevi, i più costosi da scorrere,
+sono anche i più richiesti. L'indice è per processo, come la cache dei principal.
+"""
+
+import bisect
+import heapq
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+SUGGEST_KINDS = ("product", "vendor", "category", "zip")
+
+# Parole iniziali da cui generare chiavi (il testo intero conta come la prima)
+MAX_KEYS_PER_ENTRY = 3
+
+# Risultati memorizzati per prefisso (limite massimo di `limit`) e prefissi in cache
+CACHED_RESULTS = 50
+CACHED_PREFIXES = 10000
+
+
+class SuggestItem(NamedTuple):
+    """Voce da indicizzare; `parents` riceve gli incrementi di popolarità della voce"""
+    kind: str
+    ref: Any
+    text: str
+    weight: int = 0
+    parents: Tuple[Tuple[str, Any], ...] = ()
+
+
+class _Entry:
+    __slots__ = ("text", "weight", "keys", "parents")
+    
+    def __init__(self, text: str, weight: int, keys: List[str], parents: Tuple[Tuple[str, Any], ...]):
+        self.text = text
+        self.weight = weight
+        self.keys = keys
+        self.parents = parents
+
+
+def normalize(text: str) -> str:
+    """Minuscole, senza accenti e con spazi singoli"""
+    if text.isascii():
+        return " ".join(text.lower().split())
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join("".join(char for char in decomposed if not unicodedata.combining(char)).split())
+
+
+def entry_keys(text: str) -> List[str]:
+    words = normalize(text).split()
+    return [" ".join(words[index:]) for index in range(min(len(words), MAX_KEYS_PER_ENTRY))]
+
+
+class SuggestIndex:
+    """Array ordinato di (chiave, tipo, riferimento) con pesi di popolarità, thread-safe"""
+    
+    def __init__(self, max_entries: int, max_scan: int):
+        self.max_entries = max_entries
+        self.max_scan = max_scan
+        self._keys: List[Tuple[str, str, Any]] = []
+        self._entries: Dict[Tuple[str, Any], _Entry] = {}
+        self._lock = threading.RLock()
+        self._cache: "OrderedDict[Tuple[str, Tuple[str, ...]], List[Tuple[str, Any]]]" = OrderedDict()
+        self.ready = False
+        self.build_ms: Optional[float] = None
+        self.skipped = 0
+        self.updates = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+    
+    def load(self, items: Iterable[SuggestItem]) -> None:
+        """Ricostruisce l'indice; oltre il limite di chiavi restano le voci più popolari"""
+        if not self.enabled:
+            return
+        started = time.perf_counter()
+        keys: List[Tuple[str, str, Any]] = []
+        entries: Dict[Tuple[str, Any], _Entry] = {}
+        skipped = 0
+        for item in sorted(items, key=lambda item: -item.weight):
+            item_keys = entry_keys(item.text)
+            if not item_keys:
+                continue
+            if len(keys) + len(item_keys) > self.max_entries:
+                skipped += 1
+                continue
+            entries[(item.kind, item.ref)] = _Entry(item.text, item.weight, item_keys, item.parents)
+            keys.extend((key, item.kind, item.ref) for key in item_keys)
+        keys.sort()
+        with self._lock:
+            self._keys, self._entries = keys, entries
+            self._cache.clear()
+            self.skipped = skipped
+            self.ready = True
+            self.build_ms = (time.perf_counter() - started) * 1000
+    
+    def _invalidate(self, keys: Iterable[str]) -> None:
+        """Elimina dalla cache i prefissi delle chiavi modificate"""
+        if not self._cache:
+            return
+        prefixes = {key[:length] for key in keys for length in range(1, len(key) + 1)}
+        for cached in [cached for cached in self._cache if cached[0] in prefixes]:
+            del self._cache[cached]
+    
+    def _remove_keys(self, kind: str, ref: Any, entry: _Entry) -> None:
+        self._invalidate(entry.keys)
+        for key in entry.keys:
+            position = bisect.bisect_left(self._keys, (key, kind, ref))
+            if position < len(self._keys) and self._keys[position] == (key, kind, ref):
+                del self._keys[position]
+    
+    def upsert(self, item: SuggestItem, keep_weight: bool = True) -> None:
+        """Aggiunge o rinomina una voce (per default mantiene il peso già accumulato)"""
+        if not self.ready:
+            return
+        item_keys = entry_keys(item.text)
+        with self._lock:
+            entry = self._entries.get((item.kind, item.ref))
+            weight = entry.weight if entry is not None and keep_weight else item.weight
+            if entry is not None:
+                self._remove_keys(item.kind, item.ref, entry)
+                del self._entries[(item.kind, item.ref)]
+            if not item_keys or len(self._keys) + len(item_keys) > self.max_entries:
+                self.skipped += 1
+                return
+            self._entries[(item.kind, item.ref)] = _Entry(item.text, weight, item_keys, item.parents)
+            self._invalidate(item_keys)
+            for key in item_keys:
+                bisect.insort(self._keys, (key, item.kind, item.ref))
+            self.updates += 1
+    
+    def remove(self, kind: str, ref: Any) -> None:
+        if not self.ready:
+            return
+        with self._lock:
+            entry = self._entries.pop((kind, ref), None)
+            if entry is not None:
+                self._remove_keys(kind, ref, entry)
+                self.updates += 1
+    
+    def bump(self, kind: str, ref: Any, amount: int = 1) -> None:
+        """Aggiorna la popolarità di una voce e, a cascata, dei suoi genitori"""
+        if not self.ready:
+            return
+        with self._lock:
+            pending = [(kind, ref)]
+            while pending:
+                entry = self._entries.get(pending.pop())
+                if entry is not None:
+                    entry.weight = max(0, entry.weight + amount)
+                    self._invalidate(entry.keys)
+                    pending.extend(entry.parents)
+    
+    def suggest(self, prefix: str, kinds: Optional[Sequence[str]] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Le `limit` voci più popolari con una chiave che inizia per `prefix`"""
+        key = normalize(prefix)
+        if not key or not self.ready:
+            return []
+        cache_key = (key, tuple(sorted(kinds)) if kinds else ())
+        with self._lock:
+            best = self._cache.get(cache_key)
+            if best is None:
+                self.cache_misses += 1
+                best = self._scan(key, kinds)
+                self._cache[cache_key] = best
+                while len(self._cache) > CACHED_PREFIXES:
+                    self._cache.popitem(last=False)
+            else:
+                self.cache_hits += 1
+                self._cache.move_to_end(cache_key)
+            results = []
+            for kind, ref in best[:limit]:
+                entry = self._entries[(kind, ref)]
+                results.append({"type": kind, "id": ref if kind != "zip" else None,
+                                "text": entry.text, "weight": entry.weight})
+        return results
+    
+    def _scan(self, key: str, kinds: Optional[Sequence[str]]) -> List[Tuple[str, Any]]:
+        """Le CACHED_RESULTS voci più popolari tra le chiavi che iniziano per `key`"""
+        start = bisect.bisect_left(self._keys, (key,))
+        stop = min(len(self._keys), start + self.max_scan)
+        matches = {}
+        for position in range(start, stop):
+            indexed_key, kind, ref = self._keys[position]
+            if not indexed_key.startswith(key):
+                break
+            if kinds and kind not in kinds:
+                continue
+            matches[(kind, ref)] = self._entries[(kind, ref)]
+        best = heapq.nsmallest(
+            CACHED_RESULTS, matches.items(), key=lambda match: (-match[1].weight, len(match[1].text), match[1].text)
+        )
+        return [match for match, _ in best]
+    
+    def stats(self) -> dict:
+        """Contatori per il monitoraggio dell'indice"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "ready": self.ready,
+                "entries": len(self._entries),
+                "keys": len(self._keys),
+                "max_keys": self.max_entries,
+                "skipped": self.skipped,
+                "updates": self.updates,
+                "cached_prefixes": len(self._cache),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "build_ms": round(self.build_ms, 1) if self.build_ms is not None else None,
+            }
+
+
+# Istanza globale dell'indice
+suggest_index = SuggestIndex(
+    max_entries=settings.SUGGEST_MAX_ENTRIES,
+    max_scan=settings.SUGGEST_MAX_SCAN,
+)
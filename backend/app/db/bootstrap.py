@@ -0,0 +1,193 @@
+"""
+Inizializzazione del database all'avvio: fingerprint dello schema, template pre-popolato e lock tra worker
+"""
+
+import glob
+import hashlib
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Optional
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
+from app.core.config import settings
+from app.db.base import Base
+from app.db.migrations import MigrationRunner, run_migrations, schema_info, schema_metadata
+from app.db.session import engine, read_engine, async_engine
+import app.models  # noqa: F401  (registra tutte le tabelle su Base.metadata)
+
+try:
+    import fcntl
+except ImportError:  # Windows: nessun lock tra processi
+    fcntl = None
+
+FINGERPRINT_KEY = "schema_fingerprint"
+
+
+def schema_fingerprint(target_engine: Engine = engine) -> str:
+    """Hash del DDL dei modelli e dell'elenco delle migrazioni"""
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=target_engine.dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=target_engine.dialect)).encode())
+    for migration in MigrationRunner(target_engine).discover():
+        digest.update(f"{migration.version}:{migration.name}".encode())
+    return digest.hexdigest()
+
+
+def read_stored_fingerprint(target_engine: Engine = engine) -> Optional[str]:
+    """Fingerprint salvato nel database (None se assente)"""
+    if not inspect(target_engine).has_table(schema_info.name):
+        return None
+    with target_engine.connect() as connection:
+        return connection.execute(
+            select(schema_info.c.value).where(schema_info.c.key == FINGERPRINT_KEY)
+        ).scalar()
+
+
+def write_fingerprint(target_engine: Engine, fingerprint: str) -> None:
+    schema_metadata.create_all(bind=target_engine)
+    with target_engine.begin() as connection:
+        connection.execute(schema_info.delete().where(schema_info.c.key == FINGERPRINT_KEY))
+        connection.execute(schema_info.insert().values(key=FINGERPRINT_KEY, value=fingerprint))
+
+
+def _template_dir() -> str:
+    return settings.DB_TEMPLATE_DIR or os.path.dirname(settings.sqlite_path)
+
+
+def template_path(fingerprint: str) -> str:
+    base_name = os.path.splitext(os.path.basename(settings.sqlite_path))[0]
+    return os.path.join(_template_dir(), f"{base_name}.template-{fingerprint[:16]}.db")
+
+
+def build_template(fingerprint: str) -> str:
+    """Crea (se manca) il database template con schema, migrazioni e dati iniziali"""
+    path = template_path(fingerprint)
+    if os.path.exists(path):
+        return path
+
+    from app.db.seed import seed_initial_data
+
+    print("🧱 Creazione database template (schema cambiato o primo avvio)...")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    template_engine = create_engine(f"sqlite:///{tmp_path}")
+    try:
+        Base.metadata.create_all(bind=template_engine)
+        run_migrations(template_engine)
+        with Session(template_engine) as session:
+            seed_initial_data(session)
+        write_fingerprint(template_engine, fingerprint)
+    finally:
+        template_engine.dispose()
+    os.replace(tmp_path, path)
+
+    # I template di schemi precedenti non servono più
+    for stale in glob.glob(template_path("*")):
+        if stale != path:
+            os.remove(stale)
+    return path
+
+
+def _dispose_engines() -> None:
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
+    async_engine.sync_engine.dispose()
+
+
+def restore_from_template(template: str) -> None:
+    """Sostituisce il file del database con una copia del template"""
+    _dispose_engines()
+    db_path = settings.sqlite_path
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    shutil.copyfile(template, tmp_path)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    os.replace(tmp_path, db_path)
+
+
+@contextmanager
+def startup_lock():
+    """Lock su file che serializza l'inizializzazione tra i worker"""
+    if fcntl is None or not settings.is_sqlite_file:
+        yield
+        return
+    with open(f"{settings.sqlite_path}.startup.lock", "a+") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _boot_marker_path() -> str:
+    return f"{settings.sqlite_path}.boot"
+
+
+def _reset_done_by_sibling(fingerprint: str) -> bool:
+    """True se un worker fratello (stesso processo padre, ancora vivo) ha già resettato il database"""
+    if os.name != "posix" or not os.path.exists(_boot_marker_path()):
+        return False
+    try:
+        with open(_boot_marker_path()) as marker:
+            pid, parent_pid, marker_fingerprint = marker.read().split(":")
+        os.kill(int(pid), 0)
+    except (ValueError, OSError):
+        return False
+    return int(parent_pid) == os.getppid() and marker_fingerprint == fingerprint
+
+
+def _write_boot_marker(fingerprint: str) -> None:
+    with open(_boot_marker_path(), "w") as marker:
+        marker.write(f"{os.getpid()}:{os.getppid()}:{fingerprint}")
+
+
+def _legacy_reset() -> None:
+    """Reset completo: drop, create, migrazioni e seeding (database non SQLite o template disattivato)"""
+    from app.db.seed import seed_initial_data
+
+    print("Eliminazione database esistente...")
+    Base.metadata.drop_all(bind=engine)
+    print("Ricreazione tabelle...")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    print("Popolazione con dati iniziali...")
+    seed_initial_data()
+
+
+def initialize_database() -> float:
+    """Prepara il database all'avvio; ritorna la durata in secondi"""
+    started = time.perf_counter()
+    with startup_lock():
+        fingerprint = schema_fingerprint()
+        if settings.RESET_DB_ON_STARTUP:
+            if not (settings.is_sqlite_file and settings.DB_TEMPLATE_ENABLED):
+                _legacy_reset()
+                write_fingerprint(engine, fingerprint)
+            elif _reset_done_by_sibling(fingerprint):
+                print("♻️  Database già ricreato da un altro worker")
+            else:
+                restore_from_template(build_template(fingerprint))
+                _write_boot_marker(fingerprint)
+                print("Database ricreato dal template!")
+        else:
+            if read_stored_fingerprint() == fingerprint:
+                print("✅ Schema invariato, create_all saltato")
+            else:
+                # Crea solo le tabelle se non esistono e applica le migrazioni pendenti
+                Base.metadata.create_all(bind=engine)
+                run_migrations(engine)
+                write_fingerprint(engine, fingerprint)
+
+            from app.db.seed import seed_initial_data, is_database_empty
+            if is_database_empty():
+                print("🌱 Prima inizializzazione - popolazione database...")
+                seed_initial_data()
+    return time.perf_counter() - started
@@ -0,0 +1,190 @@
+"""
+Runner delle migrazioni versionate con tabella schema_version
+
+Le migrazioni sono file `NNNN_descrizione.py` in `backend/migrations/versions/`, applicati in ordine
+di versione. Ogni file definisce `upgrade(op)` dove `op` è un `MigrationOperations`: le operazioni
+sono idempotenti (controllano lo schema prima di agire), quindi rieseguire una migrazione interrotta
+è sicuro. I backfill procedono a lotti, ognuno nella propria transazione breve.
+"""
+
+import importlib.util
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(settings.BASE_DIR), "migrations", "versions")
+
+_MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.py$")
+
+schema_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    schema_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_ms", Float, nullable=False),
+)
+
+# Metadati dello schema (es. fingerprint calcolato all'avvio, vedi app/db/bootstrap.py)
+schema_info = Table(
+    "schema_info",
+    schema_metadata,
+    Column("key", String, primary_key=True),
+    Column("value", String, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+
+
+class MigrationOperations:
+    """Operazioni idempotenti a disposizione delle migrazioni"""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def execute(self, sql: str, params: Optional[dict] = None):
+        """Esegue uno statement in una transazione dedicata"""
+        with self.engine.begin() as connection:
+            return connection.execute(text(sql), params or {})
+
+    def has_table(self, table: str) -> bool:
+        return inspect(self.engine).has_table(table)
+
+    def has_column(self, table: str, column: str) -> bool:
+        return any(col["name"] == column for col in inspect(self.engine).get_columns(table))
+
+    def has_index(self, table: str, index_name: str) -> bool:
+        return any(index["name"] == index_name for index in inspect(self.engine).get_indexes(table))
+
+    def create_index(self, name: str, table: str, columns: Iterable[str], unique: bool = False) -> bool:
+        """Crea l'indice se non esiste; ritorna True se è stato creato"""
+        if self.has_index(table, name):
+            return False
+        unique_sql = "UNIQUE " if unique else ""
+        self.execute(f"CREATE {unique_sql}INDEX {name} ON {table} ({', '.join(columns)})")
+        logger.info(f"Indice creato: {name} su {table}")
+        return True
+
+    def drop_index(self, name: str, table: str) -> bool:
+        """Elimina l'indice se esiste; ritorna True se è stato eliminato"""
+        if not self.has_index(table, name):
+            return False
+        self.execute(f"DROP INDEX {name}")
+        return True
+
+    def add_column(self, table: str, column: str, ddl: str) -> bool:
+        """Aggiunge la colonna (es. ddl="INTEGER NOT NULL DEFAULT 0") se non esiste"""
+        if self.has_column(table, column):
+            return False
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+        logger.info(f"Colonna aggiunta: {table}.{column}")
+        return True
+
+    def backfill(self, table: str, set_clause: str, where_clause: str, params: Optional[dict] = None,
+                 batch_size: int = 1000, pause_seconds: float = 0.0, key_column: str = "id") -> int:
+        """
+        Aggiorna a lotti le righe che soddisfano `where_clause`, una transazione breve per lotto.
+        `where_clause` deve diventare falsa dopo l'aggiornamento, altrimenti il ciclo non termina.
+        """
+        total = 0
+        statement = (
+            f"UPDATE {table} SET {set_clause} WHERE {key_column} IN "
+            f"(SELECT {key_column} FROM {table} WHERE {where_clause} LIMIT :_batch_size)"
+        )
+        while True:
+            updated = self.execute(statement, {**(params or {}), "_batch_size": batch_size}).rowcount
+            total += updated
+            if updated < batch_size:
+                break
+            if pause_seconds:
+                # Lascia spazio alle scritture concorrenti tra un lotto e l'altro
+                time.sleep(pause_seconds)
+        logger.info(f"Backfill {table}: {total} righe aggiornate")
+        return total
+
+
+class MigrationRunner:
+    """Applica in ordine le migrazioni non ancora registrate in schema_version"""
+
+    def __init__(self, engine: Engine, migrations_dir: str = MIGRATIONS_DIR):
+        self.engine = engine
+        self.migrations_dir = migrations_dir
+
+    def discover(self) -> List[Migration]:
+        """Elenca le migrazioni disponibili ordinate per versione"""
+        migrations = []
+        if not os.path.isdir(self.migrations_dir):
+            return migrations
+        for filename in os.listdir(self.migrations_dir):
+            match = _MIGRATION_FILE.match(filename)
+            if match:
+                migrations.append(Migration(int(match.group(1)), match.group(2),
+                                            os.path.join(self.migrations_dir, filename)))
+        migrations.sort(key=lambda migration: migration.version)
+        versions = [migration.version for migration in migrations]
+        duplicates = sorted({version for version in versions if versions.count(version) > 1})
+        if duplicates:
+            raise RuntimeError(f"Duplicate migration versions: {duplicates}")
+        return migrations
+
+    def applied_versions(self) -> List[int]:
+        schema_metadata.create_all(bind=self.engine)
+        with self.engine.connect() as connection:
+            return list(connection.execute(select(schema_version.c.version).order_by(schema_version.c.version)).scalars())
+
+    def current_version(self) -> int:
+        applied = self.applied_versions()
+        return applied[-1] if applied else 0
+
+    def pending(self, target: Optional[int] = None) -> List[Migration]:
+        applied = set(self.applied_versions())
+        return [
+            migration for migration in self.discover()
+            if migration.version not in applied and (target is None or migration.version <= target)
+        ]
+
+    def _load(self, migration: Migration):
+        spec = importlib.util.spec_from_file_location(f"migration_{migration.version:04d}", migration.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        if not hasattr(module, "upgrade"):
+            raise RuntimeError(f"Migration {migration.path} does not define upgrade(op)")
+        return module
+
+    def upgrade(self, target: Optional[int] = None) -> List[Migration]:
+        """Applica le migrazioni pendenti fino a `target` (tutte se None)"""
+        applied = []
+        for migration in self.pending(target):
+            module = self._load(migration)
+            started = time.perf_counter()
+            module.upgrade(MigrationOperations(self.engine))
+            duration_ms = (time.perf_counter() - started) * 1000
+            with self.engine.begin() as connection:
+                connection.execute(schema_version.insert().values(
+                    version=migration.version,
+                    name=migration.name,
+                    applied_at=datetime.utcnow(),
+                    duration_ms=duration_ms,
+                ))
+            logger.info(f"Migrazione {migration.version:04d}_{migration.name} applicata in {duration_ms:.0f} ms")
+            applied.append(migration)
+        return applied
+
+
+def run_migrations(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """Applica le migrazioni pendenti sull'engine indicato"""
+    return MigrationRunner(engine).upgrade(target)
@@ -0,0 +1,89 @@
+"""
+Indice di ricerca full-text SQLite FTS5 su prodotti, vendor, voci di menu, location e utenti
+
+Per ogni tabella sorgente c'è una tabella FTS5 external-content (`<tabella>_fts`, rowid = id):
+il testo non viene duplicato, l'indice è tenuto allineato da trigger AFTER INSERT/UPDATE/DELETE
+e il ranking usa bm25() con un peso per colonna. Il tokenizer unicode61 con
+`remove_diacritics 2` rende la ricerca insensibile agli accenti ("citta" trova "Città").
+Il DDL è creato dalla migrazione 0003; su database senza FTS5 i servizi ripiegano su ILIKE.
+"""
+
+from typing import Dict, List, NamedTuple, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+SEARCH_TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+class SearchSource(NamedTuple):
+    entity_type: str
+    table: str
+    columns: Tuple[str, ...]
+    weights: Tuple[float, ...]  # pesi bm25 nello stesso ordine di `columns`
+    title: str                  # colonna mostrata come titolo del risultato
+
+    @property
+    def fts_table(self) -> str:
+        return f"{self.table}_fts"
+
+
+SEARCH_SOURCES: Dict[str, SearchSource] = {
+    source.entity_type: source for source in (
+        SearchSource("product", "products", ("name", "description"), (10.0, 1.0), "name"),
+        SearchSource("vendor", "vendors", ("name", "description"), (10.0, 1.0), "name"),
+        SearchSource("menu_item", "menu_items", ("name", "description"), (10.0, 1.0), "name"),
+        SearchSource("location", "locations", ("address", "zip"), (5.0, 1.0), "address"),
+        SearchSource("user", "users", ("first_name", "last_name", "email"), (5.0, 5.0, 1.0), "email"),
+    )
+}
+
+
+def search_index_ddl(source: SearchSource) -> List[str]:
+    """Tabella FTS5 external-content e trigger di sincronizzazione (idempotenti)"""
+    columns = ", ".join(source.columns)
+    new_values = ", ".join(f"new.{column}" for column in source.columns)
+    old_values = ", ".join(f"old.{column}" for column in source.columns)
+    fts = source.fts_table
+    insert_new = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});"
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{columns}, content='{source.table}', content_rowid='id', tokenize='{SEARCH_TOKENIZER}')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source.table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source.table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {source.table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def rebuild_statement(source: SearchSource) -> str:
+    """Ricostruisce l'indice dalla tabella sorgente (righe inserite prima dei trigger)"""
+    return f"INSERT INTO {source.fts_table}({source.fts_table}) VALUES ('rebuild')"
+
+
+def fts5_available(connection: Connection) -> bool:
+    """True se la libreria SQLite è compilata con FTS5"""
+    if connection.dialect.name != "sqlite":
+        return False
+    options = connection.execute(text("PRAGMA compile_options")).scalars().all()
+    return "ENABLE_FTS5" in options
+
+
+_ready_engines = set()
+
+
+def search_index_ready(engine: Engine) -> bool:
+    """True se tutte le tabelle FTS esistono (l'esito positivo resta in cache per l'engine)"""
+    if engine.dialect.name != "sqlite":
+        return False
+    key = str(engine.url)
+    if key in _ready_engines:
+        return True
+    with engine.connect() as connection:
+        existing = set(connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%\\_fts' ESCAPE '\\'")
+        ).scalars())
+    if all(source.fts_table in existing for source in SEARCH_SOURCES.values()):
+        _ready_engines.add(key)
+        return True
+    return False
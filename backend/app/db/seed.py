@@ -2,6 +2,7 @@
 Modulo per il seeding del database con dati iniziali
 """
 
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.services.user_service import user_service
@@ -128,9 +129,9 @@ def create_sample_users(db: Session):
         else:
             logger.error(f"Ruolo {user_data['role_name']} non trovato")
 
-def seed_initial_data():
-    """Popola il database con i dati iniziali necessari"""
-    db = SessionLocal()
+def seed_initial_data(session: Optional[Session] = None):
+    """Popola il database con i dati iniziali necessari (nella sessione indicata o in una nuova)"""
+    db = session or SessionLocal()
     
     try:
         logger.info("Inizio seeding dati iniziali...")
@@ -158,7 +159,8 @@ def seed_initial_data():
         db.rollback()
         raise
     finally:
-        db.close()
+        if session is None:
+            db.close()
 
 def is_database_empty() -> bool:
     """Verifica se il database è vuoto (prima inizializzazione)"""
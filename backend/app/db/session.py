@@ -1,18 +1,56 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from app.core.config import settings
+from app.db.sqlite_profile import apply_sqlite_profile
+from app.core.sql_instrumentation import install_sql_instrumentation
 
 engine = create_engine(
     settings.database_url, 
     connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
 )
+apply_sqlite_profile(engine)
+install_sql_instrumentation(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine di sola lettura per gli endpoint GET: pool separato, non contende con le scritture
+if settings.is_sqlite_file:
+    read_engine = create_engine(
+        settings.read_database_url,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.READ_POOL_SIZE,
+        max_overflow=settings.READ_POOL_MAX_OVERFLOW,
+    )
+    apply_sqlite_profile(read_engine, read_only=True)
+    install_sql_instrumentation(read_engine)
+else:
+    read_engine = engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Engine asincrono per i percorsi di lettura migrati ad AsyncBaseService
+async_engine = create_async_engine(settings.async_database_url)
+apply_sqlite_profile(async_engine.sync_engine)
+install_sql_instrumentation(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db() -> Session:
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db() -> Session:
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
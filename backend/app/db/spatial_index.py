@@ -0,0 +1,98 @@
+"""
+Indice spaziale SQLite R*Tree sulle coordinate delle location
+
+`locations_rtree` ha un rettangolo degenere (min = max) per ogni location, con id = locations.id,
+ed è tenuto allineato da trigger AFTER INSERT/UPDATE/DELETE. L'R*Tree serve solo a trovare i
+candidati in un rettangolo lat/lon: le coordinate sono memorizzate a 32 bit e arrotondate verso
+l'esterno, quindi la distanza esatta (haversine) si calcola sempre sulle colonne di `locations`.
+Il DDL è creato dalla migrazione 0004; su database senza R*Tree i servizi filtrano `locations`.
+"""
+
+import math
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+SPATIAL_TABLE = "locations_rtree"
+
+EARTH_RADIUS_KM = 6371.0
+
+# Rettangolo (min_lat, max_lat, min_lon, max_lon) in gradi
+Box = Tuple[float, float, float, float]
+
+
+def spatial_index_ddl() -> List[str]:
+    """Tabella R*Tree e trigger di sincronizzazione (idempotenti)"""
+    insert_new = f"INSERT INTO {SPATIAL_TABLE} VALUES (new.id, new.lat, new.lat, new.lon, new.lon);"
+    delete_old = f"DELETE FROM {SPATIAL_TABLE} WHERE id = old.id;"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SPATIAL_TABLE} USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+        f"CREATE TRIGGER IF NOT EXISTS {SPATIAL_TABLE}_ai AFTER INSERT ON locations BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {SPATIAL_TABLE}_ad AFTER DELETE ON locations BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {SPATIAL_TABLE}_au AFTER UPDATE OF id, lat, lon ON locations "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def rebuild_statements() -> List[str]:
+    """Ricostruisce l'indice dalla tabella locations (righe inserite prima dei trigger)"""
+    return [
+        f"DELETE FROM {SPATIAL_TABLE}",
+        f"INSERT INTO {SPATIAL_TABLE} SELECT id, lat, lat, lon, lon FROM locations",
+    ]
+
+
+def rtree_available(connection: Connection) -> bool:
+    """True se la libreria SQLite è compilata con R*Tree"""
+    if connection.dialect.name != "sqlite":
+        return False
+    options = connection.execute(text("PRAGMA compile_options")).scalars().all()
+    return "ENABLE_RTREE" in options
+
+
+_ready_engines = set()
+
+
+def spatial_index_ready(engine: Engine) -> bool:
+    """True se la tabella R*Tree esiste (l'esito positivo resta in cache per l'engine)"""
+    if engine.dialect.name != "sqlite":
+        return False
+    key = str(engine.url)
+    if key in _ready_engines:
+        return True
+    with engine.connect() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SPATIAL_TABLE}
+        ).first() is not None
+    if exists:
+        _ready_engines.add(key)
+    return exists
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distanza ortodromica in km (formula haversine)"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_boxes(lat: float, lon: float, radius_km: float) -> List[Box]:
+    """
+    Rettangoli che contengono tutti i punti entro `radius_km` da (lat, lon): uno solo, oppure due
+    se il cerchio attraversa l'antimeridiano; vicino ai poli copre tutte le longitudini.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angular)
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+    if min_lat <= -90 or max_lat >= 90 or angular >= math.pi / 2:
+        return [(max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0)]
+    ratio = math.sin(angular) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return [(min_lat, max_lat, -180.0, 180.0)]
+    delta_lon = math.degrees(math.asin(ratio))
+    min_lon, max_lon = lon - delta_lon, lon + delta_lon
+    if min_lon < -180:
+        return [(min_lat, max_lat, min_lon + 360, 180.0), (min_lat, max_lat, -180.0, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, max_lat, min_lon, 180.0), (min_lat, max_lat, -180.0, max_lon - 360)]
+    return [(min_lat, max_lat, min_lon, max_lon)]
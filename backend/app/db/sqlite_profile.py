@@ -0,0 +1,94 @@
+"""
+Profilo di produzione SQLite: PRAGMA applicati alla connessione e statistiche per l'health check
+"""
+
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+
+def _connection_pragmas(read_only: bool) -> list:
+    """PRAGMA da eseguire su ogni nuova connessione DBAPI"""
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size = {settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # journal_mode è persistente nel file: lo imposta solo chi può scrivere
+        if settings.SQLITE_WAL:
+            pragmas.insert(0, "PRAGMA journal_mode = WAL")
+        pragmas.append(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+    return pragmas
+
+
+def apply_sqlite_profile(engine: Engine, read_only: bool = False) -> None:
+    """Registra l'evento connect che applica il profilo di produzione all'engine"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    pragmas = _connection_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Stato del pool di connessioni dell'engine"""
+    pool = engine.pool
+    stats = {"class": type(pool).__name__, "status": pool.status()}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+def sqlite_stats(engine: Engine) -> dict:
+    """Modalità di journaling, stato del WAL e risultato di un checkpoint PASSIVE"""
+    if engine.dialect.name != "sqlite":
+        return {}
+
+    with engine.connect() as connection:
+        driver_connection = connection.connection.driver_connection
+        cursor = driver_connection.cursor()
+        try:
+            journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+            page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+            page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+            freelist_count = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+            stats = {
+                "journal_mode": journal_mode,
+                "synchronous": synchronous,
+                "page_size": page_size,
+                "page_count": page_count,
+                "freelist_count": freelist_count,
+                "database_size_bytes": page_size * page_count,
+            }
+            if journal_mode == "wal":
+                busy, log_frames, checkpointed_frames = cursor.execute(
+                    "PRAGMA wal_checkpoint(PASSIVE)"
+                ).fetchone()
+                stats["checkpoint"] = {
+                    "busy": bool(busy),
+                    "wal_frames": log_frames,
+                    "checkpointed_frames": checkpointed_frames,
+                }
+        finally:
+            cursor.close()
+
+    if settings.is_sqlite_file:
+        wal_path = settings.sqlite_path + "-wal"
+        stats["wal_size_bytes"] = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+    return stats
@@ -0,0 +1,76 @@
+"""
+Unità di lavoro: le chiamate di servizio annidate condividono una transazione con un solo commit finale
+
+Il livello di annidamento è tenuto in `session.info`. Dentro un'unità di lavoro i metodi di
+BaseService fanno solo flush (gli id restano disponibili) e il commit avviene all'uscita dal blocco
+più esterno; un errore annulla tutto. `savepoint=True` su un blocco annidato apre un SAVEPOINT,
+così un errore atteso (es. IntegrityError) annulla solo quel blocco.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+from typing import Iterator
+from sqlalchemy.orm import Session
+
+_DEPTH_KEY = "unit_of_work_depth"
+
+
+def in_unit_of_work(db: Session) -> bool:
+    return db.info.get(_DEPTH_KEY, 0) > 0
+
+
+def _begin_driver_transaction(db: Session) -> None:
+    """
+    Il driver sqlite3 apre la transazione solo al primo INSERT/UPDATE/DELETE: un SAVEPOINT aperto
+    prima diventerebbe la transazione esterna e il suo RELEASE farebbe commit. BEGIN esplicito.
+    """
+    connection = db.connection()
+    driver_connection = connection.connection.driver_connection
+    if connection.dialect.name == "sqlite" and not driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN")
+
+
+@contextmanager
+def unit_of_work(db: Session, savepoint: bool = False) -> Iterator[Session]:
+    """Apre (o riusa) la transazione condivisa; commit solo all'uscita del blocco più esterno"""
+    depth = db.info.get(_DEPTH_KEY, 0)
+    db.info[_DEPTH_KEY] = depth + 1
+    try:
+        if depth and savepoint:
+            _begin_driver_transaction(db)
+            with db.begin_nested():
+                yield db
+        else:
+            yield db
+        if depth == 0:
+            db.commit()
+    except BaseException:
+        if depth == 0:
+            db.rollback()
+        raise
+    finally:
+        db.info[_DEPTH_KEY] = depth
+
+
+def transactional(method):
+    """Decoratore per i metodi di servizio `(self, db, ...)`: il corpo gira in un'unità di lavoro"""
+    @wraps(method)
+    def wrapper(self, db: Session, *args, **kwargs):
+        with unit_of_work(db):
+            return method(self, db, *args, **kwargs)
+    return wrapper
+
+
+def commit(db: Session) -> bool:
+    """Commit fuori da un'unità di lavoro, altrimenti solo flush; True se ha eseguito il commit"""
+    if in_unit_of_work(db):
+        db.flush()
+        return False
+    db.commit()
+    return True
+
+
+def rollback(db: Session) -> None:
+    """Rollback fuori da un'unità di lavoro; dentro, l'errore risale al blocco che lo gestisce"""
+    if not in_unit_of_work(db):
+        db.rollback()
@@ -1,12 +1,19 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 import uvicorn
 from app.api.routes import api_router
-from app.db.session import engine
-from app.db.base import Base
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from app.db.bootstrap import initialize_database
 from app.core.config import settings
+from app.core.sql_instrumentation import SQLInstrumentationMiddleware
+from app.core.pagination import InvalidCursorError
+from app.services.suggest_service import suggest_service
+from app.core.lookups import lookup_registry
+from app.db.session import ReadSessionLocal
 
 # Configurazione Swagger/OpenAPI avanzata
 def custom_openapi():
@@ -96,7 +103,23 @@ def custom_openapi():
     app.openapi_schema = openapi_schema
     return app.openapi_schema
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inizializza il database all'avvio del worker (non all'import del modulo)"""
+    duration = await run_in_threadpool(initialize_database)
+    print(f"⏱️  Database pronto in {duration * 1000:.0f} ms")
+    with ReadSessionLocal() as db:
+        await run_in_threadpool(lookup_registry.reload, db)
+    print(f"📇 Tabelle di lookup caricate in {lookup_registry.load_ms:.0f} ms")
+    await run_in_threadpool(suggest_service.start)
+    if suggest_service.index.ready:
+        stats = suggest_service.index.stats()
+        print(f"🔤 Indice suggerimenti: {stats['entries']} voci, {stats['keys']} chiavi in {stats['build_ms']:.0f} ms")
+    print("-" * 60)
+    yield
+
 app = FastAPI(
+    lifespan=lifespan,
     title="🌾 Farmer Market Platform API",
     description="API per la piattaforma di mercato agricolo con gestione stakeholder",
     version="1.0.0",
@@ -115,33 +138,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
+)
+
+# Strumentazione SQL per richiesta (header Server-Timing e riepilogo per route)
+app.add_middleware(
+    SQLInstrumentationMiddleware,
+    sample_rate=settings.SQL_INSTRUMENTATION_SAMPLE_RATE,
+    n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD,
 )
 
-# Gestione database: ricrea ad ogni avvio in sviluppo
-if settings.RESET_DB_ON_STARTUP:
-    print("Eliminazione database esistente...")
-    Base.metadata.drop_all(bind=engine)
-    
-    print("Ricreazione tabelle...")
-    Base.metadata.create_all(bind=engine)
-    
-    print("Popolazione con dati iniziali...")
-    from app.db.seed import seed_initial_data
-    seed_initial_data()
-    print("Database ricreato e popolato!")
-else:
-    # Crea solo le tabelle se non esistono
-    Base.metadata.create_all(bind=engine)
-    from app.db.seed import seed_initial_data, is_database_empty
-    if is_database_empty():
-        print("🌱 Prima inizializzazione - popolazione database...")
-        seed_initial_data()
-
-print("-" * 60)
 
 # Include tutti i router API
 app.include_router(api_router)
 
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    """Cursore di paginazione non valido: 400 invece di 500 su tutti gli endpoint paginati"""
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 @app.get("/")
 def read_root():
     return {
@@ -10,7 +10,7 @@ from .location import Location, Contact
 from .vendor import Vendor, OpeningHour, Market, Restaurant, Activity, Warehouse
 from .product import Product, ProductDailyAvailability, ProductReservation
 from .restaurant import RestaurantTable, RestaurantSeat, MenuItem, RestaurantBooking
-from .review import Review, VendorReview, ProductReview
+from .review import Review, VendorReview, ProductReview, RatingSummary
 from .activity import Workshop, WorkshopSeat, Event, EventSeat, WorkshopEnrollment, EventEnrollment
 from .warehouse import WarehouseRow, WarehouseShelf, WarehouseSpot, StationBooking
 from .request_flow import RequestFlow, EventRequestFlow, StationRequestFlow
@@ -44,6 +44,7 @@ __all__ = [
     "Review",
     "VendorReview",
     "ProductReview",
+    "RatingSummary",
     
     # Activities
     "Workshop",
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, Time, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, Time, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -7,7 +7,7 @@ class Product(Base):
     __tablename__ = "products"
     
     id = Column(Integer, primary_key=True, index=True)
-    market_id = Column(Integer, ForeignKey("markets.id"), nullable=False)
+    market_id = Column(Integer, ForeignKey("markets.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     category_id = Column(Integer, ForeignKey("product_categories.id"), nullable=False)
@@ -34,9 +34,12 @@ class ProductDailyAvailability(Base):
     discounted_price = Column(Float, nullable=True)
     start_time_discount = Column(Time, nullable=True)
     end_time_discount = Column(Time, nullable=True)
+    # Versione per il controllo di concorrenza ottimistico (incrementata a ogni UPDATE)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     __table_args__ = (
         UniqueConstraint('product_id', 'date', name='unique_product_date'),
+        Index('ix_product_daily_availabilities_date_product_id', 'date', 'product_id'),
     )
     
     # Relationships
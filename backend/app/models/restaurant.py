@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, Time, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, Time, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -35,6 +35,8 @@ class MenuItem(Base):
     menu_category_id = Column(Integer, ForeignKey("menu_categories.id"), nullable=False)
     description = Column(String, nullable=False)
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    # Versione per il controllo di concorrenza ottimistico (incrementata a ogni UPDATE)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Relationships
     menu_category = relationship("MenuCategory", back_populates="menu_items")
@@ -52,6 +54,7 @@ class RestaurantBooking(Base):
     
     __table_args__ = (
         UniqueConstraint('user_id', 'restaurant_seat_id', 'date', 'time_slot', name='unique_restaurant_booking'),
+        Index('ix_restaurant_bookings_seat_date_slot', 'restaurant_seat_id', 'date', 'time_slot'),
     )
     
     # Relationships
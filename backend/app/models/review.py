@@ -22,7 +22,7 @@ class VendorReview(Base):
     
     id = Column(Integer, ForeignKey("reviews.id"), primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    vendor_id = Column(Integer, ForeignKey("vendors.id"), nullable=False)
+    vendor_id = Column(Integer, ForeignKey("vendors.id"), nullable=False, index=True)
     
     __table_args__ = (
         UniqueConstraint('user_id', 'vendor_id', name='unique_user_vendor_review'),
@@ -49,3 +49,23 @@ class ProductReview(Base):
     review = relationship("Review", back_populates="product_review")
     user = relationship("User", back_populates="product_reviews")
     product = relationship("Product", back_populates="product_reviews")
+
+
+class RatingSummary(Base):
+    __tablename__ = "rating_summaries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(String, nullable=False)  # "vendor" | "product"
+    entity_id = Column(Integer, nullable=False)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    # Istogramma: recensioni con voto 1 (very bad) ... 5 (very good)
+    count_1 = Column(Integer, nullable=False, default=0)
+    count_2 = Column(Integer, nullable=False, default=0)
+    count_3 = Column(Integer, nullable=False, default=0)
+    count_4 = Column(Integer, nullable=False, default=0)
+    count_5 = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint('entity_type', 'entity_id', name='unique_rating_summary_entity'),
+    )
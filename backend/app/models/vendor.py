@@ -10,7 +10,9 @@ class Vendor(Base):
     name = Column(String, nullable=False)
     description = Column(String, nullable=False)
     location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Sottotipo (market, restaurant, activity, warehouse), allineato da trigger sulle tabelle dei sottotipi
+    vendor_type = Column(String, nullable=True, index=True)
     
     # Relationships
     location = relationship("Location", back_populates="vendors")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -32,6 +32,8 @@ class WarehouseSpot(Base):
     equipment_details = Column(String, nullable=False)
     farmer_fee = Column(Float, nullable=False)
     warehouse_shelf_id = Column(Integer, ForeignKey("warehouse_shelves.id"), nullable=False)
+    # Versione per il controllo di concorrenza ottimistico (incrementata a ogni UPDATE)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Relationships
     warehouse_shelf = relationship("WarehouseShelf", back_populates="spots")
@@ -50,6 +52,10 @@ class StationBooking(Base):
     end_date = Column(Date, nullable=False)
     crop_type_id = Column(Integer, ForeignKey("crop_types.id"), nullable=False)
     
+    __table_args__ = (
+        Index('ix_station_bookings_spot_dates', 'warehouse_spot_id', 'start_date', 'end_date'),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="station_bookings")
     warehouse_spot = relationship("WarehouseSpot", back_populates="station_bookings")
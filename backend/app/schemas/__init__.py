@@ -5,7 +5,7 @@ Questi modelli vengono usati per generare automaticamente la documentazione Swag
 
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
-from datetime import datetime, date
+from datetime import datetime, date, time
 from enum import Enum
 
 # =================== AUTH MODELS ===================
@@ -128,6 +128,56 @@ class ProductResponse(ProductBase):
     class Config:
         from_attributes = True
 
+class CartItem(BaseModel):
+    product_id: int = Field(..., description="ID del prodotto")
+    reservation_date: date = Field(..., description="Data di ritiro")
+    time_slot: time = Field(..., description="Fascia oraria di ritiro (HH:MM)")
+    quantity: int = Field(..., ge=1, description="Quantità desiderata")
+
+class CartReservationRequest(BaseModel):
+    items: List[CartItem] = Field(..., min_length=1, max_length=100, description="Prodotti da prenotare")
+    all_or_nothing: bool = Field(True, description="Se una riga non è prenotabile non prenota nulla")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"product_id": 1, "reservation_date": "2025-08-15", "time_slot": "10:00", "quantity": 2},
+                    {"product_id": 7, "reservation_date": "2025-08-15", "time_slot": "10:00", "quantity": 1}
+                ],
+                "all_or_nothing": True
+            }
+        }
+
+class AvailabilityCalendarEntry(BaseModel):
+    product_id: int = Field(..., description="ID del prodotto")
+    available_quantity: int = Field(..., ge=0, description="Quantità disponibile per giorno")
+    daily_price: float = Field(..., ge=0, description="Prezzo giornaliero")
+    discounted_price: Optional[float] = Field(None, ge=0, description="Prezzo scontato")
+    start_time_discount: Optional[time] = Field(None, description="Inizio fascia di sconto")
+    end_time_discount: Optional[time] = Field(None, description="Fine fascia di sconto")
+    weekdays: Optional[List[int]] = Field(None, description="Giorni della settimana per questa voce (0 = lunedì)")
+
+class AvailabilityCalendarRequest(BaseModel):
+    start_date: date = Field(..., description="Primo giorno del calendario")
+    end_date: date = Field(..., description="Ultimo giorno del calendario (incluso)")
+    weekdays: Optional[List[int]] = Field(None, description="Schema settimanale (0 = lunedì ... 6 = domenica); assente = tutti i giorni")
+    entries: List[AvailabilityCalendarEntry] = Field(..., min_length=1, max_length=1000, description="Quantità e prezzi per prodotto")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "start_date": "2025-08-04",
+                "end_date": "2025-08-17",
+                "weekdays": [1, 3, 5],
+                "entries": [
+                    {"product_id": 1, "available_quantity": 50, "daily_price": 2.5},
+                    {"product_id": 1, "available_quantity": 80, "daily_price": 2.2, "weekdays": [5],
+                     "discounted_price": 1.5, "start_time_discount": "17:00", "end_time_discount": "19:00"}
+                ]
+            }
+        }
+
 # =================== VENDOR MODELS ===================
 class VendorType(str, Enum):
     MARKET = "market"
@@ -246,6 +296,18 @@ class LocationResponse(LocationCreate):
     class Config:
         from_attributes = True
 
+class DistanceMatrixRequest(BaseModel):
+    origin_ids: List[int] = Field(..., min_length=1, max_length=1000, description="ID delle location di partenza (righe)")
+    destination_ids: List[int] = Field(..., min_length=1, max_length=1000, description="ID delle location di arrivo (colonne)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "origin_ids": [1, 2],
+                "destination_ids": [3, 4, 5]
+            }
+        }
+
 # =================== ERROR MODELS ===================
 class ErrorResponse(BaseModel):
     detail: str = Field(..., description="Descrizione dell'errore")
@@ -1,5 +1,6 @@
 # Import all services
-from .base_service import BaseService
+from .base_service import BaseService, VersionConflictError, UnsupportedDialectError
+from .async_base_service import AsyncBaseService
 from .user_service import UserService, user_service
 from .contact_service import ContactService, contact_service
 from .location_service import LocationService, location_service
@@ -9,21 +10,25 @@ from .vendor_service import (
     MarketService, market_service,
     RestaurantService, restaurant_service,
     ActivityService, activity_service,
-    WarehouseService, warehouse_service
+    WarehouseService, warehouse_service,
+    AsyncVendorService, async_vendor_service
 )
 from .product_service import (
     ProductService, product_service,
     ProductDailyAvailabilityService, product_availability_service,
-    ProductReservationService, product_reservation_service
+    ProductReservationService, product_reservation_service,
+    AsyncProductService, async_product_service
 )
 from .restaurant_service import (
     RestaurantTableService, restaurant_table_service,
     RestaurantSeatService, restaurant_seat_service,
     MenuItemService, menu_item_service,
-    RestaurantBookingService, restaurant_booking_service
+    RestaurantBookingService, restaurant_booking_service,
+    AsyncRestaurantSeatService, async_restaurant_seat_service
 )
 from .review_service import (
     ReviewService, review_service,
+    RatingSummaryService, rating_summary_service,
     VendorReviewService, vendor_review_service,
     ProductReviewService, product_review_service
 )
@@ -33,7 +38,8 @@ from .activity_service import (
     EventService, event_service,
     EventSeatService, event_seat_service,
     WorkshopEnrollmentService, workshop_enrollment_service,
-    EventEnrollmentService, event_enrollment_service
+    EventEnrollmentService, event_enrollment_service,
+    AsyncEventService, async_event_service
 )
 from .warehouse_service import (
     WarehouseRowService, warehouse_row_service,
@@ -46,10 +52,16 @@ from .request_flow_service import (
     EventRequestFlowService, event_request_flow_service,
     StationRequestFlowService, station_request_flow_service
 )
+from .export_service import ExportService, export_service
+from .search_service import SearchService, search_service
+from .suggest_service import SuggestService, suggest_service
 
 __all__ = [
     # Base service
     "BaseService",
+    "VersionConflictError",
+    "UnsupportedDialectError",
+    "AsyncBaseService",
     
     # User services
     "UserService", "user_service",
@@ -63,20 +75,24 @@ __all__ = [
     "RestaurantService", "restaurant_service",
     "ActivityService", "activity_service",
     "WarehouseService", "warehouse_service",
+    "AsyncVendorService", "async_vendor_service",
     
     # Product services
     "ProductService", "product_service",
     "ProductDailyAvailabilityService", "product_availability_service",
     "ProductReservationService", "product_reservation_service",
+    "AsyncProductService", "async_product_service",
     
     # Restaurant services
     "RestaurantTableService", "restaurant_table_service",
     "RestaurantSeatService", "restaurant_seat_service",
     "MenuItemService", "menu_item_service",
     "RestaurantBookingService", "restaurant_booking_service",
+    "AsyncRestaurantSeatService", "async_restaurant_seat_service",
     
     # Review services
     "ReviewService", "review_service",
+    "RatingSummaryService", "rating_summary_service",
     "VendorReviewService", "vendor_review_service",
     "ProductReviewService", "product_review_service",
     
@@ -87,6 +103,7 @@ __all__ = [
     "EventSeatService", "event_seat_service",
     "WorkshopEnrollmentService", "workshop_enrollment_service",
     "EventEnrollmentService", "event_enrollment_service",
+    "AsyncEventService", "async_event_service",
     
     # Warehouse services
     "WarehouseRowService", "warehouse_row_service",
@@ -98,4 +115,9 @@ __all__ = [
     "RequestFlowService", "request_flow_service",
     "EventRequestFlowService", "event_request_flow_service",
     "StationRequestFlowService", "station_request_flow_service",
+    
+    # Export services
+    "ExportService", "export_service",
+    "SearchService", "search_service",
+    "SuggestService", "suggest_service",
 ]
\ No newline at end of file
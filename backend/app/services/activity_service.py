@@ -2,11 +2,15 @@ from typing import List, Optional
 from datetime import date, time
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, select
 from app.models.activity import Workshop, WorkshopSeat, Event, EventSeat, WorkshopEnrollment, EventEnrollment
 from app.models.vendor import Activity
 from app.models.enums import DayWeek
 from app.services.base_service import BaseService
+from app.services.async_base_service import AsyncBaseService
+from app.core.pagination import Page
+from app.core.lookups import lookup_registry
 
 class WorkshopService(BaseService[Workshop]):
     """Servizio per operazioni CRUD su Workshop"""
@@ -28,16 +32,15 @@ class WorkshopService(BaseService[Workshop]):
     
     def get_workshops_by_day(self, db: Session, day_name: str) -> List[Workshop]:
         """Recupera workshop per giorno della settimana"""
-        return db.query(Workshop).join(DayWeek).filter(
-            DayWeek.name == day_name
-        ).all()
+        day_week_id = lookup_registry.id(db, DayWeek, day_name)
+        return db.query(Workshop).filter(Workshop.day_week_id == day_week_id).all()
     
     def get_available_workshops(self, db: Session, day_name: Optional[str] = None) -> List[Workshop]:
         """Recupera workshop con posti disponibili"""
         query = db.query(Workshop).join(Activity)
         
         if day_name:
-            query = query.join(DayWeek).filter(DayWeek.name == day_name)
+            query = query.filter(Workshop.day_week_id == lookup_registry.id(db, DayWeek, day_name))
         
         # Filtra workshop con posti disponibili
         workshops = query.all()
@@ -260,6 +263,50 @@ class EventEnrollmentService(BaseService[EventEnrollment]):
             EventSeat.event_id == event_id
         ).all()
 
+class AsyncEventService(AsyncBaseService[Event]):
+    """Servizio asincrono per le letture più frequenti su Event"""
+    
+    def __init__(self):
+        super().__init__(Event)
+    
+    async def get_upcoming_events(self, db: AsyncSession, limit: int = 10) -> List[Event]:
+        """Recupera i prossimi eventi"""
+        result = await db.scalars(
+            select(Event).where(Event.date >= date.today()).order_by(Event.date).limit(limit)
+        )
+        return list(result)
+    
+    async def get_upcoming_events_page(self, db: AsyncSession, cursor: Optional[str] = None, limit: int = 10,
+                                       with_total: bool = False) -> Page[Event]:
+        """Prossimi eventi paginati su (data, id)"""
+        query = select(Event).where(Event.date >= date.today())
+        return await self.paginate(db, query, cursor=cursor, limit=limit, sort_key=Event.date,
+                                   with_total=with_total)
+    
+    def _available_events_query(self, from_date: Optional[date] = None):
+        occupied_seats = select(
+            EventSeat.event_id, func.count(EventSeat.id).label("occupied")
+        ).group_by(EventSeat.event_id).subquery()
+        
+        return select(Event).join(Activity).outerjoin(
+            occupied_seats, occupied_seats.c.event_id == Event.id
+        ).where(
+            Event.date >= (from_date or date.today()),
+            func.coalesce(occupied_seats.c.occupied, 0) < Activity.capacity
+        )
+    
+    async def get_available_events(self, db: AsyncSession, from_date: Optional[date] = None) -> List[Event]:
+        """Recupera eventi con posti disponibili (conteggio posti in un'unica query)"""
+        result = await db.scalars(self._available_events_query(from_date))
+        return list(result)
+    
+    async def get_available_events_page(self, db: AsyncSession, from_date: Optional[date] = None,
+                                        cursor: Optional[str] = None, limit: int = 50,
+                                        with_total: bool = False) -> Page[Event]:
+        """Eventi con posti disponibili paginati su (data, id)"""
+        return await self.paginate(db, self._available_events_query(from_date), cursor=cursor, limit=limit,
+                                   sort_key=Event.date, with_total=with_total)
+
 # Istanze globali dei servizi
 workshop_service = WorkshopService()
 workshop_seat_service = WorkshopSeatService()
@@ -267,3 +314,4 @@ event_service = EventService()
 event_seat_service = EventSeatService()
 workshop_enrollment_service = WorkshopEnrollmentService()
 event_enrollment_service = EventEnrollmentService()
+async_event_service = AsyncEventService()
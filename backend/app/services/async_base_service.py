@@ -0,0 +1,68 @@
+from typing import TypeVar, Generic, Type, Optional, List, Any, Dict
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import Base
+from app.core.pagination import Page, apply_keyset, build_page
+
+T = TypeVar('T', bound=Base)
+
+class AsyncBaseService(Generic[T]):
+    """Servizio CRUD base generico per AsyncSession, speculare a BaseService"""
+    
+    def __init__(self, model: Type[T]):
+        self.model = model
+    
+    async def create(self, db: AsyncSession, **kwargs) -> T:
+        """Crea una nuova istanza del modello"""
+        db_obj = self.model(**kwargs)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+    
+    async def get_by_id(self, db: AsyncSession, id: int) -> Optional[T]:
+        """Recupera un'istanza per ID"""
+        return await db.get(self.model, id)
+    
+    async def get_all(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[T]:
+        """Recupera tutte le istanze con paginazione"""
+        result = await db.scalars(select(self.model).offset(skip).limit(limit))
+        return list(result)
+    
+    async def paginate(self, db: AsyncSession, query=None, *, cursor: Optional[str] = None, limit: int = 100,
+                       sort_key=None, descending: bool = False, with_total: bool = False) -> Page[T]:
+        """Paginazione keyset su (sort_key, id), speculare a BaseService.paginate"""
+        if query is None:
+            query = select(self.model)
+        keys = [self.model.id] if sort_key is None else [sort_key, self.model.id]
+        total = None
+        if with_total:
+            total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+        rows = list(await db.scalars(apply_keyset(query, keys, cursor, limit, descending)))
+        return build_page(rows, keys, limit, total)
+    
+    async def exists(self, db: AsyncSession, id: int) -> bool:
+        """Verifica se un'istanza esiste"""
+        result = await db.scalar(select(self.model.id).where(self.model.id == id))
+        return result is not None
+    
+    async def count(self, db: AsyncSession) -> int:
+        """Conta il numero totale di istanze"""
+        return await db.scalar(select(func.count()).select_from(self.model))
+    
+    async def filter_by(self, db: AsyncSession, **kwargs) -> List[T]:
+        """Filtra le istanze per attributi specifici"""
+        query = select(self.model)
+        for field, value in kwargs.items():
+            if hasattr(self.model, field):
+                query = query.where(getattr(self.model, field) == value)
+        result = await db.scalars(query)
+        return list(result)
+    
+    async def bulk_create(self, db: AsyncSession, objects_data: List[Dict[str, Any]]) -> List[T]:
+        """Crea multiple istanze in una singola transazione"""
+        db_objects = [self.model(**data) for data in objects_data]
+        db.add_all(db_objects)
+        await db.flush()
+        await db.commit()
+        return db_objects
@@ -1,10 +1,65 @@
-from typing import TypeVar, Generic, Type, Optional, List, Any, Dict
+from typing import TypeVar, Generic, Type, Optional, List, Any, Dict, Iterator
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, or_, insert, update, select, UniqueConstraint
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from app.db.base import Base
+from app.core.pagination import Page, apply_keyset, build_page
+from app.db.unit_of_work import commit, in_unit_of_work, rollback
 
 T = TypeVar('T', bound=Base)
 
+# Righe per statement negli insert massivi
+BULK_CHUNK_SIZE = 5000
+
+# Cosa ritornano bulk_create / bulk_upsert
+RETURN_OBJECTS = "objects"  # istanze ORM popolate da RETURNING
+RETURN_ROWS = "rows"        # Row leggere (tuple con accesso per nome)
+RETURN_NONE = "none"        # nessun risultato, solo insert
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert, "mysql": mysql.insert}
+
+
+class VersionConflictError(Exception):
+    """Aggiornamento rifiutato: la versione attesa non corrisponde a quella salvata"""
+    
+    def __init__(self, model_name: str, id: int, expected_version: int, current_version: int):
+        self.model_name = model_name
+        self.id = id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f"{model_name} {id} was modified concurrently "
+            f"(expected version {expected_version}, current version {current_version})"
+        )
+
+
+class UnsupportedDialectError(ValueError):
+    """Operazione che richiede una sintassi di upsert non disponibile sul database in uso"""
+    
+    def __init__(self, operation: str, dialect_name: str):
+        self.operation = operation
+        self.dialect_name = dialect_name
+        super().__init__(f"{operation} is not supported on the '{dialect_name}' dialect")
+
+
+def _chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _commit_without_expiring(db: Session) -> None:
+    """Commit che non fa scadere le istanze appena caricate da RETURNING (evita un SELECT per riga)"""
+    if in_unit_of_work(db):
+        db.flush()
+        return
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+
 class BaseService(Generic[T]):
     """Servizio CRUD base generico per tutti i modelli"""
     
@@ -15,8 +70,8 @@ class BaseService(Generic[T]):
         """Crea una nuova istanza del modello"""
         db_obj = self.model(**kwargs)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        if commit(db):
+            db.refresh(db_obj)
         return db_obj
     
     def get_by_id(self, db: Session, id: int) -> Optional[T]:
@@ -27,18 +82,83 @@ class BaseService(Generic[T]):
         """Recupera tutte le istanze con paginazione"""
         return db.query(self.model).offset(skip).limit(limit).all()
     
-    def update(self, db: Session, id: int, **kwargs) -> Optional[T]:
-        """Aggiorna un'istanza esistente"""
+    def paginate(self, db: Session, query=None, *, cursor: Optional[str] = None, limit: int = 100,
+                 sort_key=None, descending: bool = False, with_total: bool = False) -> Page[T]:
+        """
+        Paginazione keyset su (sort_key, id) con cursore opaco (vedi app/core/pagination.py).
+        Il COUNT(*) viene eseguito solo se `with_total` è True.
+        """
+        if query is None:
+            query = db.query(self.model)
+        keys = [self.model.id] if sort_key is None else [sort_key, self.model.id]
+        total = query.order_by(None).count() if with_total else None
+        rows = apply_keyset(query, keys, cursor, limit, descending).all()
+        return build_page(rows, keys, limit, total)
+    
+    @property
+    def versioned(self) -> bool:
+        """True se il modello ha la colonna `version` per il controllo di concorrenza ottimistico"""
+        return "version" in self.model.__table__.c
+    
+    def _update_values(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Solo le colonne reali del modello (esclusi chiave primaria e versione)"""
+        table = self.model.__table__
+        primary_keys = {column.name for column in table.primary_key.columns}
+        return {
+            field: value for field, value in kwargs.items()
+            if field in table.c and field not in primary_keys and field != "version"
+        }
+    
+    def update(self, db: Session, id: int, *, expected_version: Optional[int] = None, **kwargs) -> Optional[T]:
+        """
+        Aggiorna un'istanza con un solo UPDATE ... RETURNING.
+        Sui modelli versionati incrementa `version` e, se `expected_version` è indicata,
+        solleva VersionConflictError quando la riga è stata modificata nel frattempo.
+        """
+        if expected_version is not None and not self.versioned:
+            raise ValueError(f"{self.model.__name__} has no version column")
+        values = self._update_values(kwargs)
+        if not values:
+            return self.get_by_id(db, id)
+        if not db.get_bind().dialect.update_returning:
+            return self._update_without_returning(db, id, expected_version, values)
+        
+        statement = update(self.model).where(self.model.id == id)
+        if self.versioned:
+            values["version"] = self.model.version + 1
+            if expected_version is not None:
+                statement = statement.where(self.model.version == expected_version)
+        statement = statement.values(**values).returning(self.model)
+        
+        db_obj = db.scalars(statement, execution_options={"populate_existing": True}).first()
+        if db_obj is None:
+            rollback(db)
+            self._raise_if_version_conflict(db, id, expected_version)
+            return None
+        _commit_without_expiring(db)
+        return db_obj
+    
+    def _raise_if_version_conflict(self, db: Session, id: int, expected_version: Optional[int]) -> None:
+        if expected_version is None:
+            return
+        current_version = db.scalar(select(self.model.version).where(self.model.id == id))
+        if current_version is not None:
+            raise VersionConflictError(self.model.__name__, id, expected_version, current_version)
+    
+    def _update_without_returning(self, db: Session, id: int, expected_version: Optional[int],
+                                  values: Dict[str, Any]) -> Optional[T]:
+        """Percorso per i dialetti senza UPDATE ... RETURNING"""
         db_obj = self.get_by_id(db, id)
         if not db_obj:
             return None
-        
-        for field, value in kwargs.items():
-            if hasattr(db_obj, field):
-                setattr(db_obj, field, value)
-        
-        db.commit()
-        db.refresh(db_obj)
+        if expected_version is not None and db_obj.version != expected_version:
+            raise VersionConflictError(self.model.__name__, id, expected_version, db_obj.version)
+        for field, value in values.items():
+            setattr(db_obj, field, value)
+        if self.versioned:
+            db_obj.version = db_obj.version + 1
+        if commit(db):
+            db.refresh(db_obj)
         return db_obj
     
     def delete(self, db: Session, id: int) -> bool:
@@ -48,7 +168,7 @@ class BaseService(Generic[T]):
             return False
         
         db.delete(db_obj)
-        db.commit()
+        commit(db)
         return True
     
     def exists(self, db: Session, id: int) -> bool:
@@ -67,11 +187,128 @@ class BaseService(Generic[T]):
                 query = query.filter(getattr(self.model, field) == value)
         return query.all()
     
-    def bulk_create(self, db: Session, objects_data: List[Dict[str, Any]]) -> List[T]:
-        """Crea multiple istanze in una singola transazione"""
-        db_objects = [self.model(**data) for data in objects_data]
-        db.add_all(db_objects)
-        db.commit()
-        for obj in db_objects:
-            db.refresh(obj)
-        return db_objects
+    def unique_constraint_columns(self, constraint_name: str) -> List[str]:
+        """Colonne di un vincolo UNIQUE del modello (es. 'unique_product_date')"""
+        for constraint in self.model.__table__.constraints:
+            if isinstance(constraint, UniqueConstraint) and constraint.name == constraint_name:
+                return [column.name for column in constraint.columns]
+        raise ValueError(f"{self.model.__name__} has no unique constraint named '{constraint_name}'")
+    
+    def _execute_bulk(self, db: Session, statement, chunk: List[Dict[str, Any]], returning: str) -> List[Any]:
+        table = self.model.__table__
+        if returning == RETURN_OBJECTS:
+            statement = statement.returning(self.model, sort_by_parameter_order=True)
+            return db.scalars(statement, chunk, execution_options={"populate_existing": True}).all()
+        if returning == RETURN_ROWS:
+            statement = statement.returning(*table.c, sort_by_parameter_order=True)
+            return db.execute(statement, chunk).all()
+        db.execute(statement, chunk)
+        return []
+    
+    def bulk_create(self, db: Session, objects_data: List[Dict[str, Any]],
+                    returning: str = RETURN_OBJECTS, chunk_size: int = BULK_CHUNK_SIZE) -> List[Any]:
+        """Crea multiple istanze a blocchi con INSERT ... RETURNING, senza refresh per riga"""
+        if not objects_data:
+            return []
+        dialect = db.get_bind().dialect
+        results = []
+        try:
+            for chunk in _chunks(objects_data, chunk_size):
+                if returning != RETURN_NONE and not dialect.insert_executemany_returning:
+                    # Dialetto senza RETURNING multiplo: flush ORM classico
+                    db_objects = [self.model(**data) for data in chunk]
+                    db.add_all(db_objects)
+                    db.flush()
+                    results.extend(db_objects)
+                    continue
+                target = self.model if returning == RETURN_OBJECTS else self.model.__table__
+                results.extend(self._execute_bulk(db, insert(target), chunk, returning))
+            _commit_without_expiring(db)
+        except Exception:
+            rollback(db)
+            raise
+        return results
+    
+    def upsert_increment(self, db: Session, values: Dict[str, Any], constraint: str,
+                         increment_fields: List[str]) -> None:
+        """
+        Inserisce la riga o, se il vincolo UNIQUE indicato esiste già, somma `increment_fields` ai
+        valori presenti. Con upsert nativo è un solo statement atomico; altrove prova l'UPDATE e,
+        se la riga non esiste, l'INSERT in un savepoint, ripetendo l'UPDATE se un'altra transazione
+        l'ha appena inserita.
+        """
+        dialect_name = db.get_bind().dialect.name
+        table = self.model.__table__
+        if dialect_name not in _UPSERT_DIALECTS:
+            conflict_columns = self.unique_constraint_columns(constraint)
+            increment = update(table).where(
+                and_(*(table.c[column] == values[column] for column in conflict_columns))
+            ).values({field: table.c[field] + values[field] for field in increment_fields})
+            if db.execute(increment).rowcount:
+                return
+            try:
+                with db.begin_nested():
+                    db.execute(insert(table).values(**values))
+            except IntegrityError:
+                db.execute(increment)
+            return
+        
+        statement = _UPSERT_DIALECTS[dialect_name](table).values(**values)
+        if dialect_name == "mysql":
+            statement = statement.on_duplicate_key_update(
+                {field: table.c[field] + statement.inserted[field] for field in increment_fields}
+            )
+        else:
+            statement = statement.on_conflict_do_update(
+                index_elements=self.unique_constraint_columns(constraint),
+                set_={field: table.c[field] + statement.excluded[field] for field in increment_fields},
+            )
+        db.execute(statement)
+    
+    def bulk_upsert(self, db: Session, objects_data: List[Dict[str, Any]], constraint: str,
+                    update_fields: Optional[List[str]] = None, returning: str = RETURN_NONE,
+                    chunk_size: int = BULK_CHUNK_SIZE) -> List[Any]:
+        """
+        Insert massivo con ON CONFLICT DO UPDATE sul vincolo UNIQUE indicato.
+        Senza `update_fields` aggiorna tutte le colonne fornite tranne chiave e vincolo.
+        """
+        if not objects_data:
+            return []
+        dialect = db.get_bind().dialect
+        dialect_name = dialect.name
+        if dialect_name not in _UPSERT_DIALECTS:
+            raise UnsupportedDialectError("bulk_upsert", dialect_name)
+        if returning != RETURN_NONE and not dialect.insert_executemany_returning:
+            raise UnsupportedDialectError("bulk_upsert with RETURNING", dialect_name)
+        
+        conflict_columns = self.unique_constraint_columns(constraint)
+        primary_keys = {column.name for column in self.model.__table__.primary_key.columns}
+        if update_fields is None:
+            update_fields = [
+                field for field in objects_data[0]
+                if field not in conflict_columns and field not in primary_keys and field != "version"
+            ]
+        
+        target = self.model if returning == RETURN_OBJECTS else self.model.__table__
+        results = []
+        try:
+            for chunk in _chunks(objects_data, chunk_size):
+                statement = _UPSERT_DIALECTS[dialect_name](target)
+                if dialect_name == "mysql":
+                    set_ = {field: statement.inserted[field] for field in update_fields}
+                    if self.versioned:
+                        set_["version"] = self.model.__table__.c.version + 1
+                    statement = statement.on_duplicate_key_update(set_)
+                elif update_fields:
+                    set_ = {field: statement.excluded[field] for field in update_fields}
+                    if self.versioned:
+                        set_["version"] = self.model.__table__.c.version + 1
+                    statement = statement.on_conflict_do_update(index_elements=conflict_columns, set_=set_)
+                else:
+                    statement = statement.on_conflict_do_nothing(index_elements=conflict_columns)
+                results.extend(self._execute_bulk(db, statement, chunk, returning))
+            _commit_without_expiring(db)
+        except Exception:
+            rollback(db)
+            raise
+        return results
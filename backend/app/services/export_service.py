@@ -0,0 +1,136 @@
+from typing import Iterator, Optional
+from datetime import date
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+from app.models.user import User
+from app.models.enums import RoleType, Rating
+from app.models.vendor import Vendor
+from app.models.product import Product, ProductReservation
+from app.models.restaurant import RestaurantTable, RestaurantSeat, RestaurantBooking
+from app.models.warehouse import WarehouseRow, WarehouseShelf, WarehouseSpot, StationBooking
+from app.models.review import Review, VendorReview, ProductReview
+from app.core.streaming_export import stream_statement
+
+class ExportService:
+    """Statement di export (solo colonne, niente oggetti ORM) e relativo streaming NDJSON/CSV"""
+    
+    def stream(self, statement: Select, export_format: str) -> Iterator[bytes]:
+        """Chunk codificati dello statement (connessione propria, letture a blocchi)"""
+        return stream_statement(statement, export_format)
+    
+    def farmer_reservations_statement(self, owner_id: int, product_id: Optional[int] = None,
+                                      from_date: Optional[date] = None, to_date: Optional[date] = None) -> Select:
+        """Prenotazioni sui prodotti dei mercati di un farmer"""
+        query = select(
+            ProductReservation.id,
+            ProductReservation.product_id,
+            Product.name.label("product_name"),
+            ProductReservation.user_id,
+            ProductReservation.date,
+            ProductReservation.time_slot,
+            ProductReservation.desired_quantity,
+        ).join(Product, Product.id == ProductReservation.product_id).join(
+            Vendor, Vendor.id == Product.market_id
+        ).where(Vendor.owner_id == owner_id)
+        
+        if product_id:
+            query = query.where(ProductReservation.product_id == product_id)
+        if from_date:
+            query = query.where(ProductReservation.date >= from_date)
+        if to_date:
+            query = query.where(ProductReservation.date <= to_date)
+        
+        return query.order_by(ProductReservation.id)
+    
+    def station_bookings_statement(self, owner_id: int, warehouse_id: Optional[int] = None,
+                                   from_date: Optional[date] = None, to_date: Optional[date] = None) -> Select:
+        """Prenotazioni delle stazioni nei magazzini di un farmer (periodi che intersecano l'intervallo)"""
+        query = select(
+            StationBooking.id,
+            WarehouseRow.warehouse_id,
+            StationBooking.warehouse_spot_id,
+            StationBooking.user_id,
+            StationBooking.name,
+            StationBooking.description,
+            StationBooking.start_date,
+            StationBooking.end_date,
+            StationBooking.crop_type_id,
+        ).join(WarehouseSpot, WarehouseSpot.id == StationBooking.warehouse_spot_id).join(
+            WarehouseShelf, WarehouseShelf.id == WarehouseSpot.warehouse_shelf_id
+        ).join(
+            WarehouseRow, WarehouseRow.id == WarehouseShelf.warehouse_row_id
+        ).join(
+            Vendor, Vendor.id == WarehouseRow.warehouse_id
+        ).where(Vendor.owner_id == owner_id)
+        
+        if warehouse_id:
+            query = query.where(WarehouseRow.warehouse_id == warehouse_id)
+        if from_date:
+            query = query.where(StationBooking.end_date >= from_date)
+        if to_date:
+            query = query.where(StationBooking.start_date <= to_date)
+        
+        return query.order_by(StationBooking.id)
+    
+    def restaurant_bookings_statement(self, restaurant_id: int, from_date: Optional[date] = None,
+                                      to_date: Optional[date] = None) -> Select:
+        """Prenotazioni di un ristorante"""
+        query = select(
+            RestaurantBooking.id,
+            RestaurantTable.name.label("table_name"),
+            RestaurantBooking.restaurant_seat_id,
+            RestaurantBooking.user_id,
+            RestaurantBooking.date,
+            RestaurantBooking.time_slot,
+        ).join(RestaurantSeat, RestaurantSeat.id == RestaurantBooking.restaurant_seat_id).join(
+            RestaurantTable, RestaurantTable.id == RestaurantSeat.restaurant_table_id
+        ).where(RestaurantTable.restaurant_id == restaurant_id)
+        
+        if from_date:
+            query = query.where(RestaurantBooking.date >= from_date)
+        if to_date:
+            query = query.where(RestaurantBooking.date <= to_date)
+        
+        return query.order_by(RestaurantBooking.id)
+    
+    def users_statement(self, role_name: Optional[str] = None) -> Select:
+        """Utenti con il nome del ruolo (senza hash della password né foto profilo)"""
+        query = select(
+            User.id,
+            User.email,
+            User.first_name,
+            User.last_name,
+            User.phone,
+            RoleType.name.label("role"),
+            User.is_active,
+            User.language,
+        ).join(RoleType, RoleType.id == User.role_type_id)
+        
+        if role_name:
+            query = query.where(RoleType.name == role_name)
+        
+        return query.order_by(User.id)
+    
+    def reviews_statement(self, from_date: Optional[date] = None, to_date: Optional[date] = None) -> Select:
+        """Recensioni di vendor e prodotti in un'unica tabella"""
+        query = select(
+            Review.id,
+            Review.date,
+            Rating.name.label("rating"),
+            Review.comment,
+            VendorReview.vendor_id,
+            ProductReview.product_id,
+            func.coalesce(VendorReview.user_id, ProductReview.user_id).label("user_id"),
+        ).join(Rating, Rating.id == Review.rating_id).outerjoin(
+            VendorReview, VendorReview.id == Review.id
+        ).outerjoin(ProductReview, ProductReview.id == Review.id)
+        
+        if from_date:
+            query = query.where(Review.date >= from_date)
+        if to_date:
+            query = query.where(Review.date <= to_date)
+        
+        return query.order_by(Review.id)
+
+# Istanza globale del servizio
+export_service = ExportService()
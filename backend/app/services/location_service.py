@@ -1,9 +1,25 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import column, select, table
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 from app.models.location import Location
 from app.services.base_service import BaseService
+from app.services.search_service import search_service
+from app.db.session import engine
+from app.db.spatial_index import (
+    EARTH_RADIUS_KM, SPATIAL_TABLE, Box, bounding_boxes, haversine_km, spatial_index_ready
+)
+from app.core.location_snapshot import LocationCoordinates, haversine_matrix, location_snapshot
 import math
 
+# Raggio di partenza della ricerca dei più vicini (cresce finché non bastano i risultati)
+NEAREST_INITIAL_RADIUS_KM = 1.0
+
+# Metà della circonferenza terrestre: oltre questo raggio il cerchio copre tutto il globo
+MAX_RADIUS_KM = math.pi * EARTH_RADIUS_KM
+
+_rtree = table(SPATIAL_TABLE, column("id"), column("min_lat"), column("max_lat"), column("min_lon"), column("max_lon"))
+
 class LocationService(BaseService[Location]):
     """Servizio per operazioni CRUD su Location"""
     
@@ -21,60 +37,115 @@ class LocationService(BaseService[Location]):
         )
     
     def search_by_address(self, db: Session, search_term: str) -> List[Location]:
-        """Cerca location per indirizzo"""
-        return db.query(Location).filter(
-            Location.address.ilike(f"%{search_term}%")
-        ).all()
+        """Cerca location per indirizzo (full-text, dalla più rilevante)"""
+        return db.scalars(search_service.ranked_statement("location", search_term, ["address"])).all()
     
     def search_by_zip(self, db: Session, zip_code: str) -> List[Location]:
         """Cerca location per CAP"""
         return self.filter_by(db, zip=zip_code)
     
-    def get_locations_in_radius(self, db: Session, center_lat: float, center_lon: float, radius_km: float) -> List[Location]:
-        """Recupera location entro un raggio specificato (usando formula haversine approssimata)"""
-        # Formula semplificata per esempio (per produzione usare PostGIS o calcolo più preciso)
-        lat_diff = radius_km / 111.0  # 1 grado di latitudine ≈ 111 km
-        lon_diff = radius_km / (111.0 * abs(math.cos(math.radians(center_lat))))
-        
-        return db.query(Location).filter(
-            Location.lat.between(center_lat - lat_diff, center_lat + lat_diff),
-            Location.lon.between(center_lon - lon_diff, center_lon + lon_diff)
-        ).all()
+    def _within_box(self, statement: Select, box: Box) -> Select:
+        """Limita `statement` (che include Location) alle location nel rettangolo, via R*Tree se presente"""
+        min_lat, max_lat, min_lon, max_lon = box
+        if not spatial_index_ready(engine):
+            return statement.where(Location.lat.between(min_lat, max_lat), Location.lon.between(min_lon, max_lon))
+        return statement.join(_rtree, _rtree.c.id == Location.id).where(
+            _rtree.c.max_lat >= min_lat, _rtree.c.min_lat <= max_lat,
+            _rtree.c.max_lon >= min_lon, _rtree.c.min_lon <= max_lon,
+        )
+    
+    def rows_in_radius(self, db: Session, statement: Select, center_lat: float, center_lon: float,
+                       radius_km: float) -> List[Tuple[float, Any]]:
+        """
+        Righe di `statement` (che seleziona anche Location.lat e Location.lon) con la location entro
+        `radius_km`: candidati dal rettangolo che contiene il cerchio, poi distanza haversine esatta.
+        Restituisce coppie (distanza_km, riga) dalla più vicina.
+        """
+        if radius_km < 0:
+            return []
+        hits = []
+        for box in bounding_boxes(center_lat, center_lon, radius_km):
+            for row in db.execute(self._within_box(statement, box)):
+                distance = haversine_km(center_lat, center_lon, row.lat, row.lon)
+                if distance <= radius_km:
+                    hits.append((distance, row))
+        hits.sort(key=lambda hit: hit[0])
+        return hits
+    
+    def get_locations_in_radius(self, db: Session, center_lat: float, center_lon: float, radius_km: float,
+                                limit: Optional[int] = None) -> List[dict]:
+        """Location entro un raggio (distanza haversine esatta), dalla più vicina"""
+        statement = select(Location, Location.lat, Location.lon)
+        hits = self.rows_in_radius(db, statement, center_lat, center_lon, radius_km)[:limit]
+        return [{"location": row.Location, "distance_km": round(distance, 2)} for distance, row in hits]
     
     def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calcola la distanza tra due punti usando la formula haversine (in km)"""
-        # Converti gradi in radianti
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        
-        # Formula haversine
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        r = 6371  # Raggio della Terra in km
-        
-        return c * r
+        return haversine_km(lat1, lon1, lat2, lon2)
     
     def get_nearest_locations(self, db: Session, center_lat: float, center_lon: float, limit: int = 10) -> List[dict]:
-        """Recupera le location più vicine a un punto specificato"""
-        # Per un'implementazione più efficiente, usare database con supporto geospaziale
-        all_locations = self.get_all(db)
+        """
+        Le `limit` location più vicine: ricerca per raggio crescente finché il cerchio contiene
+        almeno `limit` location (quelle fuori dal cerchio sono per forza più lontane). Il raggio
+        successivo è stimato dalla densità trovata, così le zone poco popolate richiedono pochi passi.
+        """
+        if limit <= 0:
+            return []
+        statement = select(Location.id, Location.lat, Location.lon)
+        radius_km = NEAREST_INITIAL_RADIUS_KM
+        while True:
+            hits = self.rows_in_radius(db, statement, center_lat, center_lon, radius_km)
+            if len(hits) >= limit or radius_km >= MAX_RADIUS_KM:
+                break
+            growth = math.sqrt(limit / len(hits)) * 1.25 if hits else 4.0
+            radius_km = min(radius_km * max(growth, 2.0), MAX_RADIUS_KM)
         
-        locations_with_distance = []
-        for location in all_locations:
-            distance = self.calculate_distance(center_lat, center_lon, location.lat, location.lon)
-            locations_with_distance.append({
-                "location": location,
-                "distance_km": round(distance, 2)
-            })
+        hits = hits[:limit]
+        locations = {
+            location.id: location
+            for location in db.query(Location).filter(Location.id.in_([row.id for _, row in hits]))
+        }
+        return [{"location": locations[row.id], "distance_km": round(distance, 2)} for distance, row in hits]
+    
+    def _coordinates(self, db: Session, force: bool = False) -> LocationCoordinates:
+        return location_snapshot.get(
+            lambda: db.execute(select(Location.id, Location.lat, Location.lon)).all(), force=force
+        )
+    
+    def get_distance_matrix(self, db: Session, origin_ids: List[int], destination_ids: List[int]) -> dict:
+        """
+        Distanze haversine in km tra ogni origine (righe) e ogni destinazione (colonne), calcolate
+        in blocco sullo snapshot NumPy delle coordinate. Gli id sconosciuti finiscono in `missing_ids`
+        (dopo una ricarica dello snapshot, nel caso siano location appena create).
+        """
+        coordinates = self._coordinates(db)
+        origins, missing = coordinates.positions(origin_ids)
+        destinations, missing_destinations = coordinates.positions(destination_ids)
+        if missing or missing_destinations:
+            coordinates = self._coordinates(db, force=True)
+            origins, missing = coordinates.positions(origin_ids)
+            destinations, missing_destinations = coordinates.positions(destination_ids)
+        missing_ids = sorted(set(missing) | set(missing_destinations))
+        if missing_ids:
+            return {"origin_ids": origin_ids, "destination_ids": destination_ids,
+                    "distances_km": None, "missing_ids": missing_ids}
         
-        # Ordina per distanza e limita risultati
-        locations_with_distance.sort(key=lambda x: x["distance_km"])
-        return locations_with_distance[:limit]
+        distances = haversine_matrix(
+            coordinates.lat[origins], coordinates.lon[origins], coordinates.cos_lat[origins],
+            coordinates.lat[destinations], coordinates.lon[destinations], coordinates.cos_lat[destinations],
+        )
+        return {
+            "origin_ids": origin_ids,
+            "destination_ids": destination_ids,
+            "distances_km": distances.round(2).tolist(),
+            "missing_ids": [],
+        }
     
     def update_coordinates(self, db: Session, location_id: int, new_lat: float, new_lon: float) -> Optional[Location]:
         """Aggiorna le coordinate di una location"""
-        return self.update(db, location_id, lat=new_lat, lon=new_lon)
+        location = self.update(db, location_id, lat=new_lat, lon=new_lon)
+        location_snapshot.invalidate()
+        return location
     
     def update_address(self, db: Session, location_id: int, new_address: str, new_zip: str) -> Optional[Location]:
         """Aggiorna l'indirizzo di una location"""
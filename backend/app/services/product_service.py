@@ -1,11 +1,21 @@
-from typing import List, Optional
-from datetime import date, time
+from typing import Any, Dict, List, Optional, Set
+from datetime import date, time, timedelta
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, select, tuple_, update
 from app.models.product import Product, ProductDailyAvailability, ProductReservation
 from app.models.enums import ProductCategory, UnitMeasure
+from app.models.vendor import Vendor
 from app.services.base_service import BaseService
+from app.services.async_base_service import AsyncBaseService
+from app.core.pagination import Page
+from app.db.unit_of_work import transactional, unit_of_work
+from app.services.search_service import search_service
+from app.core.lookups import lookup_registry
+
+# Ampiezza massima di un calendario di disponibilità caricato in blocco
+AVAILABILITY_CALENDAR_MAX_DAYS = 366
 
 class ProductService(BaseService[Product]):
     """Servizio per operazioni CRUD su Product"""
@@ -38,17 +48,22 @@ class ProductService(BaseService[Product]):
         """Recupera tutti i prodotti di un mercato"""
         return self.filter_by(db, market_id=market_id)
     
+    def get_owned_product_ids(self, db: Session, owner_id: int, product_ids: List[int]) -> Set[int]:
+        """Tra gli id indicati, quelli dei prodotti nei mercati del proprietario (una sola query)"""
+        return set(db.scalars(
+            select(Product.id).join(Vendor, Vendor.id == Product.market_id).where(
+                Product.id.in_(product_ids), Vendor.owner_id == owner_id
+            )
+        ))
+    
     def get_products_by_category(self, db: Session, category_name: str) -> List[Product]:
         """Recupera prodotti per categoria"""
-        return db.query(Product).join(ProductCategory).filter(
-            ProductCategory.name == category_name
-        ).all()
+        category_id = lookup_registry.id(db, ProductCategory, category_name)
+        return db.query(Product).filter(Product.category_id == category_id).all()
     
     def search_products_by_name(self, db: Session, search_term: str) -> List[Product]:
-        """Cerca prodotti per nome"""
-        return db.query(Product).filter(
-            Product.name.ilike(f"%{search_term}%")
-        ).all()
+        """Cerca prodotti per nome (full-text, dal più rilevante)"""
+        return db.scalars(search_service.ranked_statement("product", search_term, ["name"])).all()
     
     def get_available_products_today(self, db: Session, market_id: Optional[int] = None) -> List[Product]:
         """Recupera prodotti disponibili oggi"""
@@ -62,6 +77,9 @@ class ProductService(BaseService[Product]):
         
         return query.all()
 
+class _CartRejected(Exception):
+    """Annulla la transazione del carrello in modalità tutto-o-niente"""
+
 class ProductDailyAvailabilityService(BaseService[ProductDailyAvailability]):
     """Servizio per operazioni CRUD su ProductDailyAvailability"""
     
@@ -108,13 +126,105 @@ class ProductDailyAvailabilityService(BaseService[ProductDailyAvailability]):
             )
         ).all()
     
-    def update_quantity(self, db: Session, product_id: int, date: date, new_quantity: int) -> Optional[ProductDailyAvailability]:
+    def update_quantity(self, db: Session, product_id: int, date: date, new_quantity: int,
+                        expected_version: Optional[int] = None) -> Optional[ProductDailyAvailability]:
         """Aggiorna la quantità disponibile"""
         availability = self.get_product_availability(db, product_id, date)
         if availability:
-            return self.update(db, availability.id, available_quantity=new_quantity)
+            return self.update(db, availability.id, expected_version=expected_version, available_quantity=new_quantity)
         return None
     
+    def upsert_calendar(self, db: Session, entries: List[Dict[str, Any]], start_date: date, end_date: date,
+                        weekdays: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Crea o aggiorna le disponibilità per la griglia prodotti × giorni in [start_date, end_date].
+        Ogni voce ha product_id, available_quantity, daily_price ed eventuali sconti; `weekdays`
+        (0 = lunedì) limita i giorni, per voce o per tutto il calendario. Per la stessa coppia
+        prodotto/data vale l'ultima voce. Un upsert su `unique_product_date` per blocco.
+        """
+        days = (end_date - start_date).days + 1
+        if days < 1:
+            raise ValueError("end_date must not be before start_date")
+        if days > AVAILABILITY_CALENDAR_MAX_DAYS:
+            raise ValueError(f"Calendar cannot span more than {AVAILABILITY_CALENDAR_MAX_DAYS} days")
+        patterns = [weekdays or []] + [entry.get("weekdays") or [] for entry in entries]
+        if any(day not in range(7) for pattern in patterns for day in pattern):
+            raise ValueError("weekdays must be between 0 (Monday) and 6 (Sunday)")
+        
+        dates = [start_date + timedelta(days=offset) for offset in range(days)]
+        rows: Dict[tuple, Dict[str, Any]] = {}
+        for entry in entries:
+            entry_weekdays = set(entry.get("weekdays") or weekdays or range(7))
+            for day in dates:
+                if day.weekday() not in entry_weekdays:
+                    continue
+                rows[(entry["product_id"], day)] = {
+                    "product_id": entry["product_id"],
+                    "date": day,
+                    "available_quantity": entry["available_quantity"],
+                    "daily_price": entry["daily_price"],
+                    "discounted_price": entry.get("discounted_price"),
+                    "start_time_discount": entry.get("start_time_discount"),
+                    "end_time_discount": entry.get("end_time_discount"),
+                }
+        
+        product_ids = list({product_id for product_id, _ in rows})
+        existing = set(db.query(ProductDailyAvailability.product_id, ProductDailyAvailability.date).filter(
+            ProductDailyAvailability.product_id.in_(product_ids),
+            ProductDailyAvailability.date.between(start_date, end_date)
+        ).all()) if rows else set()
+        updated = len(existing & rows.keys())
+        
+        self.bulk_upsert(db, list(rows.values()), "unique_product_date")
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "products": len(product_ids),
+            "days": len({day for _, day in rows}),
+            "rows": len(rows),
+            "created": len(rows) - updated,
+            "updated": updated,
+        }
+    
+    def reserve_quantity(self, db: Session, product_id: int, date: date, quantity: int) -> bool:
+        """Scala la disponibilità solo se sufficiente, con un unico UPDATE condizionale; True se riuscito"""
+        return self._adjust_quantity(
+            db, product_id, date, -quantity, ProductDailyAvailability.available_quantity >= quantity
+        )
+    
+    def release_quantity(self, db: Session, product_id: int, date: date, quantity: int) -> bool:
+        """Restituisce quantità alla disponibilità con un unico UPDATE; True se la riga esiste"""
+        return self._adjust_quantity(db, product_id, date, quantity)
+    
+    def reserve_quantities(self, db: Session, quantities: Dict[int, int]) -> Set[int]:
+        """
+        Scala più disponibilità (id -> quantità) con un solo UPDATE condizionale ... RETURNING.
+        Ogni riga viene scalata solo se sufficiente; restituisce gli id effettivamente scalati.
+        """
+        if not quantities:
+            return set()
+        amount = case(quantities, value=ProductDailyAvailability.id)
+        statement = update(ProductDailyAvailability).where(
+            ProductDailyAvailability.id.in_(list(quantities)),
+            ProductDailyAvailability.available_quantity >= amount
+        ).values(
+            available_quantity=ProductDailyAvailability.available_quantity - amount,
+            version=ProductDailyAvailability.version + 1
+        ).returning(ProductDailyAvailability.id).execution_options(synchronize_session="fetch")
+        return set(db.execute(statement).scalars())
+    
+    def _adjust_quantity(self, db: Session, product_id: int, date: date, delta: int, *conditions) -> bool:
+        """`available_quantity += delta` calcolato dal database (nessuna lettura preventiva, nessun lost update)"""
+        statement = update(ProductDailyAvailability).where(
+            ProductDailyAvailability.product_id == product_id,
+            ProductDailyAvailability.date == date,
+            *conditions
+        ).values(
+            available_quantity=ProductDailyAvailability.available_quantity + delta,
+            version=ProductDailyAvailability.version + 1
+        ).execution_options(synchronize_session="fetch")
+        return db.execute(statement).rowcount > 0
+    
     def get_discounted_products(self, db: Session, current_time: time, current_date: date) -> List[ProductDailyAvailability]:
         """Recupera prodotti in sconto al momento attuale"""
         return db.query(ProductDailyAvailability).filter(
@@ -134,44 +244,161 @@ class ProductReservationService(BaseService[ProductReservation]):
     
     def create_reservation(self, db: Session, user_id: int, product_id: int, 
                          date: date, time_slot: time, desired_quantity: int) -> Optional[ProductReservation]:
-        """Crea una nuova prenotazione"""
+        """Crea una nuova prenotazione (prenotazione e disponibilità in un'unica transazione)"""
+        if desired_quantity <= 0:
+            return None
+        
         try:
-            # Verifica disponibilità
-            availability = db.query(ProductDailyAvailability).filter(
-                and_(
-                    ProductDailyAvailability.product_id == product_id,
-                    ProductDailyAvailability.date == date
+            with unit_of_work(db, savepoint=True):
+                # Scala la disponibilità: il controllo è nella WHERE, quindi niente overselling concorrente
+                if not product_availability_service.reserve_quantity(db, product_id, date, desired_quantity):
+                    return None  # Quantità non disponibile
+                
+                reservation = self.create(
+                    db,
+                    user_id=user_id,
+                    product_id=product_id,
+                    date=date,
+                    time_slot=time_slot,
+                    desired_quantity=desired_quantity
                 )
-            ).first()
-            
-            if not availability or availability.available_quantity < desired_quantity:
-                return None  # Quantità non disponibile
-            
-            reservation = self.create(
-                db,
-                user_id=user_id,
-                product_id=product_id,
-                date=date,
-                time_slot=time_slot,
-                desired_quantity=desired_quantity
-            )
-            
-            # Aggiorna la disponibilità
-            availability.available_quantity -= desired_quantity
-            db.commit()
             
             return reservation
-            
+        
         except IntegrityError:
-            db.rollback()
             return None  # Violazione constraint unique
     
+    def create_cart_reservations(self, db: Session, user_id: int, items: List[Dict[str, Any]],
+                                 all_or_nothing: bool = True) -> List[Dict[str, Any]]:
+        """
+        Prenota più prodotti in un'unica transazione: una query per le disponibilità, un UPDATE
+        condizionale per scalarle tutte e un INSERT multiplo delle prenotazioni.
+        `items` contiene product_id, date, time_slot e desired_quantity; l'esito per riga è
+        reserved, invalid_quantity, unavailable, duplicate_booking, insufficient_quantity o
+        not_reserved (riga valida ma carrello annullato in modalità tutto-o-niente).
+        In modalità parziale uno slot prenotato nel frattempo da un'altra richiesta marca solo
+        quella riga come duplicate_booking.
+        """
+        results = [{**item, "status": None, "reservation_id": None} for item in items]
+        keys = list({(item["product_id"], item["date"]) for item in items})
+        if not keys:
+            return results
+        
+        key_columns = tuple_(ProductDailyAvailability.product_id, ProductDailyAvailability.date)
+        availabilities = {
+            (availability.product_id, availability.date): availability
+            for availability in db.query(ProductDailyAvailability).filter(key_columns.in_(keys))
+        }
+        booked = set(db.query(
+            ProductReservation.product_id, ProductReservation.date, ProductReservation.time_slot
+        ).filter(
+            ProductReservation.user_id == user_id,
+            tuple_(ProductReservation.product_id, ProductReservation.date).in_(keys)
+        ).all())
+        
+        # Validazione sulle disponibilità lette, allocando le quantità nell'ordine del carrello
+        quantities: Dict[int, int] = {}
+        for result in results:
+            availability = availabilities.get((result["product_id"], result["date"]))
+            slot = (result["product_id"], result["date"], result["time_slot"])
+            quantity = result["desired_quantity"]
+            if quantity <= 0:
+                result["status"] = "invalid_quantity"
+            elif availability is None:
+                result["status"] = "unavailable"
+            elif slot in booked:
+                result["status"] = "duplicate_booking"
+            elif quantities.get(availability.id, 0) + quantity > availability.available_quantity:
+                result["status"] = "insufficient_quantity"
+            else:
+                quantities[availability.id] = quantities.get(availability.id, 0) + quantity
+                booked.add(slot)
+                result["status"] = "reserved"
+                result["availability_id"] = availability.id
+        
+        accepted = [result for result in results if result["status"] == "reserved"]
+        if not accepted or (all_or_nothing and len(accepted) < len(results)):
+            return self._cart_outcome(results, reserved=False)
+        
+        candidates = accepted
+        try:
+            with unit_of_work(db, savepoint=True):
+                # L'UPDATE è la verifica definitiva: le righe cambiate nel frattempo non vengono scalate
+                decremented = product_availability_service.reserve_quantities(db, quantities)
+                for result in accepted:
+                    if result["availability_id"] not in decremented:
+                        result["status"] = "insufficient_quantity"
+                if all_or_nothing and len(decremented) < len(quantities):
+                    raise _CartRejected()
+                
+                accepted = [result for result in accepted if result["status"] == "reserved"]
+                reservations = self.bulk_create(db, [
+                    {"user_id": user_id, "product_id": result["product_id"], "date": result["date"],
+                     "time_slot": result["time_slot"], "desired_quantity": result["desired_quantity"]}
+                    for result in accepted
+                ])
+                for result, reservation in zip(accepted, reservations):
+                    result["reservation_id"] = reservation.id
+        except _CartRejected:
+            return self._cart_outcome(results, reserved=False)
+        except IntegrityError:
+            # Prenotazione concorrente dello stesso slot: annulla il carrello tutto-o-niente,
+            # in modalità parziale ripete le righe una per una e scarta solo quelle in conflitto
+            if all_or_nothing:
+                return self._cart_outcome(results, reserved=False)
+            self._reserve_one_by_one(db, user_id, candidates)
+        
+        return self._cart_outcome(results, reserved=True)
+    
+    def _reserve_one_by_one(self, db: Session, user_id: int, candidates: List[Dict[str, Any]]) -> None:
+        """Prenota le righe del carrello in un'unica transazione con un savepoint per riga"""
+        with unit_of_work(db):
+            for result in candidates:
+                result["reservation_id"] = None
+                try:
+                    with unit_of_work(db, savepoint=True):
+                        if not product_availability_service.reserve_quantity(
+                            db, result["product_id"], result["date"], result["desired_quantity"]
+                        ):
+                            result["status"] = "insufficient_quantity"
+                            continue
+                        reservation = self.create(
+                            db,
+                            user_id=user_id,
+                            product_id=result["product_id"],
+                            date=result["date"],
+                            time_slot=result["time_slot"],
+                            desired_quantity=result["desired_quantity"]
+                        )
+                    result["status"] = "reserved"
+                    result["reservation_id"] = reservation.id
+                except IntegrityError:
+                    result["status"] = "duplicate_booking"
+    
+    def _cart_outcome(self, results: List[Dict[str, Any]], reserved: bool) -> List[Dict[str, Any]]:
+        """Rimuove i campi interni e, se il carrello è annullato, marca le righe valide come not_reserved"""
+        for result in results:
+            result.pop("availability_id", None)
+            if not reserved and result["status"] == "reserved":
+                result["status"] = "not_reserved"
+                result["reservation_id"] = None
+        return results
+    
     def get_user_reservations(self, db: Session, user_id: int) -> List[ProductReservation]:
         """Recupera tutte le prenotazioni di un utente"""
         return db.query(ProductReservation).options(
             joinedload(ProductReservation.product)
         ).filter(ProductReservation.user_id == user_id).all()
     
+    def get_user_reservations_page(self, db: Session, user_id: int, cursor: Optional[str] = None,
+                                   limit: int = 50, with_total: bool = False) -> Page[ProductReservation]:
+        """Prenotazioni di un utente dalla data più recente, paginate su (data, id)"""
+        query = db.query(ProductReservation).options(
+            joinedload(ProductReservation.product)
+        ).filter(ProductReservation.user_id == user_id)
+        return self.paginate(db, query, cursor=cursor, limit=limit, sort_key=ProductReservation.date,
+                             descending=True, with_total=with_total)
+    
     def get_product_reservations(self, db: Session, product_id: int, date: date) -> List[ProductReservation]:
         """Recupera tutte le prenotazioni per un prodotto in una data"""
         return db.query(ProductReservation).filter(
@@ -192,6 +419,7 @@ class ProductReservationService(BaseService[ProductReservation]):
             )
         ).all()
     
+    @transactional
     def cancel_reservation(self, db: Session, reservation_id: int) -> bool:
         """Cancella una prenotazione e ripristina la disponibilità"""
         reservation = self.get_by_id(db, reservation_id)
@@ -199,15 +427,9 @@ class ProductReservationService(BaseService[ProductReservation]):
             return False
         
         # Ripristina la disponibilità
-        availability = db.query(ProductDailyAvailability).filter(
-            and_(
-                ProductDailyAvailability.product_id == reservation.product_id,
-                ProductDailyAvailability.date == reservation.date
-            )
-        ).first()
-        
-        if availability:
-            availability.available_quantity += reservation.desired_quantity
+        product_availability_service.release_quantity(
+            db, reservation.product_id, reservation.date, reservation.desired_quantity
+        )
         
         return self.delete(db, reservation_id)
     
@@ -222,7 +444,34 @@ class ProductReservationService(BaseService[ProductReservation]):
         
         return result or 0
 
+class AsyncProductService(AsyncBaseService[Product]):
+    """Servizio asincrono per le letture più frequenti su Product"""
+    
+    def __init__(self):
+        super().__init__(Product)
+    
+    async def get_products_page(self, db: AsyncSession, category_name: Optional[str] = None,
+                                search_term: Optional[str] = None, market_id: Optional[int] = None,
+                                cursor: Optional[str] = None, limit: int = 50,
+                                with_total: bool = False) -> Page[Product]:
+        """Prodotti per ricerca sul nome, per categoria o disponibili oggi (anche per market), paginati per id"""
+        if search_term:
+            query = select(Product).where(search_service.match_condition("product", search_term, ["name"]))
+        elif category_name:
+            category_id = await db.run_sync(lookup_registry.id, ProductCategory, category_name)
+            query = select(Product).where(Product.category_id == category_id)
+        else:
+            query = select(Product).join(ProductDailyAvailability).where(
+                ProductDailyAvailability.date == date.today(),
+                ProductDailyAvailability.available_quantity > 0
+            )
+            if market_id:
+                query = query.where(Product.market_id == market_id)
+        
+        return await self.paginate(db, query, cursor=cursor, limit=limit, with_total=with_total)
+
 # Istanze globali dei servizi
 product_service = ProductService()
 product_availability_service = ProductDailyAvailabilityService()
 product_reservation_service = ProductReservationService()
+async_product_service = AsyncProductService()
@@ -4,6 +4,8 @@ from sqlalchemy.orm import Session, joinedload
 from app.models.request_flow import RequestFlow, EventRequestFlow, StationRequestFlow
 from app.models.enums import RequestStatus
 from app.services.base_service import BaseService
+from app.db.unit_of_work import transactional
+from app.core.lookups import lookup_registry
 
 class RequestFlowService(BaseService[RequestFlow]):
     """Servizio per operazioni CRUD su RequestFlow"""
@@ -27,9 +29,8 @@ class RequestFlowService(BaseService[RequestFlow]):
     
     def get_flows_by_status(self, db: Session, status_name: str) -> List[RequestFlow]:
         """Recupera flussi per stato"""
-        return db.query(RequestFlow).join(RequestStatus).filter(
-            RequestStatus.name == status_name
-        ).all()
+        status_id = lookup_registry.id(db, RequestStatus, status_name)
+        return db.query(RequestFlow).filter(RequestFlow.request_status_id == status_id).all()
     
     def get_pending_requests(self, db: Session) -> List[RequestFlow]:
         """Recupera tutte le richieste in sospeso"""
@@ -72,41 +73,40 @@ class EventRequestFlowService(BaseService[EventRequestFlow]):
     
     def get_pending_event_requests(self, db: Session) -> List[EventRequestFlow]:
         """Recupera richieste evento in sospeso"""
-        return db.query(EventRequestFlow).join(RequestFlow).join(RequestStatus).filter(
-            RequestStatus.name == "pending"
-        ).all()
+        pending_id = lookup_registry.id(db, RequestStatus, "pending")
+        return db.query(EventRequestFlow).join(RequestFlow).filter(RequestFlow.request_status_id == pending_id).all()
     
+    @transactional
     def approve_event_request(self, db: Session, request_id: int) -> Optional[EventRequestFlow]:
         """Approva una richiesta evento"""
         request = self.get_by_id(db, request_id)
         if not request:
             return None
         
-        # Trova l'ID del status "approved"
-        approved_status = db.query(RequestStatus).filter(RequestStatus.name == "approved").first()
-        if not approved_status:
+        # ID del status "approved" dal registro dei lookup (nessuna query)
+        approved_status_id = lookup_registry.id(db, RequestStatus, "approved")
+        if approved_status_id is None:
             return None
         
-        # Aggiorna il request flow
-        request_flow_service = RequestFlowService()
-        request_flow_service.update_request_status(db, request.id, approved_status.id)
+        # Aggiorna il request flow (stessa transazione, commit all'uscita)
+        request_flow_service.update_request_status(db, request.id, approved_status_id)
         
         return self.get_by_id(db, request_id)
     
+    @transactional
     def reject_event_request(self, db: Session, request_id: int) -> Optional[EventRequestFlow]:
         """Rifiuta una richiesta evento"""
         request = self.get_by_id(db, request_id)
         if not request:
             return None
         
-        # Trova l'ID del status "rejected"
-        rejected_status = db.query(RequestStatus).filter(RequestStatus.name == "rejected").first()
-        if not rejected_status:
+        # ID del status "rejected" dal registro dei lookup (nessuna query)
+        rejected_status_id = lookup_registry.id(db, RequestStatus, "rejected")
+        if rejected_status_id is None:
             return None
         
-        # Aggiorna il request flow
-        request_flow_service = RequestFlowService()
-        request_flow_service.update_request_status(db, request.id, rejected_status.id)
+        # Aggiorna il request flow (stessa transazione, commit all'uscita)
+        request_flow_service.update_request_status(db, request.id, rejected_status_id)
         
         return self.get_by_id(db, request_id)
 
@@ -135,41 +135,40 @@ class StationRequestFlowService(BaseService[StationRequestFlow]):
     
     def get_pending_station_requests(self, db: Session) -> List[StationRequestFlow]:
         """Recupera richieste stazione in sospeso"""
-        return db.query(StationRequestFlow).join(RequestFlow).join(RequestStatus).filter(
-            RequestStatus.name == "pending"
-        ).all()
+        pending_id = lookup_registry.id(db, RequestStatus, "pending")
+        return db.query(StationRequestFlow).join(RequestFlow).filter(RequestFlow.request_status_id == pending_id).all()
     
+    @transactional
     def approve_station_request(self, db: Session, request_id: int) -> Optional[StationRequestFlow]:
         """Approva una richiesta stazione"""
         request = self.get_by_id(db, request_id)
         if not request:
             return None
         
-        # Trova l'ID del status "approved"
-        approved_status = db.query(RequestStatus).filter(RequestStatus.name == "approved").first()
-        if not approved_status:
+        # ID del status "approved" dal registro dei lookup (nessuna query)
+        approved_status_id = lookup_registry.id(db, RequestStatus, "approved")
+        if approved_status_id is None:
             return None
         
-        # Aggiorna il request flow
-        request_flow_service = RequestFlowService()
-        request_flow_service.update_request_status(db, request.id, approved_status.id)
+        # Aggiorna il request flow (stessa transazione, commit all'uscita)
+        request_flow_service.update_request_status(db, request.id, approved_status_id)
         
         return self.get_by_id(db, request_id)
     
+    @transactional
     def reject_station_request(self, db: Session, request_id: int) -> Optional[StationRequestFlow]:
         """Rifiuta una richiesta stazione"""
         request = self.get_by_id(db, request_id)
         if not request:
             return None
         
-        # Trova l'ID del status "rejected"
-        rejected_status = db.query(RequestStatus).filter(RequestStatus.name == "rejected").first()
-        if not rejected_status:
+        # ID del status "rejected" dal registro dei lookup (nessuna query)
+        rejected_status_id = lookup_registry.id(db, RequestStatus, "rejected")
+        if rejected_status_id is None:
             return None
         
-        # Aggiorna il request flow
-        request_flow_service = RequestFlowService()
-        request_flow_service.update_request_status(db, request.id, rejected_status.id)
+        # Aggiorna il request flow (stessa transazione, commit all'uscita)
+        request_flow_service.update_request_status(db, request.id, rejected_status_id)
         
         return self.get_by_id(db, request_id)
 
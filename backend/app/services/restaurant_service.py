@@ -2,10 +2,16 @@ from typing import List, Optional
 from datetime import date, time
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, select
 from app.models.restaurant import RestaurantTable, RestaurantSeat, MenuItem, RestaurantBooking
 from app.models.enums import MenuCategory
 from app.services.base_service import BaseService
+from app.services.async_base_service import AsyncBaseService
+from app.core.pagination import Page
+from app.db.unit_of_work import transactional
+from app.services.search_service import search_service
+from app.core.lookups import lookup_registry
 
 class RestaurantTableService(BaseService[RestaurantTable]):
     """Servizio per operazioni CRUD su RestaurantTable"""
@@ -17,6 +23,13 @@ class RestaurantTableService(BaseService[RestaurantTable]):
         """Crea un nuovo tavolo"""
         return self.create(db, name=name, restaurant_id=restaurant_id)
     
+    @transactional
+    def create_table_with_seats(self, db: Session, name: str, restaurant_id: int, seats_count: int) -> RestaurantTable:
+        """Crea un tavolo con i suoi posti in un'unica transazione (un solo commit)"""
+        table = self.create_table(db, name, restaurant_id)
+        db.add_all([RestaurantSeat(restaurant_table_id=table.id) for _ in range(seats_count)])
+        return table
+    
     def get_restaurant_tables(self, db: Session, restaurant_id: int) -> List[RestaurantTable]:
         """Recupera tutti i tavoli di un ristorante"""
         return db.query(RestaurantTable).options(
@@ -93,10 +106,11 @@ class MenuItemService(BaseService[MenuItem]):
     
     def get_menu_by_category(self, db: Session, restaurant_id: int, category_name: str) -> List[MenuItem]:
         """Recupera le voci di menu per categoria"""
-        return db.query(MenuItem).join(MenuCategory).filter(
+        menu_category_id = lookup_registry.id(db, MenuCategory, category_name)
+        return db.query(MenuItem).filter(
             and_(
                 MenuItem.restaurant_id == restaurant_id,
-                MenuCategory.name == category_name
+                MenuItem.menu_category_id == menu_category_id
             )
         ).all()
     
@@ -111,18 +125,15 @@ class MenuItemService(BaseService[MenuItem]):
         ).all()
     
     def search_menu_items(self, db: Session, restaurant_id: int, search_term: str) -> List[MenuItem]:
-        """Cerca voci di menu per nome o descrizione"""
-        return db.query(MenuItem).filter(
-            and_(
-                MenuItem.restaurant_id == restaurant_id,
-                (MenuItem.name.ilike(f"%{search_term}%") | 
-                 MenuItem.description.ilike(f"%{search_term}%"))
-            )
+        """Cerca voci di menu per nome o descrizione (full-text, dalla più rilevante)"""
+        return db.scalars(
+            search_service.ranked_statement("menu_item", search_term).where(MenuItem.restaurant_id == restaurant_id)
         ).all()
     
-    def update_menu_item_price(self, db: Session, item_id: int, new_price: float) -> Optional[MenuItem]:
+    def update_menu_item_price(self, db: Session, item_id: int, new_price: float,
+                               expected_version: Optional[int] = None) -> Optional[MenuItem]:
         """Aggiorna il prezzo di una voce di menu"""
-        return self.update(db, item_id, price=new_price)
+        return self.update(db, item_id, expected_version=expected_version, price=new_price)
 
 class RestaurantBookingService(BaseService[RestaurantBooking]):
     """Servizio per operazioni CRUD su RestaurantBooking"""
@@ -160,6 +171,19 @@ class RestaurantBookingService(BaseService[RestaurantBooking]):
             )
         ).all()
     
+    def get_restaurant_bookings_page(self, db: Session, restaurant_id: int, date: date,
+                                     cursor: Optional[str] = None, limit: int = 100,
+                                     with_total: bool = False) -> Page[RestaurantBooking]:
+        """Prenotazioni di un ristorante per una data, paginate su (orario, id)"""
+        query = db.query(RestaurantBooking).join(RestaurantSeat).join(RestaurantTable).filter(
+            and_(
+                RestaurantTable.restaurant_id == restaurant_id,
+                RestaurantBooking.date == date
+            )
+        )
+        return self.paginate(db, query, cursor=cursor, limit=limit, sort_key=RestaurantBooking.time_slot,
+                             with_total=with_total)
+    
     def get_bookings_by_time_slot(self, db: Session, restaurant_id: int, 
                                  date: date, time_slot: time) -> List[RestaurantBooking]:
         """Recupera prenotazioni per un orario specifico"""
@@ -205,8 +229,38 @@ class RestaurantBookingService(BaseService[RestaurantBooking]):
         
         return (booked_seats / total_seats) * 100
 
+class AsyncRestaurantSeatService(AsyncBaseService[RestaurantSeat]):
+    """Servizio asincrono per le letture più frequenti su RestaurantSeat"""
+    
+    def __init__(self):
+        super().__init__(RestaurantSeat)
+    
+    async def get_available_seats(self, db: AsyncSession, restaurant_id: int, date: date, time_slot: time) -> List[RestaurantSeat]:
+        """Recupera i posti disponibili per una data e orario"""
+        booked_seats = select(RestaurantBooking.restaurant_seat_id).where(
+            RestaurantBooking.date == date,
+            RestaurantBooking.time_slot == time_slot
+        )
+        
+        result = await db.scalars(
+            select(RestaurantSeat).join(RestaurantTable).where(
+                RestaurantTable.restaurant_id == restaurant_id,
+                RestaurantSeat.id.not_in(booked_seats)
+            )
+        )
+        return list(result)
+    
+    async def get_restaurant_total_seats(self, db: AsyncSession, restaurant_id: int) -> int:
+        """Conta il numero totale di posti in un ristorante"""
+        return await db.scalar(
+            select(func.count(RestaurantSeat.id)).join(RestaurantTable).where(
+                RestaurantTable.restaurant_id == restaurant_id
+            )
+        )
+
 # Istanze globali dei servizi
 restaurant_table_service = RestaurantTableService()
 restaurant_seat_service = RestaurantSeatService()
 menu_item_service = MenuItemService()
 restaurant_booking_service = RestaurantBookingService()
+async_restaurant_seat_service = AsyncRestaurantSeatService()
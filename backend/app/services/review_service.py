@@ -1,11 +1,35 @@
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import date
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import and_, func, desc
-from app.models.review import Review, VendorReview, ProductReview
-from app.models.enums import Rating
+from sqlalchemy import and_, case, delete, func, desc, insert, literal, select, union_all
+from app.models.review import Review, VendorReview, ProductReview, RatingSummary
+from app.models.enums import ProductCategory, Rating
+from app.models.product import Product
+from app.models.vendor import Vendor
 from app.services.base_service import BaseService
+from app.db.unit_of_work import transactional, unit_of_work
+from app.core.config import settings
+from app.core.pagination import Page
+from app.core.lookups import lookup_registry
+from app.core.leaderboard import (
+    ALL, LeaderboardEntry, LeaderboardRow, bayesian_score, product_leaderboard, vendor_leaderboard
+)
+
+# Valore numerico dei rating: 1=very bad, 2=bad, 3=average, 4=good, 5=very good (nomi sconosciuti = 3)
+RATING_VALUES = {
+    "very bad": 1,
+    "bad": 2,
+    "average": 3,
+    "good": 4,
+    "very good": 5
+}
+DEFAULT_RATING_VALUE = 3
+
+SUMMARY_COUNTERS = ["review_count", "rating_sum", "count_1", "count_2", "count_3", "count_4", "count_5"]
+
+def _leaderboard_fields(entry: LeaderboardEntry) -> dict:
+    return {"average_rating": entry.average, "score": round(entry.score, 4), "review_count": entry.review_count}
 
 class ReviewService(BaseService[Review]):
     """Servizio per operazioni CRUD su Review"""
@@ -30,13 +54,144 @@ class ReviewService(BaseService[Review]):
     
     def get_reviews_by_rating(self, db: Session, rating_name: str) -> List[Review]:
         """Recupera recensioni per valore di rating"""
-        return db.query(Review).join(Rating).filter(
-            Rating.name == rating_name
-        ).all()
+        rating_id = lookup_registry.id(db, Rating, rating_name)
+        return db.query(Review).filter(Review.rating_id == rating_id).all()
     
     def get_recent_reviews(self, db: Session, limit: int = 10) -> List[Review]:
         """Recupera le recensioni più recenti"""
         return db.query(Review).order_by(desc(Review.date)).limit(limit).all()
+    
+    @transactional
+    def delete_review(self, db: Session, review_id: int) -> bool:
+        """Elimina una recensione (vendor o prodotto) aggiornando il riepilogo nella stessa transazione"""
+        review = db.query(Review).options(
+            joinedload(Review.vendor_review), joinedload(Review.product_review)
+        ).filter(Review.id == review_id).first()
+        if not review:
+            return False
+        
+        if review.vendor_review is not None:
+            rating_summary_service.record(db, "vendor", review.vendor_review.vendor_id, review.rating_id, -1)
+            db.delete(review.vendor_review)
+        if review.product_review is not None:
+            rating_summary_service.record(db, "product", review.product_review.product_id, review.rating_id, -1)
+            db.delete(review.product_review)
+        db.delete(review)
+        return True
+
+class RatingSummaryService(BaseService[RatingSummary]):
+    """Riepiloghi delle recensioni per vendor e prodotto: conteggio, somma e istogramma a cinque classi"""
+    
+    def __init__(self):
+        super().__init__(RatingSummary)
+    
+    def rating_value(self, db: Session, rating_id: int) -> int:
+        """Valore numerico (1-5) di un rating"""
+        return RATING_VALUES.get(lookup_registry.name(db, Rating, rating_id), DEFAULT_RATING_VALUE)
+    
+    def record(self, db: Session, entity_type: str, entity_id: int, rating_id: int, delta: int = 1) -> None:
+        """Aggiunge (delta=1) o toglie (delta=-1) una recensione dal riepilogo, senza commit"""
+        value = self.rating_value(db, rating_id)
+        counters = {field: 0 for field in SUMMARY_COUNTERS}
+        counters.update({"review_count": delta, "rating_sum": delta * value, f"count_{value}": delta})
+        self.upsert_increment(
+            db, {"entity_type": entity_type, "entity_id": entity_id, **counters},
+            "unique_rating_summary_entity", SUMMARY_COUNTERS
+        )
+    
+    def get_summary(self, db: Session, entity_type: str, entity_id: int) -> Optional[RatingSummary]:
+        """Riepilogo di un vendor o prodotto, None se non ha mai ricevuto recensioni"""
+        return db.query(RatingSummary).filter(
+            RatingSummary.entity_type == entity_type, RatingSummary.entity_id == entity_id
+        ).first()
+    
+    def average(self, db: Session, entity_type: str, entity_id: int) -> Optional[float]:
+        """Rating medio dal riepilogo, None senza recensioni"""
+        summary = self.get_summary(db, entity_type, entity_id)
+        if not summary or summary.review_count <= 0:
+            return None
+        return summary.rating_sum / summary.review_count
+    
+    def distribution(self, db: Session, entity_type: str, entity_id: int) -> dict:
+        """Numero di recensioni per rating dal riepilogo"""
+        summary = self.get_summary(db, entity_type, entity_id)
+        return {
+            name: getattr(summary, f"count_{value}") if summary else 0
+            for name, value in RATING_VALUES.items()
+        }
+    
+    def prior_mean(self, db: Session, entity_type: str) -> float:
+        """Voto medio globale di tutte le recensioni del tipo (valore neutro se non ce ne sono)"""
+        rating_sum, review_count = db.query(
+            func.sum(RatingSummary.rating_sum), func.sum(RatingSummary.review_count)
+        ).filter(RatingSummary.entity_type == entity_type).one()
+        if not review_count:
+            return float(DEFAULT_RATING_VALUE)
+        return rating_sum / review_count
+    
+    def scored_query(self, db: Session, entity_type: str, *columns):
+        """Riepiloghi con recensioni del tipo: entity_id, punteggio bayesiano, review_count, rating_sum e `columns`"""
+        score = bayesian_score(
+            RatingSummary.rating_sum, RatingSummary.review_count,
+            self.prior_mean(db, entity_type), settings.LEADERBOARD_PRIOR_WEIGHT
+        )
+        return db.query(
+            RatingSummary.entity_id, score, RatingSummary.review_count, RatingSummary.rating_sum, *columns
+        ).filter(RatingSummary.entity_type == entity_type, RatingSummary.review_count > 0)
+    
+    def _expected_statement(self):
+        """Riepiloghi ricalcolati dalle recensioni: (entity_type, entity_id, *SUMMARY_COUNTERS)"""
+        value = case(
+            *((Rating.name == name, rating_value) for name, rating_value in RATING_VALUES.items()),
+            else_=DEFAULT_RATING_VALUE
+        )
+        vendor_reviews = select(
+            literal("vendor").label("entity_type"), VendorReview.vendor_id.label("entity_id"), value.label("value")
+        ).join(Review, Review.id == VendorReview.id).outerjoin(Rating, Rating.id == Review.rating_id)
+        product_reviews = select(
+            literal("product").label("entity_type"), ProductReview.product_id.label("entity_id"), value.label("value")
+        ).join(Review, Review.id == ProductReview.id).outerjoin(Rating, Rating.id == Review.rating_id)
+        reviews = union_all(vendor_reviews, product_reviews).subquery()
+        
+        return select(
+            reviews.c.entity_type,
+            reviews.c.entity_id,
+            func.count().label("review_count"),
+            func.sum(reviews.c.value).label("rating_sum"),
+            *(func.sum(case((reviews.c.value == bucket, 1), else_=0)).label(f"count_{bucket}") for bucket in range(1, 6))
+        ).group_by(reviews.c.entity_type, reviews.c.entity_id)
+    
+    @transactional
+    def rebuild(self, db: Session) -> int:
+        """Ricostruisce tutti i riepiloghi dalle recensioni; restituisce il numero di riepiloghi"""
+        db.execute(delete(RatingSummary))
+        db.execute(insert(RatingSummary).from_select(
+            ["entity_type", "entity_id", *SUMMARY_COUNTERS], self._expected_statement()
+        ))
+        return db.query(func.count(RatingSummary.id)).scalar()
+    
+    def check(self, db: Session) -> List[dict]:
+        """Confronta i riepiloghi salvati con quelli ricalcolati; restituisce le differenze"""
+        def by_entity(rows) -> Dict[Tuple[str, int], Tuple[int, ...]]:
+            return {(row[0], row[1]): tuple(row[2:]) for row in rows}
+        
+        expected = by_entity(db.execute(self._expected_statement()).all())
+        stored = by_entity(db.execute(select(
+            RatingSummary.entity_type, RatingSummary.entity_id,
+            *(getattr(RatingSummary, field) for field in SUMMARY_COUNTERS)
+        )).all())
+        
+        empty = (0,) * len(SUMMARY_COUNTERS)
+        mismatches = []
+        for key in sorted(expected.keys() | stored.keys()):
+            if expected.get(key, empty) != stored.get(key, empty):
+                mismatches.append({
+                    "entity_type": key[0],
+                    "entity_id": key[1],
+                    "expected": dict(zip(SUMMARY_COUNTERS, expected.get(key, empty))),
+                    "stored": dict(zip(SUMMARY_COUNTERS, stored.get(key, empty))),
+                })
+        return mismatches
 
 class VendorReviewService(BaseService[VendorReview]):
     """Servizio per operazioni CRUD su VendorReview"""
@@ -46,31 +201,34 @@ class VendorReviewService(BaseService[VendorReview]):
     
     def create_vendor_review(self, db: Session, user_id: int, vendor_id: int, 
                            rating_id: int, comment: str) -> Optional[VendorReview]:
-        """Crea una nuova recensione per un vendor"""
+        """Crea una nuova recensione per un vendor (recensione e riepilogo in un'unica transazione)"""
         try:
-            # Prima crea la review base
-            review = Review(
-                rating_id=rating_id,
-                comment=comment,
-                date=date.today()
-            )
-            db.add(review)
-            db.flush()  # Per ottenere l'ID
+            with unit_of_work(db, savepoint=True):
+                # Prima crea la review base
+                review = Review(
+                    rating_id=rating_id,
+                    comment=comment,
+                    date=date.today()
+                )
+                db.add(review)
+                db.flush()  # Per ottenere l'ID
+                
+                # Poi crea la vendor review
+                vendor_review = VendorReview(
+                    id=review.id,
+                    user_id=user_id,
+                    vendor_id=vendor_id
+                )
+                db.add(vendor_review)
+                db.flush()
+                
+                # Riepilogo aggiornato nella stessa transazione della recensione
+                rating_summary_service.record(db, "vendor", vendor_id, rating_id)
             
-            # Poi crea la vendor review
-            vendor_review = VendorReview(
-                id=review.id,
-                user_id=user_id,
-                vendor_id=vendor_id
-            )
-            db.add(vendor_review)
-            db.commit()
             db.refresh(vendor_review)
-            
             return vendor_review
-            
+        
         except IntegrityError:
-            db.rollback()
             return None  # Utente ha già recensito questo vendor
     
     def get_vendor_reviews(self, db: Session, vendor_id: int) -> List[VendorReview]:
@@ -87,44 +245,56 @@ class VendorReviewService(BaseService[VendorReview]):
             joinedload(VendorReview.vendor)
         ).filter(VendorReview.user_id == user_id).all()
     
+    def get_vendor_reviews_page(self, db: Session, vendor_id: int, cursor: Optional[str] = None,
+                                limit: int = 20, with_total: bool = False) -> Page[VendorReview]:
+        """Recensioni di un vendor dalla più recente, paginate per id"""
+        query = db.query(VendorReview).options(
+            joinedload(VendorReview.review).joinedload(Review.rating),
+            joinedload(VendorReview.user)
+        ).filter(VendorReview.vendor_id == vendor_id)
+        return self.paginate(db, query, cursor=cursor, limit=limit, descending=True, with_total=with_total)
+    
+    def get_user_vendor_reviews_page(self, db: Session, user_id: int, cursor: Optional[str] = None,
+                                     limit: int = 20, with_total: bool = False) -> Page[VendorReview]:
+        """Recensioni di un utente ai vendor dalla più recente, paginate per id"""
+        query = db.query(VendorReview).options(
+            joinedload(VendorReview.review).joinedload(Review.rating),
+            joinedload(VendorReview.vendor)
+        ).filter(VendorReview.user_id == user_id)
+        return self.paginate(db, query, cursor=cursor, limit=limit, descending=True, with_total=with_total)
+    
     def get_vendor_average_rating(self, db: Session, vendor_id: int) -> Optional[float]:
         """Calcola il rating medio di un vendor"""
-        # Assumendo che i rating abbiano valori numerici: 1=very bad, 2=bad, 3=average, 4=good, 5=very good
-        rating_values = {
-            "very bad": 1,
-            "bad": 2,
-            "average": 3,
-            "good": 4,
-            "very good": 5
-        }
-        
-        reviews = self.get_vendor_reviews(db, vendor_id)
-        if not reviews:
-            return None
-        
-        total_rating = sum(rating_values.get(review.review.rating.name, 3) for review in reviews)
-        return total_rating / len(reviews)
+        return rating_summary_service.average(db, "vendor", vendor_id)
     
     def get_vendor_rating_distribution(self, db: Session, vendor_id: int) -> dict:
         """Ottiene la distribuzione dei rating per un vendor"""
-        reviews = db.query(VendorReview).join(Review).join(Rating).filter(
-            VendorReview.vendor_id == vendor_id
-        ).all()
-        
-        distribution = {
-            "very bad": 0,
-            "bad": 0,
-            "average": 0,
-            "good": 0,
-            "very good": 0
+        return rating_summary_service.distribution(db, "vendor", vendor_id)
+    
+    def _leaderboard_rows(self, db: Session) -> Iterator[LeaderboardRow]:
+        query = rating_summary_service.scored_query(db, "vendor", Vendor.vendor_type).join(
+            Vendor, Vendor.id == RatingSummary.entity_id
+        )
+        for vendor_id, score, review_count, rating_sum, vendor_type in query:
+            groups = (("type", vendor_type),) if vendor_type else ()
+            yield LeaderboardRow(vendor_id, groups, score, review_count, rating_sum / review_count)
+    
+    def refresh_leaderboard(self, db: Session) -> None:
+        """Ricalcola subito le classifiche dei vendor"""
+        vendor_leaderboard.refresh(lambda: self._leaderboard_rows(db))
+    
+    def get_top_rated_vendors(self, db: Session, limit: int = 10, vendor_type: Optional[str] = None) -> List[dict]:
+        """Vendor con il punteggio bayesiano più alto, anche per tipo (market, restaurant, ...)"""
+        group = ("type", vendor_type) if vendor_type else ALL
+        entries = vendor_leaderboard.top(lambda: self._leaderboard_rows(db), group, limit)
+        vendors = {
+            vendor.id: vendor
+            for vendor in db.query(Vendor).filter(Vendor.id.in_([entry.entity_id for entry in entries]))
         }
-        
-        for review in reviews:
-            rating_name = review.review.rating.name
-            if rating_name in distribution:
-                distribution[rating_name] += 1
-        
-        return distribution
+        return [
+            {"vendor": vendors[entry.entity_id], **_leaderboard_fields(entry)}
+            for entry in entries if entry.entity_id in vendors
+        ]
     
     def user_has_reviewed_vendor(self, db: Session, user_id: int, vendor_id: int) -> bool:
         """Verifica se un utente ha già recensito un vendor"""
@@ -145,31 +315,34 @@ class ProductReviewService(BaseService[ProductReview]):
     
     def create_product_review(self, db: Session, user_id: int, product_id: int, 
                             rating_id: int, comment: str) -> Optional[ProductReview]:
-        """Crea una nuova recensione per un prodotto"""
+        """Crea una nuova recensione per un prodotto (recensione e riepilogo in un'unica transazione)"""
         try:
-            # Prima crea la review base
-            review = Review(
-                rating_id=rating_id,
-                comment=comment,
-                date=date.today()
-            )
-            db.add(review)
-            db.flush()  # Per ottenere l'ID
+            with unit_of_work(db, savepoint=True):
+                # Prima crea la review base
+                review = Review(
+                    rating_id=rating_id,
+                    comment=comment,
+                    date=date.today()
+                )
+                db.add(review)
+                db.flush()  # Per ottenere l'ID
+                
+                # Poi crea la product review
+                product_review = ProductReview(
+                    id=review.id,
+                    user_id=user_id,
+                    product_id=product_id
+                )
+                db.add(product_review)
+                db.flush()
+                
+                # Riepilogo aggiornato nella stessa transazione della recensione
+                rating_summary_service.record(db, "product", product_id, rating_id)
             
-            # Poi crea la product review
-            product_review = ProductReview(
-                id=review.id,
-                user_id=user_id,
-                product_id=product_id
-            )
-            db.add(product_review)
-            db.commit()
             db.refresh(product_review)
-            
             return product_review
-            
+        
         except IntegrityError:
-            db.rollback()
             return None  # Utente ha già recensito questo prodotto
     
     def get_product_reviews(self, db: Session, product_id: int) -> List[ProductReview]:
@@ -186,59 +359,62 @@ class ProductReviewService(BaseService[ProductReview]):
             joinedload(ProductReview.product)
         ).filter(ProductReview.user_id == user_id).all()
     
+    def get_product_reviews_page(self, db: Session, product_id: int, cursor: Optional[str] = None,
+                                 limit: int = 20, with_total: bool = False) -> Page[ProductReview]:
+        """Recensioni di un prodotto dalla più recente, paginate per id"""
+        query = db.query(ProductReview).options(
+            joinedload(ProductReview.review).joinedload(Review.rating),
+            joinedload(ProductReview.user)
+        ).filter(ProductReview.product_id == product_id)
+        return self.paginate(db, query, cursor=cursor, limit=limit, descending=True, with_total=with_total)
+    
+    def get_user_product_reviews_page(self, db: Session, user_id: int, cursor: Optional[str] = None,
+                                      limit: int = 20, with_total: bool = False) -> Page[ProductReview]:
+        """Recensioni di un utente ai prodotti dalla più recente, paginate per id"""
+        query = db.query(ProductReview).options(
+            joinedload(ProductReview.review).joinedload(Review.rating),
+            joinedload(ProductReview.product)
+        ).filter(ProductReview.user_id == user_id)
+        return self.paginate(db, query, cursor=cursor, limit=limit, descending=True, with_total=with_total)
+    
     def get_product_average_rating(self, db: Session, product_id: int) -> Optional[float]:
         """Calcola il rating medio di un prodotto"""
-        rating_values = {
-            "very bad": 1,
-            "bad": 2,
-            "average": 3,
-            "good": 4,
-            "very good": 5
-        }
-        
-        reviews = self.get_product_reviews(db, product_id)
-        if not reviews:
-            return None
-        
-        total_rating = sum(rating_values.get(review.review.rating.name, 3) for review in reviews)
-        return total_rating / len(reviews)
-    
-    def get_top_rated_products(self, db: Session, limit: int = 10) -> List[dict]:
-        """Recupera i prodotti con il rating più alto"""
-        # Query complessa che calcola il rating medio per prodotto
-        # Questo è un esempio semplificato
-        product_reviews = db.query(ProductReview).options(
-            joinedload(ProductReview.product),
-            joinedload(ProductReview.review).joinedload(Review.rating)
-        ).all()
-        
-        # Raggruppa per prodotto e calcola rating medio
-        product_ratings = {}
-        for review in product_reviews:
-            product_id = review.product_id
-            rating_value = {
-                "very bad": 1, "bad": 2, "average": 3, "good": 4, "very good": 5
-            }.get(review.review.rating.name, 3)
-            
-            if product_id not in product_ratings:
-                product_ratings[product_id] = {"ratings": [], "product": review.product}
-            
-            product_ratings[product_id]["ratings"].append(rating_value)
-        
-        # Calcola medie e ordina
-        products_with_avg = []
-        for product_id, data in product_ratings.items():
-            avg_rating = sum(data["ratings"]) / len(data["ratings"])
-            products_with_avg.append({
-                "product": data["product"],
-                "average_rating": avg_rating,
-                "review_count": len(data["ratings"])
-            })
-        
-        # Ordina per rating medio decrescente
-        products_with_avg.sort(key=lambda x: x["average_rating"], reverse=True)
+        return rating_summary_service.average(db, "product", product_id)
+    
+    def _leaderboard_rows(self, db: Session) -> Iterator[LeaderboardRow]:
+        query = rating_summary_service.scored_query(db, "product", Product.category_id, Product.market_id).join(
+            Product, Product.id == RatingSummary.entity_id
+        )
+        for product_id, score, review_count, rating_sum, category_id, market_id in query:
+            groups = (("category", category_id), ("market", market_id))
+            yield LeaderboardRow(product_id, groups, score, review_count, rating_sum / review_count)
+    
+    def refresh_leaderboard(self, db: Session) -> None:
+        """Ricalcola subito le classifiche dei prodotti"""
+        product_leaderboard.refresh(lambda: self._leaderboard_rows(db))
+    
+    def get_top_rated_products(self, db: Session, limit: int = 10, category: Optional[str] = None,
+                               market_id: Optional[int] = None) -> List[dict]:
+        """Prodotti con il punteggio bayesiano più alto, in generale, per categoria o per market"""
+        if category:
+            category_id = lookup_registry.id(db, ProductCategory, category)
+            if category_id is None:
+                return []
+            group = ("category", category_id)
+        elif market_id is not None:
+            group = ("market", market_id)
+        else:
+            group = ALL
         
-        return products_with_avg[:limit]
+        entries = product_leaderboard.top(lambda: self._leaderboard_rows(db), group, limit)
+        products = {
+            product.id: product
+            for product in db.query(Product).filter(Product.id.in_([entry.entity_id for entry in entries]))
+        }
+        return [
+            {"product": products[entry.entity_id], **_leaderboard_fields(entry)}
+            for entry in entries if entry.entity_id in products
+        ]
     
     def user_has_reviewed_product(self, db: Session, user_id: int, product_id: int) -> bool:
         """Verifica se un utente ha già recensito un prodotto"""
@@ -253,5 +429,6 @@ class ProductReviewService(BaseService[ProductReview]):
 
 # Istanze globali dei servizi
 review_service = ReviewService()
+rating_summary_service = RatingSummaryService()
 vendor_review_service = VendorReviewService()
 product_review_service = ProductReviewService()
@@ -0,0 +1,116 @@
+import re
+from typing import Any, Dict, Optional, Sequence
+from sqlalchemy import String, cast, false, func, literal, literal_column, null, or_, select, table, column, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+from app.models.product import Product
+from app.models.vendor import Vendor
+from app.models.restaurant import MenuItem
+from app.models.location import Location
+from app.models.user import User
+from app.db.search_index import SEARCH_SOURCES, SearchSource, search_index_ready
+from app.db.session import engine
+from app.core.pagination import Page, apply_keyset, build_page
+
+SEARCH_MODELS = {
+    "product": Product,
+    "vendor": Vendor,
+    "menu_item": MenuItem,
+    "location": Location,
+    "user": User,
+}
+
+# Tipi cercabili da /search (gli utenti solo dai servizi di amministrazione)
+PUBLIC_ENTITY_TYPES = ("product", "vendor", "menu_item", "location")
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(term: str, columns: Optional[Sequence[str]] = None) -> Optional[str]:
+    """Query FTS5 sicura dal testo libero: ogni parola come prefisso tra virgolette, tutte richieste"""
+    tokens = _TOKEN.findall(term or "")
+    if not tokens:
+        return None
+    query = " ".join(f'"{token}"*' for token in tokens)
+    if columns:
+        query = f"{{{' '.join(columns)}}} : ({query})"
+    return query
+
+
+class SearchService:
+    """Ricerca full-text FTS5 con ranking bm25, con ripiego su ILIKE se l'indice non c'è"""
+    
+    def enabled(self) -> bool:
+        """True se le tabelle FTS sono presenti nel database"""
+        return search_index_ready(engine)
+    
+    def _fts(self, source: SearchSource, query: str):
+        """Tabella FTS, condizione MATCH e punteggio bm25 (più basso = più rilevante)"""
+        fts = table(source.fts_table, column("rowid"))
+        fts_name = literal_column(source.fts_table)
+        return fts, fts_name.op("MATCH")(query), func.bm25(fts_name, *source.weights)
+    
+    def _ilike(self, source: SearchSource, term: str, columns: Optional[Sequence[str]] = None) -> ColumnElement:
+        model = SEARCH_MODELS[source.entity_type]
+        return or_(*(getattr(model, name).ilike(f"%{term}%") for name in columns or source.columns))
+    
+    def match_condition(self, entity_type: str, term: str, columns: Optional[Sequence[str]] = None) -> ColumnElement:
+        """Condizione `id IN (righe che corrispondono a term)` da aggiungere a una query esistente"""
+        source = SEARCH_SOURCES[entity_type]
+        query = fts_query(term, columns)
+        if query is None:
+            return false()
+        if not self.enabled():
+            return self._ilike(source, term, columns)
+        fts, match, _ = self._fts(source, query)
+        return SEARCH_MODELS[entity_type].id.in_(select(fts.c.rowid).where(match))
+    
+    def ranked_statement(self, entity_type: str, term: str, columns: Optional[Sequence[str]] = None) -> Select:
+        """SELECT delle entità che corrispondono a `term`, dalla più rilevante"""
+        source = SEARCH_SOURCES[entity_type]
+        model = SEARCH_MODELS[entity_type]
+        query = fts_query(term, columns)
+        if query is None:
+            return select(model).where(false())
+        if not self.enabled():
+            return select(model).where(self._ilike(source, term, columns)).order_by(model.id)
+        fts, match, rank = self._fts(source, query)
+        return select(model).join(fts, fts.c.rowid == model.id).where(match).order_by(rank, model.id)
+    
+    def _hits(self, source: SearchSource, term: str, query: str, fts_enabled: bool) -> Select:
+        """Risultati di un tipo con colonne comuni: entity_type, entity_id, title, snippet, rank"""
+        model = SEARCH_MODELS[source.entity_type]
+        columns = [
+            literal(source.entity_type).label("entity_type"),
+            model.id.label("entity_id"),
+            getattr(model, source.title).label("title"),
+        ]
+        if not fts_enabled:
+            return select(
+                *columns, cast(null(), String).label("snippet"), literal(0.0).label("rank")
+            ).where(self._ilike(source, term))
+        fts, match, rank = self._fts(source, query)
+        snippet = func.snippet(literal_column(source.fts_table), -1, "[", "]", "…", 12)
+        return select(*columns, snippet.label("snippet"), rank.label("rank")).join(
+            fts, fts.c.rowid == model.id
+        ).where(match)
+    
+    def search(self, db: Session, term: str, entity_types: Optional[Sequence[str]] = None,
+               cursor: Optional[str] = None, limit: int = 20) -> Page[Dict[str, Any]]:
+        """Ricerca unificata: risultati di tutti i tipi richiesti ordinati per bm25, paginati a cursore"""
+        query = fts_query(term)
+        if query is None:
+            return Page([], None)
+        fts_enabled = self.enabled()
+        hits = union_all(*(
+            self._hits(SEARCH_SOURCES[entity_type], term, query, fts_enabled)
+            for entity_type in entity_types or PUBLIC_ENTITY_TYPES
+        )).subquery("hits")
+        keys = [hits.c.rank, hits.c.entity_type, hits.c.entity_id]
+        page = build_page(db.execute(apply_keyset(select(hits), keys, cursor, limit)).all(), keys, limit)
+        page.items = [dict(row._mapping) for row in page.items]
+        return page
+
+# Istanza globale del servizio
+search_service = SearchService()
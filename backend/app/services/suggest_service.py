@@ -0,0 +1,193 @@
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session, sessionmaker
+from app.models.product import Product, ProductReservation
+from app.models.vendor import Vendor
+from app.models.location import Location
+from app.models.enums import ProductCategory
+from app.models.restaurant import RestaurantTable, RestaurantSeat, RestaurantBooking
+from app.core.suggest_index import SuggestIndex, SuggestItem, suggest_index
+from app.db.session import SessionLocal, ReadSessionLocal
+
+_PENDING_KEY = "suggest_index_pending"
+
+# Attributi che cambiano il testo (o il genitore) di una voce
+_INDEXED_ATTRIBUTES = {
+    Product: ("name", "market_id", "category_id"),
+    Vendor: ("name", "location_id"),
+    ProductCategory: ("name",),
+    Location: ("zip",),
+}
+
+
+def _within(transaction, ancestor) -> bool:
+    """True se `transaction` è `ancestor` o una sua sotto-transazione (savepoint)"""
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+class SuggestService:
+    """
+    Autocompletamento di prodotti, vendor, categorie e CAP dall'indice in memoria.
+    Il peso è la popolarità: prenotazioni del prodotto, prenotazioni sui prodotti e sui tavoli del
+    vendor, prenotazioni dei prodotti della categoria, somma dei vendor del CAP. Dopo il caricamento
+    iniziale l'indice segue i commit delle sessioni (nuovi nomi, eliminazioni, prenotazioni).
+    """
+    
+    def __init__(self, index: SuggestIndex):
+        self.index = index
+        self._installed = set()
+    
+    def suggest(self, prefix: str, kinds: Optional[Sequence[str]] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        return self.index.suggest(prefix, kinds, limit)
+    
+    def _product_item(self, product_id: int, name: str, market_id: int, category_id: int, weight: int = 0) -> SuggestItem:
+        return SuggestItem("product", product_id, name, weight, (("vendor", market_id), ("category", category_id)))
+    
+    def build(self, db: Session) -> None:
+        """Carica l'indice dal database (una query aggregata per tipo)"""
+        if not self.index.enabled:
+            return
+        product_reservations = dict(db.query(
+            ProductReservation.product_id, func.count(ProductReservation.id)
+        ).group_by(ProductReservation.product_id).all())
+        restaurant_bookings = dict(db.query(
+            RestaurantTable.restaurant_id, func.count(RestaurantBooking.id)
+        ).join(RestaurantSeat, RestaurantSeat.restaurant_table_id == RestaurantTable.id).join(
+            RestaurantBooking, RestaurantBooking.restaurant_seat_id == RestaurantSeat.id
+        ).group_by(RestaurantTable.restaurant_id).all())
+        
+        items: List[SuggestItem] = []
+        vendor_weights: Dict[int, int] = dict(restaurant_bookings)
+        category_weights: Dict[int, int] = {}
+        for product_id, name, market_id, category_id in db.query(
+            Product.id, Product.name, Product.market_id, Product.category_id
+        ):
+            weight = product_reservations.get(product_id, 0)
+            vendor_weights[market_id] = vendor_weights.get(market_id, 0) + weight
+            category_weights[category_id] = category_weights.get(category_id, 0) + weight
+            items.append(self._product_item(product_id, name, market_id, category_id, weight))
+        
+        zip_weights: Dict[str, int] = {}
+        for vendor_id, name, zip_code in db.query(Vendor.id, Vendor.name, Location.zip).join(
+            Location, Location.id == Vendor.location_id
+        ):
+            weight = vendor_weights.get(vendor_id, 0)
+            zip_weights[zip_code] = zip_weights.get(zip_code, 0) + weight
+            items.append(SuggestItem("vendor", vendor_id, name, weight, (("zip", zip_code),)))
+        for zip_code, in db.query(Location.zip).distinct():
+            items.append(SuggestItem("zip", zip_code, zip_code, zip_weights.get(zip_code, 0)))
+        for category_id, name in db.query(ProductCategory.id, ProductCategory.name):
+            items.append(SuggestItem("category", category_id, name, category_weights.get(category_id, 0)))
+        
+        self.index.load(items)
+    
+    def start(self) -> None:
+        """Collega l'indice alle sessioni di scrittura e lo carica (all'avvio del worker)"""
+        if not self.index.enabled:
+            return
+        self.install(SessionLocal)
+        with ReadSessionLocal() as db:
+            self.build(db)
+    
+    def install(self, session_factory: sessionmaker) -> None:
+        """Collega l'indice ai commit delle sessioni create da `session_factory`"""
+        if id(session_factory) in self._installed:
+            return
+        self._installed.add(id(session_factory))
+        event.listen(session_factory, "after_flush", self._collect_flush)
+        event.listen(session_factory, "do_orm_execute", self._collect_orm_execute)
+        event.listen(session_factory, "after_commit", self._apply)
+        event.listen(session_factory, "after_soft_rollback", self._discard)
+    
+    def _pending(self, session: Session) -> list:
+        return session.info.setdefault(_PENDING_KEY, [])
+    
+    def _item(self, obj) -> Optional[SuggestItem]:
+        """Voce dell'indice corrispondente a un oggetto ORM (None se il tipo non è indicizzato)"""
+        if isinstance(obj, Product):
+            return self._product_item(obj.id, obj.name, obj.market_id, obj.category_id)
+        if isinstance(obj, Vendor):
+            zip_code = obj.location.zip if obj.location is not None else None
+            return SuggestItem("vendor", obj.id, obj.name, 0, (("zip", zip_code),))
+        if isinstance(obj, ProductCategory):
+            return SuggestItem("category", obj.id, obj.name)
+        if isinstance(obj, Location):
+            return SuggestItem("zip", obj.zip, obj.zip)
+        return None
+    
+    def _record(self, session: Session, changes: list) -> None:
+        if changes:
+            transaction = session.get_nested_transaction() or session.get_transaction()
+            self._pending(session).extend((transaction, change) for change in changes)
+    
+    def _collect_flush(self, session: Session, flush_context) -> None:
+        """Registra le modifiche rilevanti del flush, applicate solo al commit"""
+        if not self.index.ready:
+            return
+        changes = []
+        for obj in session.new:
+            if isinstance(obj, ProductReservation):
+                changes.append(("bump", ("product", obj.product_id, 1)))
+            elif type(obj) in _INDEXED_ATTRIBUTES:
+                changes.append(("upsert", self._item(obj)))
+        for obj in session.dirty:
+            attributes = _INDEXED_ATTRIBUTES.get(type(obj), ())
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in attributes):
+                changes.append(("upsert", self._item(obj)))
+        for obj in session.deleted:
+            if isinstance(obj, Product):
+                changes.append(("remove", ("product", obj.id)))
+            elif isinstance(obj, Vendor):
+                changes.append(("remove", ("vendor", obj.id)))
+            elif isinstance(obj, ProductCategory):
+                changes.append(("remove", ("category", obj.id)))
+            elif isinstance(obj, ProductReservation):
+                changes.append(("bump", ("product", obj.product_id, -1)))
+        self._record(session, changes)
+    
+    def _collect_orm_execute(self, orm_execute_state):
+        """INSERT in blocco di prenotazioni (bulk_create) e UPDATE ... RETURNING (BaseService.update) fuori dal flush"""
+        mapper = orm_execute_state.bind_mapper
+        if not self.index.ready or mapper is None:
+            return None
+        session = orm_execute_state.session
+        if orm_execute_state.is_insert and mapper.class_ is ProductReservation:
+            parameters = orm_execute_state.parameters
+            rows = parameters if isinstance(parameters, list) else [parameters or {}]
+            self._record(session, [("bump", ("product", row["product_id"], 1)) for row in rows if "product_id" in row])
+            return None
+        if (orm_execute_state.is_update and mapper.class_ in _INDEXED_ATTRIBUTES
+                and orm_execute_state.statement._returning):
+            # Esegue lo statement qui per leggere le righe aggiornate e restituisce una copia del risultato
+            frozen = orm_execute_state.invoke_statement().freeze()
+            self._record(session, [
+                ("upsert", self._item(obj)) for obj in frozen().scalars() if type(obj) in _INDEXED_ATTRIBUTES
+            ])
+            return frozen()
+        return None
+    
+    def _apply(self, session: Session) -> None:
+        for _, (action, payload) in session.info.pop(_PENDING_KEY, []):
+            if action == "upsert":
+                self.index.upsert(payload)
+            elif action == "remove":
+                self.index.remove(*payload)
+            else:
+                self.index.bump(*payload)
+    
+    def _discard(self, session: Session, previous_transaction) -> None:
+        """Scarta le modifiche della transazione (o del savepoint) annullata"""
+        pending = session.info.get(_PENDING_KEY)
+        if pending:
+            session.info[_PENDING_KEY] = [
+                (transaction, change) for transaction, change in pending
+                if not _within(transaction, previous_transaction)
+            ]
+
+# Istanza globale del servizio
+suggest_service = SuggestService(suggest_index)
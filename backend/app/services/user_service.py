@@ -1,8 +1,15 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session, joinedload
 from app.models.user import User
 from app.models.enums import RoleType
 from app.services.base_service import BaseService
+from app.core.principal_cache import principal_cache
+from app.core.pagination import Page
+from app.services.search_service import search_service
+from app.core.lookups import LookupRow, lookup_registry
+
+# Campi dell'utente replicati nella cache dei principal
+PRINCIPAL_FIELDS = {"role_type_id", "is_active", "language"}
 
 class UserService(BaseService[User]):
     """Servizio per operazioni CRUD su User"""
@@ -14,9 +21,24 @@ class UserService(BaseService[User]):
         """Crea un nuovo utente"""
         return self.create(db, email=email, password_hash=password_hash, first_name=first_name, last_name=last_name, phone=phone, role_type_id=role_type_id, language=language, profile_picture=profile_picture, is_active=True)
     
+    def update(self, db: Session, id: int, **kwargs) -> Optional[User]:
+        """Aggiorna un utente invalidando la cache dei principal se cambiano ruolo, stato o lingua"""
+        updated_user = super().update(db, id, **kwargs)
+        if PRINCIPAL_FIELDS.intersection(kwargs):
+            principal_cache.invalidate(id)
+        return updated_user
+    
+    def delete(self, db: Session, id: int) -> bool:
+        """Elimina un utente e lo rimuove dalla cache dei principal"""
+        deleted = super().delete(db, id)
+        principal_cache.invalidate(id)
+        return deleted
+    
     def get_user_by_email(self, db: Session, email: str) -> Optional[User]:
-        """Recupera un utente per email"""
-        return db.query(User).filter(User.email == email).first()
+        """Recupera un utente per email (con il ruolo già caricato)"""
+        return db.query(User).options(
+            joinedload(User.role_type)
+        ).filter(User.email == email).first()
     
     def update_profile_picture(self, db: Session, user_id: int, profile_picture: bytes) -> Optional[User]:
         """Aggiorna la foto profilo di un utente"""
@@ -40,9 +62,12 @@ class UserService(BaseService[User]):
     
     def get_users_by_role(self, db: Session, role_name: str) -> List[User]:
         """Recupera tutti gli utenti con un ruolo specifico"""
-        return db.query(User).join(RoleType).filter(
-            RoleType.name == role_name
-        ).all()
+        role_id = lookup_registry.id(db, RoleType, role_name)
+        return db.query(User).filter(User.role_type_id == role_id).all()
+    
+    def get_all_roles(self, db: Session) -> Tuple[LookupRow, ...]:
+        """Tutti i ruoli (id, nome, descrizione) dal registro dei lookup, senza query"""
+        return lookup_registry.table(db, RoleType).rows
     
     def get_farmers(self, db: Session) -> List[User]:
         """Recupera tutti gli utenti con ruolo farmer"""
@@ -60,12 +85,27 @@ class UserService(BaseService[User]):
         """Aggiorna il ruolo di un utente"""
         return self.update(db, user_id, role_type_id=new_role_id)
     
+    def set_active(self, db: Session, user_id: int, is_active: bool) -> Optional[User]:
+        """Attiva o disattiva un utente"""
+        return self.update(db, user_id, is_active=is_active)
+    
     def search_users_by_name(self, db: Session, search_term: str) -> List[User]:
         """Cerca utenti per nome o cognome"""
-        return db.query(User).filter(
-            (User.first_name.ilike(f"%{search_term}%")) |
-            (User.last_name.ilike(f"%{search_term}%"))
+        return db.scalars(
+            search_service.ranked_statement("user", search_term, ["first_name", "last_name"])
         ).all()
+    
+    def get_users_page(self, db: Session, role_name: Optional[str] = None, search_term: Optional[str] = None,
+                       cursor: Optional[str] = None, limit: int = 100, with_total: bool = False) -> Page[User]:
+        """Utenti filtrati per ruolo e/o nome, paginati per id"""
+        query = db.query(User)
+        if role_name:
+            query = query.filter(User.role_type_id == lookup_registry.id(db, RoleType, role_name))
+        if search_term:
+            query = query.filter(
+                search_service.match_condition("user", search_term, ["first_name", "last_name"])
+            )
+        return self.paginate(db, query, cursor=cursor, limit=limit, with_total=with_total)
 
 # Istanza globale del servizio
 user_service = UserService()
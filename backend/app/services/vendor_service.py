@@ -1,9 +1,16 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from app.models.vendor import Vendor, OpeningHour, Market, Restaurant, Activity, Warehouse
 from app.models.location import Location
 from app.models.enums import DayWeek
 from app.services.base_service import BaseService
+from app.services.async_base_service import AsyncBaseService
+from app.core.pagination import Page
+from app.services.search_service import search_service
+from app.services.location_service import location_service
+from app.core.lookups import lookup_registry
 
 class VendorService(BaseService[Vendor]):
     """Servizio per operazioni CRUD su Vendor"""
@@ -28,30 +35,36 @@ class VendorService(BaseService[Vendor]):
             joinedload(Vendor.owner)
         ).filter(Vendor.id == vendor_id).first()
     
-    def get_vendors_by_owner(self, db: Session, owner_id: int) -> List[Vendor]:
-        """Recupera tutti i vendor di un proprietario"""
+    def get_vendors_by_owner(self, db: Session, owner_id: int, vendor_type: Optional[str] = None) -> List[Vendor]:
+        """Recupera tutti i vendor di un proprietario (opzionalmente di un solo tipo)"""
+        if vendor_type is not None:
+            return self.filter_by(db, owner_id=owner_id, vendor_type=vendor_type)
         return self.filter_by(db, owner_id=owner_id)
     
+    def get_vendors_by_type(self, db: Session, vendor_type: str) -> List[Vendor]:
+        """Recupera tutti i vendor di un tipo (market, restaurant, activity, warehouse)"""
+        return self.filter_by(db, vendor_type=vendor_type)
+    
     def get_vendors_by_location(self, db: Session, location_id: int) -> List[Vendor]:
         """Recupera tutti i vendor in una location"""
         return self.filter_by(db, location_id=location_id)
     
     def search_vendors_by_name(self, db: Session, search_term: str) -> List[Vendor]:
-        """Cerca vendor per nome"""
-        return db.query(Vendor).filter(
-            Vendor.name.ilike(f"%{search_term}%")
-        ).all()
+        """Cerca vendor per nome (full-text, dal più rilevante)"""
+        return db.scalars(search_service.ranked_statement("vendor", search_term, ["name"])).all()
+    
+    def get_vendors_page(self, db: Session, search_term: Optional[str] = None, cursor: Optional[str] = None,
+                         limit: int = 100, with_total: bool = False) -> Page[Vendor]:
+        """Vendor (opzionalmente filtrati per nome) paginati per id"""
+        query = db.query(Vendor)
+        if search_term:
+            query = query.filter(search_service.match_condition("vendor", search_term, ["name"]))
+        return self.paginate(db, query, cursor=cursor, limit=limit, with_total=with_total)
     
     def get_vendors_near_location(self, db: Session, lat: float, lon: float, radius_km: float = 10.0) -> List[Vendor]:
-        """Recupera vendor vicini a una coordinata (semplificato)"""
-        # Formula haversine semplificata per esempio
-        lat_diff = radius_km / 111.0  # 1 grado ≈ 111 km
-        lon_diff = radius_km / (111.0 * abs(lat))
-        
-        return db.query(Vendor).join(Location).filter(
-            Location.lat.between(lat - lat_diff, lat + lat_diff),
-            Location.lon.between(lon - lon_diff, lon + lon_diff)
-        ).all()
+        """Recupera vendor entro un raggio da una coordinata, dal più vicino"""
+        statement = select(Vendor, Location.lat, Location.lon).join(Location, Location.id == Vendor.location_id)
+        return [row.Vendor for _, row in location_service.rows_in_radius(db, statement, lat, lon, radius_km)]
 
 class OpeningHourService(BaseService[OpeningHour]):
     """Servizio per operazioni CRUD su OpeningHour"""
@@ -77,9 +90,9 @@ class OpeningHourService(BaseService[OpeningHour]):
     
     def get_opening_hours_by_day(self, db: Session, vendor_id: int, day_name: str) -> List[OpeningHour]:
         """Recupera gli orari di apertura per un giorno specifico"""
-        return db.query(OpeningHour).join(DayWeek).filter(
+        return db.query(OpeningHour).filter(
             OpeningHour.vendor_id == vendor_id,
-            DayWeek.name == day_name
+            OpeningHour.day_week_id == lookup_registry.id(db, DayWeek, day_name)
         ).all()
     
     def is_vendor_open(self, db: Session, vendor_id: int, day_name: str, time) -> bool:
@@ -154,6 +167,34 @@ class WarehouseService(BaseService[Warehouse]):
             joinedload(Warehouse.warehouse_rows)
         ).filter(Warehouse.id == warehouse_id).first()
 
+class AsyncVendorService(AsyncBaseService[Vendor]):
+    """Servizio asincrono per le letture più frequenti su Vendor"""
+    
+    def __init__(self):
+        super().__init__(Vendor)
+    
+    async def get_restaurants(self, db: AsyncSession, search_term: Optional[str] = None) -> List[Vendor]:
+        """Recupera i vendor che sono ristoranti, opzionalmente filtrati per nome"""
+        query = select(Vendor).where(Vendor.vendor_type == "restaurant")
+        
+        if search_term:
+            query = query.where(search_service.match_condition("vendor", search_term, ["name"]))
+        
+        result = await db.scalars(query)
+        return list(result)
+    
+    async def get_restaurants_page(self, db: AsyncSession, search_term: Optional[str] = None,
+                                   cursor: Optional[str] = None, limit: int = 50,
+                                   with_total: bool = False) -> Page[Vendor]:
+        """Ristoranti in ordine alfabetico, paginati su (nome, id)"""
+        query = select(Vendor).where(Vendor.vendor_type == "restaurant")
+        
+        if search_term:
+            query = query.where(search_service.match_condition("vendor", search_term, ["name"]))
+        
+        return await self.paginate(db, query, cursor=cursor, limit=limit, sort_key=Vendor.name,
+                                   with_total=with_total)
+
 # Istanze globali dei servizi
 vendor_service = VendorService()
 opening_hour_service = OpeningHourService()
@@ -161,3 +202,4 @@ market_service = MarketService()
 restaurant_service = RestaurantService()
 activity_service = ActivityService()
 warehouse_service = WarehouseService()
+async_vendor_service = AsyncVendorService()
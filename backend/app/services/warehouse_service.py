@@ -6,6 +6,7 @@ from sqlalchemy import and_, or_, func
 from app.models.warehouse import WarehouseRow, WarehouseShelf, WarehouseSpot, StationBooking
 from app.models.enums import CropType
 from app.services.base_service import BaseService
+from app.core.lookups import lookup_registry
 
 class WarehouseRowService(BaseService[WarehouseRow]):
     """Servizio per operazioni CRUD su WarehouseRow"""
@@ -92,9 +93,10 @@ class WarehouseSpotService(BaseService[WarehouseSpot]):
             )
         ).all()
     
-    def update_spot_fee(self, db: Session, spot_id: int, new_fee: float) -> Optional[WarehouseSpot]:
+    def update_spot_fee(self, db: Session, spot_id: int, new_fee: float,
+                        expected_version: Optional[int] = None) -> Optional[WarehouseSpot]:
         """Aggiorna la tariffa di uno spot"""
-        return self.update(db, spot_id, farmer_fee=new_fee)
+        return self.update(db, spot_id, expected_version=expected_version, farmer_fee=new_fee)
 
 class StationBookingService(BaseService[StationBooking]):
     """Servizio per operazioni CRUD su StationBooking"""
@@ -167,9 +169,8 @@ class StationBookingService(BaseService[StationBooking]):
     
     def get_bookings_by_crop_type(self, db: Session, crop_type_name: str) -> List[StationBooking]:
         """Recupera prenotazioni per tipo di coltivazione"""
-        return db.query(StationBooking).join(CropType).filter(
-            CropType.name == crop_type_name
-        ).all()
+        crop_type_id = lookup_registry.id(db, CropType, crop_type_name)
+        return db.query(StationBooking).filter(StationBooking.crop_type_id == crop_type_id).all()
     
     def is_spot_available(self, db: Session, spot_id: int, start_date: date, end_date: date) -> bool:
         """Verifica se uno spot è disponibile per un periodo"""
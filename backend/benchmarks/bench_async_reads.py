@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark letture sync vs async con 200 client concorrenti
+
+Popola un database SQLite temporaneo con eventi e prodotti, poi esegue la stessa
+lettura (eventi con posti disponibili, prodotti disponibili oggi) con:
+  - lo stack sincrono (BaseService + Session nel threadpool, come gli endpoint `def`)
+  - lo stack asincrono (AsyncBaseService + AsyncSession, come gli endpoint `async def`)
+e riporta il throughput in operazioni al secondo.
+
+Esempio:
+    python benchmarks/bench_async_reads.py --clients 200 --requests 1000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, time as dtime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_DIR = tempfile.mkdtemp(prefix="farmer_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'bench.db')}"
+
+from anyio import to_thread  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine, SessionLocal, AsyncSessionLocal, async_engine  # noqa: E402
+from app.models import (  # noqa: E402
+    RoleType, User, Location, Vendor, Market, Activity, Event, EventSeat,
+    Product, ProductDailyAvailability, ProductCategory, UnitMeasure
+)
+from app.services import (  # noqa: E402
+    event_service, product_service, async_event_service, async_product_service
+)
+
+
+def populate(events: int, products: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(RoleType(id=1, name="admin"))
+        db.add(User(id=1, email="bench@example.com", password_hash="x", first_name="B", last_name="B", role_type_id=1))
+        db.add(ProductCategory(id=1, name="fruit"))
+        db.add(UnitMeasure(id=1, name="kg"))
+        db.add(Location(id=1, lat=45.0, lon=9.0, address="Via Roma 1", zip="20100"))
+        db.add(Vendor(id=1, name="Mercato", description="bench", location_id=1, owner_id=1))
+        db.add(Market(id=1))
+        for i in range(events):
+            vendor_id = i + 2
+            db.add(Vendor(id=vendor_id, name=f"Evento {i}", description="bench", location_id=1, owner_id=1))
+            db.add(Activity(id=vendor_id, capacity=5, start_time=dtime(9), end_time=dtime(12)))
+            db.add(Event(id=vendor_id, date=date.today() + timedelta(days=i % 30), organizer_fee=10))
+            db.add_all(EventSeat(event_id=vendor_id, user_id=1) for _ in range(i % 7))
+        for i in range(products):
+            db.add(Product(id=i + 1, market_id=1, name=f"Prodotto {i}", category_id=1, unit_weight=1, unit_measure_id=1))
+            db.add(ProductDailyAvailability(product_id=i + 1, date=date.today(), available_quantity=i % 5, daily_price=1.0))
+        db.commit()
+    finally:
+        db.close()
+
+
+def sync_read() -> int:
+    db = SessionLocal()
+    try:
+        return len(event_service.get_available_events(db)) + len(product_service.get_available_products_today(db))
+    finally:
+        db.close()
+
+
+async def async_read() -> int:
+    async with AsyncSessionLocal() as db:
+        events = await async_event_service.get_available_events(db)
+        products = await async_product_service.get_available_products_today(db)
+        return len(events) + len(products)
+
+
+async def run(clients: int, total: int, operation) -> float:
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def client():
+        while not queue.empty():
+            queue.get_nowait()
+            await operation()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return total / (time.perf_counter() - started)
+
+
+async def main_async(args) -> None:
+    # Lo stack sincrono gira nel threadpool di default (40 thread, come Starlette)
+    sync_throughput = await run(args.clients, args.requests, lambda: to_thread.run_sync(sync_read))
+    async_throughput = await run(args.clients, args.requests, async_read)
+    await async_engine.dispose()
+
+    print(f"👥 client concorrenti: {args.clients}, operazioni: {args.requests}")
+    print(f"🐢 sync  (threadpool): {sync_throughput:8.1f} op/s")
+    print(f"⚡ async (AsyncSession): {async_throughput:8.1f} op/s")
+    print(f"📈 rapporto async/sync: {async_throughput / sync_throughput:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--products", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"🌱 Popolazione database di benchmark in {DB_DIR}...")
+    populate(args.events, args.products)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark di BaseService.bulk_create / bulk_upsert su ProductDailyAvailability
+
+Confronta il vecchio percorso (add_all + commit + refresh per riga, misurato su un campione)
+con l'insert a blocchi con RETURNING (istanze ORM, Row leggere, nessun ritorno) e con
+l'upsert sul vincolo 'unique_product_date' che riscrive le stesse righe.
+
+Esempio:
+    python benchmarks/bench_bulk_insert.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_DIR = tempfile.mkdtemp(prefix="farmer_bulk_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'bulk.db')}"
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine, SessionLocal  # noqa: E402
+from app.models import (  # noqa: E402
+    RoleType, User, Location, Vendor, Market, Product, ProductCategory, UnitMeasure, ProductDailyAvailability
+)
+from app.services.base_service import BaseService, RETURN_OBJECTS, RETURN_ROWS, RETURN_NONE  # noqa: E402
+
+availability_service = BaseService(ProductDailyAvailability)
+
+
+def populate(products: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(RoleType(id=1, name="farmer"))
+        db.add(User(id=1, email="bench@example.com", password_hash="x", first_name="B", last_name="B", role_type_id=1))
+        db.add(ProductCategory(id=1, name="fruit"))
+        db.add(UnitMeasure(id=1, name="kg"))
+        db.add(Location(id=1, lat=45.0, lon=9.0, address="Via Roma 1", zip="20100"))
+        db.add(Vendor(id=1, name="Mercato", description="bench", location_id=1, owner_id=1))
+        db.add(Market(id=1))
+        db.add_all(Product(id=i + 1, market_id=1, name=f"P{i}", category_id=1, unit_weight=1, unit_measure_id=1)
+                   for i in range(products))
+        db.commit()
+    finally:
+        db.close()
+
+
+def availability_rows(rows: int, products: int, first_day: date, price: float) -> list:
+    return [
+        {"product_id": index % products + 1, "date": first_day + timedelta(days=index // products),
+         "available_quantity": index % 50, "daily_price": price}
+        for index in range(rows)
+    ]
+
+
+def clear() -> None:
+    with engine.begin() as connection:
+        connection.execute(ProductDailyAvailability.__table__.delete())
+
+
+def timed(label: str, rows: int, func) -> None:
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        result = func(db)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"  {label:42} {rows:>8,} righe  {elapsed:7.2f}s  ({rows / elapsed:>9,.0f} righe/s)  ritornate: {len(result):,}")
+
+
+def legacy_bulk_create(db, data):
+    objects = [ProductDailyAvailability(**item) for item in data]
+    db.add_all(objects)
+    db.commit()
+    for obj in objects:
+        db.refresh(obj)
+    return objects
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=1_000)
+    parser.add_argument("--legacy-rows", type=int, default=10_000, help="Campione per il vecchio percorso")
+    args = parser.parse_args()
+
+    populate(args.products)
+    first_day = date.today()
+    data = availability_rows(args.rows, args.products, first_day, 2.5)
+
+    print(f"📦 Insert di disponibilità su {DB_DIR}\n")
+    legacy = data[:args.legacy_rows]
+    timed("vecchio bulk_create (refresh per riga)", len(legacy), lambda db: legacy_bulk_create(db, legacy))
+    for label, returning in (("bulk_create RETURNING istanze ORM", RETURN_OBJECTS),
+                             ("bulk_create RETURNING Row leggere", RETURN_ROWS),
+                             ("bulk_create senza ritorno", RETURN_NONE)):
+        clear()
+        timed(label, args.rows, lambda db: availability_service.bulk_create(db, data, returning=returning))
+
+    updated = availability_rows(args.rows, args.products, first_day, 3.0)
+    timed("bulk_upsert unique_product_date (update)", args.rows,
+          lambda db: availability_service.bulk_upsert(db, updated, constraint="unique_product_date"))
+    timed("bulk_upsert unique_product_date + Row", args.rows,
+          lambda db: availability_service.bulk_upsert(db, updated, constraint="unique_product_date",
+                                                      returning=RETURN_ROWS))
+
+    with engine.connect() as connection:
+        total, prices = connection.exec_driver_sql(
+            "SELECT COUNT(*), COUNT(DISTINCT daily_price) FROM product_daily_availabilities"
+        ).one()
+    print(f"\n✅ Righe finali: {total:,} (prezzi distinti dopo l'upsert: {prices})")
+
+
+if __name__ == "__main__":
+    main()
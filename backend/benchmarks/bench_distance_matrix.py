@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark della matrice delle distanze: haversine scalare in Python contro NumPy vettorizzata
+
+Popola un database temporaneo con N location e, per una matrice origini x destinazioni, misura:
+  - percorso scalare: location caricate dall'ORM e calculate_distance per ogni coppia
+  - get_distance_matrix a freddo (include il caricamento dello snapshot NumPy)
+  - get_distance_matrix con snapshot già in memoria
+e verifica che le due matrici coincidano.
+
+Esempio:
+    python benchmarks/bench_distance_matrix.py --rows 100000 --size 1000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_DIR = tempfile.mkdtemp(prefix="farmer_matrix_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'matrix.db')}"
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine, SessionLocal  # noqa: E402
+from app.core.location_snapshot import location_snapshot  # noqa: E402
+from app.models import Location  # noqa: E402
+from app.services import location_service  # noqa: E402
+
+
+def populate(rows: int, seed: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    batch = []
+    with engine.begin() as connection:
+        for index in range(rows):
+            batch.append({"lat": rng.uniform(36.0, 47.0), "lon": rng.uniform(6.5, 18.5),
+                          "address": f"Via {index}", "zip": f"{index % 90000 + 10000}"})
+            if len(batch) == 50_000:
+                connection.execute(Location.__table__.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(Location.__table__.insert(), batch)
+
+
+def scalar_matrix(db, origin_ids, destination_ids):
+    """Percorso precedente: oggetti ORM e una chiamata haversine Python per coppia"""
+    locations = {
+        location.id: location
+        for location in db.query(Location).filter(Location.id.in_(set(origin_ids) | set(destination_ids)))
+    }
+    return [
+        [round(location_service.calculate_distance(locations[origin].lat, locations[origin].lon,
+                                                   locations[destination].lat, locations[destination].lon), 2)
+         for destination in destination_ids]
+        for origin in origin_ids
+    ]
+
+
+def timed(func, repeat: int):
+    durations, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--size", type=int, default=1000, help="origini e destinazioni (matrice size x size)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"📏 Popolamento di {args.rows:,} location in {DB_DIR}...")
+    populate(args.rows, args.seed)
+
+    rng = random.Random(args.seed + 1)
+    origin_ids = rng.sample(range(1, args.rows + 1), args.size)
+    destination_ids = rng.sample(range(1, args.rows + 1), args.size)
+    db = SessionLocal()
+    try:
+        scalar_ms, expected = timed(lambda: scalar_matrix(db, origin_ids, destination_ids), args.repeat)
+        db.expunge_all()
+
+        location_snapshot.invalidate()
+        started = time.perf_counter()
+        location_service.get_distance_matrix(db, origin_ids, destination_ids)
+        cold_ms = (time.perf_counter() - started) * 1000
+
+        warm_ms, matrix = timed(
+            lambda: location_service.get_distance_matrix(db, origin_ids, destination_ids), args.repeat
+        )
+    finally:
+        db.close()
+
+    differences = sum(
+        abs(a - b) > 0.01 for expected_row, row in zip(expected, matrix["distances_km"]) for a, b in zip(expected_row, row)
+    )
+    print(f"matrice {args.size}x{args.size} ({args.size * args.size:,} distanze)")
+    print(f"  {'scalare (ORM + math)':36} {scalar_ms:9.1f} ms")
+    print(f"  {'NumPy, snapshot a freddo':36} {cold_ms:9.1f} ms  (caricamento {location_snapshot.stats()['load_ms']} ms)")
+    print(f"  {'NumPy, snapshot in memoria':36} {warm_ms:9.1f} ms  ({scalar_ms / warm_ms:.0f}x)")
+    print(f"\ndistanze diverse oltre 0.01 km: {differences}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'export delle prenotazioni: lista materializzata contro streaming NDJSON/CSV
+
+Il vecchio percorso carica tutte le ProductReservation come oggetti ORM (filter_by) e codifica
+l'intera lista con jsonable_encoder + json.dumps; lo streaming legge righe Core a blocchi e
+produce chunk di byte. Per ogni variante riporta tempo, byte prodotti e picco di memoria (tracemalloc).
+
+Esempio:
+    python benchmarks/bench_export.py --rows 200000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, time as dtime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_DIR = tempfile.mkdtemp(prefix="farmer_export_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'export.db')}"
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine, SessionLocal  # noqa: E402
+from app.models import (  # noqa: E402
+    RoleType, User, Location, Vendor, Market, Product, ProductCategory, UnitMeasure, ProductReservation
+)
+from app.services import product_reservation_service, export_service  # noqa: E402
+
+
+def populate(rows: int, products: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(RoleType(id=1, name="farmer"))
+        db.add(User(id=1, email="bench@example.com", password_hash="x", first_name="B", last_name="B", role_type_id=1))
+        db.add(ProductCategory(id=1, name="fruit"))
+        db.add(UnitMeasure(id=1, name="kg"))
+        db.add(Location(id=1, lat=45.0, lon=9.0, address="Via Roma 1", zip="20100"))
+        db.add(Vendor(id=1, name="Mercato", description="bench", location_id=1, owner_id=1))
+        db.add(Market(id=1))
+        db.add_all(Product(id=i + 1, market_id=1, name=f"Prodotto {i}", category_id=1, unit_weight=1,
+                           unit_measure_id=1) for i in range(products))
+        db.commit()
+    finally:
+        db.close()
+
+    first_day = date.today()
+    with engine.begin() as connection:
+        connection.execute(ProductReservation.__table__.insert(), [
+            {"user_id": 1, "product_id": index % products + 1, "date": first_day + timedelta(days=index // products),
+             "time_slot": dtime(8 + index % 10), "desired_quantity": index % 7 + 1}
+            for index in range(rows)
+        ])
+
+
+def materialized_export(products: int) -> int:
+    """Percorso attuale degli endpoint: tutte le istanze ORM, poi un'unica risposta JSON"""
+    db = SessionLocal()
+    try:
+        reservations = []
+        for product_id in range(1, products + 1):
+            reservations.extend(product_reservation_service.filter_by(db, product_id=product_id))
+        return len(json.dumps(jsonable_encoder({"reservations": reservations})).encode())
+    finally:
+        db.close()
+
+
+def streamed_export(export_format: str) -> int:
+    statement = export_service.farmer_reservations_statement(owner_id=1)
+    return sum(len(chunk) for chunk in export_service.stream(statement, export_format))
+
+
+def measure(label: str, func) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    produced = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:34} {elapsed:7.2f}s  {produced / 1024 / 1024:8.1f} MB prodotti  picco memoria {peak / 1024 / 1024:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--products", type=int, default=100)
+    args = parser.parse_args()
+
+    populate(args.rows, args.products)
+    print(f"📤 Export di {args.rows:,} prenotazioni su {DB_DIR}\n")
+    measure("lista ORM + JSON unico", lambda: materialized_export(args.products))
+    measure("streaming NDJSON", lambda: streamed_export("ndjson"))
+    measure("streaming CSV", lambda: streamed_export("csv"))
+
+
+if __name__ == "__main__":
+    main()
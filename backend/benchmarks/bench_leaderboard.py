@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark della classifica dei prodotti più votati: raggruppamento in Python contro classifica in memoria
+
+Popola un database temporaneo con N recensioni su M prodotti, costruisce i riepiloghi
+(rating_summaries) e misura:
+  - percorso precedente: tutte le ProductReview caricate dall'ORM, medie in Python e ordinamento
+  - ricalcolo della classifica (punteggio bayesiano in SQL dai riepiloghi, heap top-K per gruppo)
+  - get_top_rated_products con classifica già in memoria, in generale e per categoria
+e stampa memoria usata dalle classifiche (voci tenute) rispetto al numero di recensioni.
+
+Esempio:
+    python benchmarks/bench_leaderboard.py --reviews 200000 --products 20000
+"""
+
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_DIR = tempfile.mkdtemp(prefix="farmer_leaderboard_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'leaderboard.db')}"
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine, SessionLocal  # noqa: E402
+from app.core.leaderboard import product_leaderboard  # noqa: E402
+from app.models import Product, ProductCategory, ProductReview, Rating, Review  # noqa: E402
+from app.services import product_review_service, rating_summary_service  # noqa: E402
+from app.services.review_service import RATING_VALUES  # noqa: E402
+
+CATEGORIES = ["fruit", "vegetable", "dairy", "meat", "bakery"]
+
+
+def populate(reviews: int, products: int, seed: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    with engine.begin() as connection:
+        connection.execute(Rating.__table__.insert(), [{"name": name} for name in RATING_VALUES])
+        connection.execute(ProductCategory.__table__.insert(), [{"name": name} for name in CATEGORIES])
+        connection.execute(Product.__table__.insert(), [
+            {"market_id": 1 + index % 500, "name": f"Prodotto {index}", "description": "",
+             "category_id": 1 + index % len(CATEGORIES), "unit_weight": 1, "unit_measure_id": 1}
+            for index in range(products)
+        ])
+        # Qualità per prodotto: pochi prodotti con molte recensioni, molti con poche
+        quality = [rng.uniform(1.5, 5.0) for _ in range(products)]
+        review_rows, product_review_rows = [], []
+        for review_id in range(1, reviews + 1):
+            product = min(int(rng.paretovariate(1.2)) - 1, products - 1) if rng.random() < 0.5 else rng.randrange(products)
+            rating = max(1, min(5, round(rng.gauss(quality[product], 0.8))))
+            review_rows.append({"id": review_id, "rating_id": rating, "comment": "", "date": datetime.date.today()})
+            product_review_rows.append({"id": review_id, "user_id": review_id, "product_id": product + 1})
+            if len(review_rows) == 50_000:
+                connection.execute(Review.__table__.insert(), review_rows)
+                connection.execute(ProductReview.__table__.insert(), product_review_rows)
+                review_rows, product_review_rows = [], []
+        if review_rows:
+            connection.execute(Review.__table__.insert(), review_rows)
+            connection.execute(ProductReview.__table__.insert(), product_review_rows)
+
+
+def python_top_rated(db, limit: int):
+    """Percorso precedente: tutte le recensioni in memoria, medie in Python e ordinamento completo"""
+    ratings = {}
+    for review in db.query(ProductReview).options(
+        joinedload(ProductReview.product), joinedload(ProductReview.review).joinedload(Review.rating)
+    ):
+        ratings.setdefault(review.product_id, []).append(RATING_VALUES.get(review.review.rating.name, 3))
+    averages = sorted(((sum(values) / len(values), product_id) for product_id, values in ratings.items()), reverse=True)
+    return averages[:limit]
+
+
+def timed(func, repeat: int):
+    durations, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=200_000)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"⭐ Popolamento di {args.reviews:,} recensioni su {args.products:,} prodotti in {DB_DIR}...")
+    populate(args.reviews, args.products, args.seed)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        summaries = rating_summary_service.rebuild(db)
+        print(f"   {summaries:,} riepiloghi costruiti in {time.perf_counter() - started:.1f}s\n")
+
+        python_ms, _ = timed(lambda: python_top_rated(db, args.limit), 1)
+        db.expunge_all()
+        refresh_ms, _ = timed(lambda: product_review_service.refresh_leaderboard(db), args.repeat)
+        top_ms, top = timed(lambda: product_review_service.get_top_rated_products(db, args.limit), args.repeat * 20)
+        category_ms, _ = timed(
+            lambda: product_review_service.get_top_rated_products(db, args.limit, category="dairy"), args.repeat * 20
+        )
+    finally:
+        db.close()
+
+    stats = product_leaderboard.stats()
+    print(f"top {args.limit} prodotti")
+    print(f"  {'ORM + medie in Python':40} {python_ms:9.1f} ms")
+    print(f"  {'ricalcolo classifica (SQL + heap)':40} {refresh_ms:9.1f} ms")
+    print(f"  {'get_top_rated_products, in memoria':40} {top_ms:9.2f} ms  ({python_ms / top_ms:.0f}x)")
+    print(f"  {'get_top_rated_products per categoria':40} {category_ms:9.2f} ms")
+    print(f"\nvoci in memoria: {stats['entries']:,} in {stats['groups']} gruppi (per {args.reviews:,} recensioni)")
+    print("prime posizioni: " + ", ".join(
+        f"#{hit['product'].id} {hit['average_rating']:.2f}/{hit['review_count']}" for hit in top[:5]
+    ))
+
+
+if __name__ == "__main__":
+    main()
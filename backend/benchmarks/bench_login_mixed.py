@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark di traffico misto: tempesta di login + richieste leggere
+
+Avvia il server (python run_server.py) e lancia lo script: misura le latenze
+degli endpoint leggeri mentre N client eseguono login in parallelo.
+Confrontando l'esecuzione prima e dopo l'executor bcrypt dedicato si vede
+l'effetto sul p99 del traffico non legato all'autenticazione.
+
+Esempio:
+    python benchmarks/bench_login_mixed.py --base-url http://127.0.0.1:8000 --duration 20
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def request(url, payload=None, headers=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json", **(headers or {})})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            response.read()
+            code = response.status
+    except urllib.error.HTTPError as error:
+        code = error.code
+    except urllib.error.URLError:
+        code = 0
+    return code, time.perf_counter() - started
+
+
+def worker(stop_at, call, latencies, codes, lock):
+    while time.perf_counter() < stop_at:
+        code, elapsed = call()
+        with lock:
+            latencies.append(elapsed)
+            codes[code] = codes.get(code, 0) + 1
+
+
+def report(name, latencies, codes, duration):
+    print(f"\n{name}")
+    print(f"  richieste: {len(latencies)} ({len(latencies) / duration:.1f} req/s)  codici: {codes}")
+    for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        value = percentile(latencies, fraction)
+        print(f"  {label}: {value * 1000:.1f} ms" if value is not None else f"  {label}: n/d")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", default="consumer@example.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--login-clients", type=int, default=32)
+    parser.add_argument("--light-clients", type=int, default=16)
+    parser.add_argument("--light-path", default="/api/v1/consumer/events")
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+
+    login_url = f"{args.base_url}/api/v1/auth/login"
+    light_url = f"{args.base_url}{args.light_path}"
+    credentials = {"email": args.email, "password": args.password}
+
+    lock = threading.Lock()
+    login_latencies, login_codes = [], {}
+    light_latencies, light_codes = [], {}
+
+    stop_at = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(stop_at, lambda: request(login_url, credentials), login_latencies, login_codes, lock))
+        for _ in range(args.login_clients)
+    ] + [
+        threading.Thread(target=worker, args=(stop_at, lambda: request(light_url), light_latencies, light_codes, lock))
+        for _ in range(args.light_clients)
+    ]
+
+    print(f"🔥 {args.login_clients} client login + {args.light_clients} client su {args.light_path} per {args.duration:.0f}s...")
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report("🔐 POST /auth/login", login_latencies, login_codes, args.duration)
+    report(f"📦 GET {args.light_path}", light_latencies, light_codes, args.duration)
+
+
+if __name__ == "__main__":
+    main()
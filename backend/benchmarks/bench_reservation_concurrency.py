@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Stress test di concorrenza sulle prenotazioni prodotto: nessun overselling e prenotazioni al secondo
+
+Centinaia di thread prenotano lo stesso prodotto nello stesso giorno, ognuno con una sessione
+propria. Il percorso "lettura + controllo in Python" (vecchio create_reservation) legge la
+disponibilità, la confronta e scrive il valore calcolato in Python: sotto concorrenza perde
+aggiornamenti e vende più dello stock. Il percorso attuale scala con un UPDATE condizionale
+(`available_quantity >= q` nella WHERE) nella stessa transazione dell'INSERT.
+
+Per ogni variante controlla: prenotazioni riuscite <= stock iniziale e
+stock iniziale - stock finale == quantità prenotata. Esce con codice 1 se c'è overselling
+nel percorso attuale.
+
+Esempio:
+    python benchmarks/bench_reservation_concurrency.py --threads 300 --stock 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, time as dtime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_DIR = tempfile.mkdtemp(prefix="farmer_reservations_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'reservations.db')}"
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+from sqlalchemy import delete, func, select, update  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine, SessionLocal  # noqa: E402
+from app.models import (  # noqa: E402
+    RoleType, User, Location, Vendor, Market, Product, ProductCategory, UnitMeasure,
+    ProductDailyAvailability, ProductReservation
+)
+from app.services import product_reservation_service  # noqa: E402
+
+DAY = date.today()
+SLOT = dtime(10)
+
+
+def populate(threads: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(RoleType(id=1, name="consumer"))
+        db.add_all(User(id=i + 1, email=f"user{i}@example.com", password_hash="x", first_name="U",
+                        last_name=str(i), role_type_id=1) for i in range(threads))
+        db.add(ProductCategory(id=1, name="fruit"))
+        db.add(UnitMeasure(id=1, name="kg"))
+        db.add(Location(id=1, lat=45.0, lon=9.0, address="Via Roma 1", zip="20100"))
+        db.add(Vendor(id=1, name="Mercato", description="bench", location_id=1, owner_id=1))
+        db.add(Market(id=1))
+        db.add(Product(id=1, market_id=1, name="Mele", category_id=1, unit_weight=1, unit_measure_id=1))
+        db.add(ProductDailyAvailability(product_id=1, date=DAY, available_quantity=0, daily_price=1.0))
+        db.commit()
+    finally:
+        db.close()
+
+
+def reset(stock: int) -> None:
+    with engine.begin() as connection:
+        connection.execute(delete(ProductReservation))
+        connection.execute(update(ProductDailyAvailability).values(available_quantity=stock))
+
+
+def legacy_reservation(user_id: int, quantity: int) -> bool:
+    """Vecchio percorso: legge, controlla in Python, inserisce e scrive il valore calcolato"""
+    db = SessionLocal()
+    try:
+        availability = db.query(ProductDailyAvailability).filter_by(product_id=1, date=DAY).first()
+        if not availability or availability.available_quantity < quantity:
+            return False
+        db.add(ProductReservation(user_id=user_id, product_id=1, date=DAY, time_slot=SLOT,
+                                  desired_quantity=quantity))
+        availability.available_quantity -= quantity
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def atomic_reservation(user_id: int, quantity: int) -> bool:
+    db = SessionLocal()
+    try:
+        return product_reservation_service.create_reservation(db, user_id, 1, DAY, SLOT, quantity) is not None
+    finally:
+        db.close()
+
+
+def run(label: str, reserve, threads: int, stock: int, quantity: int) -> bool:
+    reset(stock)
+    barrier = threading.Barrier(threads)
+    outcomes = {"ok": 0, "sold_out": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def worker(user_id: int) -> None:
+        barrier.wait()
+        try:
+            outcome = "ok" if reserve(user_id, quantity) else "sold_out"
+        except OperationalError:
+            outcome = "errors"
+        with lock:
+            outcomes[outcome] += 1
+
+    workers = [threading.Thread(target=worker, args=(i + 1,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with engine.connect() as connection:
+        final_stock = connection.scalar(select(ProductDailyAvailability.available_quantity))
+        reserved = connection.scalar(select(func.coalesce(func.sum(ProductReservation.desired_quantity), 0)))
+
+    consistent = reserved <= stock and stock - final_stock == reserved
+    print(f"\n{label}")
+    print(f"  esiti: {outcomes}  in {elapsed:.2f}s ({outcomes['ok'] / elapsed:.1f} prenotazioni/s, "
+          f"{threads / elapsed:.1f} tentativi/s)")
+    print(f"  stock iniziale {stock}, finale {final_stock}, quantità prenotata {reserved} "
+          f"-> {'OK' if consistent else 'OVERSELLING / stock incoerente'}")
+    return consistent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=300)
+    parser.add_argument("--stock", type=int, default=200)
+    parser.add_argument("--quantity", type=int, default=1)
+    parser.add_argument("--skip-legacy", action="store_true", help="Esegue solo il percorso attuale")
+    args = parser.parse_args()
+
+    populate(args.threads)
+    print(f"🧵 {args.threads} thread, stock {args.stock}, {args.quantity} unità a prenotazione ({DB_DIR})")
+    if not args.skip_legacy:
+        run("lettura + controllo in Python (vecchio percorso)", legacy_reservation,
+            args.threads, args.stock, args.quantity)
+    consistent = run("UPDATE condizionale atomico", atomic_reservation, args.threads, args.stock, args.quantity)
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark della ricerca prodotti: ILIKE '%termine%' contro indice FTS5 con ranking bm25
+
+Popola un database temporaneo con N prodotti dai nomi realistici, applica le migrazioni (la 0003
+crea l'indice FTS e lo ricostruisce sulle righe esistenti) e per ogni termine misura:
+  - ILIKE come il vecchio search_products_by_name (scansione completa, nessun ordinamento)
+  - ILIKE con LIMIT 20 (una "pagina", ma comunque senza ranking)
+  - search_products_by_name attuale (FTS5, tutti i risultati in ordine bm25)
+  - search_service.search (ricerca unificata, prima pagina da 20)
+
+Esempio:
+    python benchmarks/bench_search.py --rows 1000000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_DIR = tempfile.mkdtemp(prefix="farmer_search_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'search.db')}"
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+from sqlalchemy import select  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.migrations import run_migrations  # noqa: E402
+from app.db.session import engine, SessionLocal  # noqa: E402
+from app.models import (  # noqa: E402
+    RoleType, User, Location, Vendor, Market, Product, ProductCategory, UnitMeasure
+)
+from app.services import product_service, search_service  # noqa: E402
+
+PRODUCE = ["Pomodoro", "Mela", "Pera", "Zucchina", "Melanzana", "Basilico", "Formaggio", "Miele", "Caffè",
+           "Olio", "Pane", "Uva", "Pesca", "Fragola", "Carciofo", "Peperone", "Cipolla", "Patata", "Limone"]
+VARIETIES = ["San Marzano", "Golden", "Williams", "Romanesca", "Violetta", "Genovese", "Pecorino", "Millefiori",
+             "Arabica", "Extravergine", "Altamura", "Moscato", "Tabacchiera", "Sorrento", "Tropea", "Fiorentina"]
+ATTRIBUTES = ["biologico", "a km zero", "di montagna", "della Città", "dell'orto", "artigianale", "di stagione"]
+
+TERMS = ["pomodoro san marzano", "citta", "miele", "extravergine biologico", "fragola tropea"]
+
+
+def populate(rows: int, seed: int) -> float:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(RoleType(id=1, name="farmer"))
+        db.add(User(id=1, email="bench@example.com", password_hash="x", first_name="B", last_name="B", role_type_id=1))
+        db.add(ProductCategory(id=1, name="fruit"))
+        db.add(UnitMeasure(id=1, name="kg"))
+        db.add(Location(id=1, lat=45.0, lon=9.0, address="Via Roma 1", zip="20100"))
+        db.add(Vendor(id=1, name="Mercato", description="bench", location_id=1, owner_id=1))
+        db.add(Market(id=1))
+        db.commit()
+    finally:
+        db.close()
+
+    rng = random.Random(seed)
+    batch = []
+    with engine.begin() as connection:
+        for index in range(rows):
+            name = f"{rng.choice(PRODUCE)} {rng.choice(VARIETIES)} {rng.choice(ATTRIBUTES)} {index}"
+            batch.append({"market_id": 1, "name": name, "description": f"{name} dal produttore", "category_id": 1,
+                          "unit_weight": 1, "unit_measure_id": 1})
+            if len(batch) == 50_000:
+                connection.execute(Product.__table__.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(Product.__table__.insert(), batch)
+
+    # Le migrazioni creano l'indice FTS e lo costruiscono sulle righe appena caricate
+    started = time.perf_counter()
+    run_migrations(engine)
+    return time.perf_counter() - started
+
+
+def timed(func, repeat: int):
+    durations, count = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = func()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations), count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"🔎 Popolamento di {args.rows:,} prodotti in {DB_DIR}...")
+    index_seconds = populate(args.rows, args.seed)
+    print(f"   indice FTS5 costruito in {index_seconds:.1f}s\n")
+
+    db = SessionLocal()
+    try:
+        variants = [
+            ("ILIKE (vecchio percorso)", lambda term: len(db.scalars(
+                select(Product).where(Product.name.ilike(f"%{term}%"))).all())),
+            ("ILIKE LIMIT 20", lambda term: len(db.scalars(
+                select(Product).where(Product.name.ilike(f"%{term}%")).limit(20)).all())),
+            ("FTS5 bm25, tutti i risultati", lambda term: len(product_service.search_products_by_name(db, term))),
+            ("FTS5 /search, pagina da 20", lambda term: len(search_service.search(db, term, limit=20).items)),
+        ]
+        for term in TERMS:
+            print(f"'{term}'")
+            for label, func in variants:
+                median_ms, count = timed(lambda: func(term), args.repeat)
+                db.expunge_all()
+                print(f"  {label:30} {median_ms:9.1f} ms  ({count:,} risultati)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
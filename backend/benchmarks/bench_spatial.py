@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark delle ricerche geografiche: scansione completa con haversine in Python contro R*Tree
+
+Popola un database temporaneo con N location (metà concentrate attorno a città italiane, metà
+sparse su tutto il globo), applica le migrazioni (la 0004 crea l'indice R*Tree e lo costruisce
+sulle righe esistenti) e per punti casuali misura:
+  - scansione completa: tutte le coordinate, haversine in Python e ordinamento (riferimento esatto)
+  - get_nearest_locations (k più vicini, raggio che raddoppia sull'R*Tree)
+  - get_locations_in_radius (rettangolo sull'R*Tree e raffinamento haversine)
+Per ogni punto i risultati sono confrontati con la scansione completa.
+
+Esempio:
+    python benchmarks/bench_spatial.py --rows 1000000 --queries 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_DIR = tempfile.mkdtemp(prefix="farmer_spatial_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'spatial.db')}"
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+from app.db.base import Base  # noqa: E402
+from app.db.migrations import run_migrations  # noqa: E402
+from app.db.session import engine, SessionLocal  # noqa: E402
+from app.db.spatial_index import haversine_km  # noqa: E402
+from app.models import Location  # noqa: E402
+from app.services import location_service  # noqa: E402
+
+CITIES = [(45.46, 9.19), (41.90, 12.50), (40.85, 14.27), (45.07, 7.69), (43.77, 11.26), (44.49, 11.34),
+          (38.12, 13.36), (45.44, 12.32), (41.12, 16.87), (39.22, 9.12)]
+
+
+def random_point(rng: random.Random):
+    if rng.random() < 0.5:
+        lat, lon = rng.choice(CITIES)
+        return lat + rng.gauss(0, 0.3), lon + rng.gauss(0, 0.3)
+    return rng.uniform(-89.9, 89.9), rng.uniform(-180, 180)
+
+
+def populate(rows: int, seed: int) -> float:
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    batch = []
+    with engine.begin() as connection:
+        for index in range(rows):
+            lat, lon = random_point(rng)
+            batch.append({"lat": lat, "lon": lon, "address": f"Via {index}", "zip": f"{index % 90000 + 10000}"})
+            if len(batch) == 50_000:
+                connection.execute(Location.__table__.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(Location.__table__.insert(), batch)
+
+    # Le migrazioni creano l'R*Tree e lo costruiscono sulle righe appena caricate
+    started = time.perf_counter()
+    run_migrations(engine)
+    return time.perf_counter() - started
+
+
+def report(label: str, durations):
+    durations = sorted(durations)
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    print(f"  {label:34} p50 {statistics.median(durations):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius", type=float, default=5.0, help="raggio in km")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"📍 Popolamento di {args.rows:,} location in {DB_DIR}...")
+    index_seconds = populate(args.rows, args.seed)
+    print(f"   indice R*Tree costruito in {index_seconds:.1f}s\n")
+
+    rng = random.Random(args.seed + 1)
+    points = [random_point(rng) for _ in range(args.queries)]
+    timings = {"scan": [], "nearest": [], "radius": []}
+    radius_counts, mismatches = [], 0
+    db = SessionLocal()
+    try:
+        with engine.connect() as connection:
+            coordinates = connection.exec_driver_sql("SELECT id, lat, lon FROM locations").all()
+        for lat, lon in points:
+            started = time.perf_counter()
+            exact = sorted((haversine_km(lat, lon, row.lat, row.lon), row.id) for row in coordinates)
+            timings["scan"].append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            nearest = location_service.get_nearest_locations(db, lat, lon, limit=args.k)
+            timings["nearest"].append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            in_radius = location_service.get_locations_in_radius(db, lat, lon, args.radius)
+            timings["radius"].append((time.perf_counter() - started) * 1000)
+            db.expunge_all()
+
+            expected_nearest = [round(distance, 2) for distance, _ in exact[:args.k]]
+            expected_radius = {location_id for distance, location_id in exact if distance <= args.radius}
+            if [hit["distance_km"] for hit in nearest] != expected_nearest:
+                mismatches += 1
+            if {hit["location"].id for hit in in_radius} != expected_radius:
+                mismatches += 1
+            radius_counts.append(len(in_radius))
+    finally:
+        db.close()
+
+    print(f"{args.queries} punti, k={args.k}, raggio {args.radius} km "
+          f"(mediana {statistics.median(radius_counts):.0f} location nel raggio)")
+    report("scansione completa + haversine", timings["scan"])
+    report(f"get_nearest_locations (k={args.k})", timings["nearest"])
+    report(f"get_locations_in_radius ({args.radius} km)", timings["radius"])
+    print(f"\nrisultati diversi dalla scansione completa: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark del tempo di avvio: reset classico vs template pre-popolato vs fingerprint invariato
+
+Ogni scenario gira in un processo separato (come un worker appena avviato) su un database
+SQLite temporaneo e misura l'import dell'app più l'inizializzazione del database del lifespan.
+
+Esempio:
+    python benchmarks/bench_startup.py --runs 3
+"""
+
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    ("reset classico (drop/create/seed)", {"RESET_DB_ON_STARTUP": "true", "DB_TEMPLATE_ENABLED": "false"}, False),
+    ("reset da template (primo avvio)", {"RESET_DB_ON_STARTUP": "true", "DB_TEMPLATE_ENABLED": "true"}, True),
+    ("reset da template (template pronto)", {"RESET_DB_ON_STARTUP": "true", "DB_TEMPLATE_ENABLED": "true"}, False),
+    ("nessun reset, schema invariato", {"RESET_DB_ON_STARTUP": "false", "DB_TEMPLATE_ENABLED": "true"}, False),
+]
+
+
+def child():
+    """Eseguito nel processo figlio: importa l'app e inizializza il database"""
+    started = time.perf_counter()
+    sys.path.append(BACKEND_DIR)
+    import app.main  # noqa: F401
+    from app.db.bootstrap import initialize_database
+    imported = time.perf_counter()
+    init_seconds = initialize_database()
+    print(f"RESULT {imported - started:.4f} {init_seconds:.4f}")
+
+
+def run_scenario(env: dict) -> tuple:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child"],
+        env={**os.environ, **env}, cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    line = next(line for line in output.splitlines() if line.startswith("RESULT"))
+    _, import_seconds, init_seconds = line.split()
+    return float(import_seconds), float(init_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="farmer_startup_")
+    db_path = os.path.join(work_dir, "startup.db")
+    base_env = {"DATABASE_URL": f"sqlite:///{db_path}"}
+
+    print(f"⏱️  Avvio worker su {db_path} ({args.runs} run per scenario)\n")
+    for label, env, drop_template in SCENARIOS:
+        timings = []
+        for _ in range(args.runs):
+            if drop_template:
+                for template in glob.glob(os.path.join(work_dir, "*.template-*.db")):
+                    os.remove(template)
+            timings.append(run_scenario({**base_env, **env}))
+        import_avg = sum(t[0] for t in timings) / len(timings)
+        init_avg = sum(t[1] for t in timings) / len(timings)
+        print(f"  {label:40} import {import_avg * 1000:7.0f} ms   database {init_avg * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
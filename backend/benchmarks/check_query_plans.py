@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Verifica dei piani di esecuzione prima/dopo la migrazione 0001 (indici hot path)
+
+Crea un database SQLite temporaneo, rimuove gli indici introdotti dalla migrazione, registra
+l'EXPLAIN QUERY PLAN delle query calde, applica le migrazioni e ricontrolla i piani.
+Termina con codice 1 se dopo la migrazione qualche query esegue ancora uno SCAN completo.
+
+Esempio:
+    python benchmarks/check_query_plans.py
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_DIR = tempfile.mkdtemp(prefix="farmer_plans_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'plans.db')}"
+
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.db.migrations import MIGRATIONS_DIR, MigrationOperations, MigrationRunner  # noqa: E402
+from app.core.slow_query_log import is_full_scan  # noqa: E402
+import app.models  # noqa: E402,F401
+
+HOT_QUERIES = {
+    "disponibilità prodotti del giorno":
+        "SELECT product_id FROM product_daily_availabilities WHERE date = ? AND available_quantity > 0",
+    "posti ristorante occupati per slot":
+        "SELECT * FROM restaurant_bookings WHERE restaurant_seat_id = ? AND date = ? AND time_slot = ?",
+    "sovrapposizione prenotazioni stazione":
+        "SELECT * FROM station_bookings WHERE warehouse_spot_id = ? AND start_date <= ? AND end_date >= ?",
+    "vendor di un proprietario":
+        "SELECT * FROM vendors WHERE owner_id = ?",
+    "prodotti di un mercato":
+        "SELECT * FROM products WHERE market_id = ?",
+    "recensioni di un vendor":
+        "SELECT * FROM vendor_reviews WHERE vendor_id = ?",
+    "posti occupati di un evento":
+        "SELECT count(*) FROM event_seats WHERE event_id = ?",
+}
+
+PARAMS = {
+    "disponibilità prodotti del giorno": ("2025-01-01",),
+    "posti ristorante occupati per slot": (1, "2025-01-01", "20:00:00.000000"),
+    "sovrapposizione prenotazioni stazione": (1, "2025-01-31", "2025-01-01"),
+}
+
+
+def load_first_migration():
+    path = os.path.join(MIGRATIONS_DIR, "0001_hot_path_indexes.py")
+    spec = importlib.util.spec_from_file_location("migration_0001", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def query_plans() -> dict:
+    plans = {}
+    with engine.connect() as connection:
+        for label, sql in HOT_QUERIES.items():
+            params = PARAMS.get(label, (1,))
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            plans[label] = [row[-1] for row in rows]
+    return plans
+
+
+def print_plans(title: str, plans: dict):
+    print(f"\n{title}")
+    for label, plan in plans.items():
+        marker = "❌ SCAN" if is_full_scan(plan) else "✅"
+        print(f"  {marker:7} {label}: {' | '.join(plan)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    op = MigrationOperations(engine)
+    for name, table, _ in load_first_migration().INDEXES:
+        op.drop_index(name, table)
+
+    before = query_plans()
+    print_plans("📉 Prima della migrazione", before)
+
+    MigrationRunner(engine).upgrade()
+    after = query_plans()
+    print_plans("📈 Dopo la migrazione", after)
+
+    still_scanning = [label for label, plan in after.items() if is_full_scan(plan)]
+    if still_scanning:
+        print(f"\n❌ Query ancora in full scan: {', '.join(still_scanning)}")
+        sys.exit(1)
+    print(f"\n✅ Tutte le {len(after)} query calde usano un indice")
+
+
+if __name__ == "__main__":
+    main()
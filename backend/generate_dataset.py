@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Generatore di dataset sintetici su larga scala per i test di carico
+
+Crea utenti, vendor (mercati, ristoranti, eventi, workshop, magazzini), prodotti, disponibilità
+giornaliere, prenotazioni e recensioni con insert Core massivi in transazioni a blocchi.
+L'hash della password è calcolato una sola volta e condiviso da tutti gli utenti ("password123").
+Il risultato è deterministico a parità di --seed e --start-date e rispetta tutti i vincoli UNIQUE.
+
+Esempi:
+    python generate_dataset.py                     # volumi completi (100k utenti, 5M prenotazioni)
+    python generate_dataset.py --scale 0.01        # 1% dei volumi, utile in sviluppo
+    python generate_dataset.py --database-url sqlite:///./load.db --seed 7
+"""
+
+import argparse
+import os
+import random
+import sys
+import time as clock
+from datetime import date, time, timedelta
+from itertools import islice
+
+# Aggiungi il path dell'app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+ROLE_ADMIN, ROLE_FARMER, ROLE_CONSUMER, ROLE_RESTAURANT_OWNER, ROLE_WORKSHOP_HOST, ROLE_EVENT_ORGANIZER = range(1, 7)
+
+# Quota di utenti per ruolo (il resto sono consumer)
+ROLE_SHARES = [
+    (ROLE_FARMER, 0.08),
+    (ROLE_RESTAURANT_OWNER, 0.04),
+    (ROLE_WORKSHOP_HOST, 0.02),
+    (ROLE_EVENT_ORGANIZER, 0.02),
+    (ROLE_ADMIN, 0.001),
+]
+
+# Ripartizione dei vendor per tipo
+VENDOR_SHARES = {"market": 0.40, "restaurant": 0.25, "event": 0.125, "workshop": 0.125, "warehouse": 0.10}
+
+# Ripartizione delle prenotazioni
+BOOKING_SHARES = {"product_reservations": 0.50, "restaurant_bookings": 0.35, "event_seats": 0.10, "station_bookings": 0.05}
+
+PRODUCT_SLOTS = [time(hour, minute) for hour in range(8, 14) for minute in (0, 30)]
+RESTAURANT_SLOTS = [time(12, 0), time(12, 30), time(13, 0), time(13, 30), time(19, 30), time(20, 0), time(20, 30), time(21, 0)]
+MENU_CATEGORIES = ["antipasti", "primi", "secondi", "contorni", "dolci", "bevande"]
+
+FIRST_NAMES = ["Marco", "Giulia", "Luca", "Sara", "Paolo", "Chiara", "Andrea", "Elena", "Matteo", "Francesca"]
+LAST_NAMES = ["Rossi", "Bianchi", "Verdi", "Russo", "Ferrari", "Esposito", "Romano", "Colombo", "Ricci", "Marino"]
+PRODUCT_NAMES = ["Pomodori", "Mele", "Pere", "Zucchine", "Basilico", "Fragole", "Miele", "Formaggio", "Uova", "Pane"]
+
+
+def split(total: int, parts: int):
+    """Divide `total` in `parts` quote intere che differiscono al più di 1"""
+    base, remainder = divmod(total, parts) if parts else (0, 0)
+    return [base + (1 if index < remainder else 0) for index in range(parts)]
+
+
+class DatasetGenerator:
+    """Genera e inserisce il dataset tabella per tabella"""
+
+    def __init__(self, engine, args):
+        self.engine = engine
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.chunk_size = args.chunk_size
+        self.start_date = args.start_date
+        self.scale = args.scale
+
+    def scaled(self, value: int, minimum: int = 1) -> int:
+        return max(minimum, int(value * self.scale))
+
+    def next_id(self, table) -> int:
+        with self.engine.connect() as connection:
+            return (connection.exec_driver_sql(f"SELECT MAX(id) FROM {table.name}").scalar() or 0) + 1
+
+    def insert(self, table, rows) -> int:
+        """Insert Core a blocchi, una transazione per blocco"""
+        started = clock.perf_counter()
+        total = 0
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            with self.engine.begin() as connection:
+                connection.execute(table.insert(), chunk)
+            total += len(chunk)
+        elapsed = clock.perf_counter() - started
+        rate = total / elapsed if elapsed else 0
+        print(f"  ✅ {table.name:30} {total:>10,} righe in {elapsed:6.1f}s ({rate:,.0f} righe/s)")
+        return total
+
+    # --- Lookup ---
+
+    def ensure_lookups(self):
+        from sqlalchemy.orm import Session
+        from app.db.seed import create_role_types
+        from app.models.enums import (
+            ContactInfoType, ContactInfoTypeEnum, CropType, CropTypeEnum, DayWeek, DayWeekEnum,
+            MenuCategory, ProductCategory, ProductCategoryEnum, Rating, RatingEnum, RequestStatus,
+            RequestStatusEnum, UnitMeasure, UnitMeasureEnum
+        )
+
+        with Session(self.engine) as db:
+            create_role_types(db)
+            db.commit()
+            lookups = [
+                (ContactInfoType, [item.value for item in ContactInfoTypeEnum]),
+                (DayWeek, [item.value for item in DayWeekEnum]),
+                (ProductCategory, [item.value for item in ProductCategoryEnum]),
+                (UnitMeasure, [item.value for item in UnitMeasureEnum]),
+                (Rating, [item.value for item in RatingEnum]),
+                (RequestStatus, [item.value for item in RequestStatusEnum]),
+                (CropType, [item.value for item in CropTypeEnum]),
+                (MenuCategory, MENU_CATEGORIES),
+            ]
+            ids = {}
+            for model, names in lookups:
+                existing = {row.name: row.id for row in db.query(model).all()}
+                for name in names:
+                    if name not in existing:
+                        db.add(model(name=name))
+                db.commit()
+                ids[model.__tablename__] = [row.id for row in db.query(model).order_by(model.id).all()]
+        self.lookup_ids = ids
+
+    # --- Generazione ---
+
+    def generate(self):
+        from app.core.auth import get_password_hash
+        from app.models import (
+            User, Location, Vendor, Market, Restaurant, Activity, Warehouse, Event, EventSeat,
+            Workshop, WorkshopSeat, Product, ProductDailyAvailability, ProductReservation,
+            RestaurantTable, RestaurantSeat, MenuItem, RestaurantBooking, WarehouseRow,
+            WarehouseShelf, WarehouseSpot, StationBooking, Review, VendorReview, ProductReview
+        )
+
+        args = self.args
+        rng = self.rng
+        self.ensure_lookups()
+        password_hash = get_password_hash("password123")
+
+        # Utenti, raggruppati per ruolo
+        user_count = self.scaled(args.users, minimum=10)
+        first_user_id = self.next_id(User.__table__)
+        role_ids = []
+        for role_id, share in ROLE_SHARES:
+            role_ids += [role_id] * max(1, int(user_count * share))
+        role_ids += [ROLE_CONSUMER] * (user_count - len(role_ids))
+        users_by_role = {}
+        for offset, role_id in enumerate(role_ids):
+            users_by_role.setdefault(role_id, []).append(first_user_id + offset)
+
+        self.insert(User.__table__, (
+            {
+                "id": first_user_id + offset,
+                "email": f"user{first_user_id + offset}@load.example.com",
+                "password_hash": password_hash,
+                "first_name": rng.choice(FIRST_NAMES),
+                "last_name": rng.choice(LAST_NAMES),
+                "phone": f"+39 3{rng.randint(10, 99)} {rng.randint(1000000, 9999999)}",
+                "is_active": True,
+                "language": "it" if rng.random() < 0.8 else "en",
+                "role_type_id": role_id,
+            }
+            for offset, role_id in enumerate(role_ids)
+        ))
+        consumers = users_by_role[ROLE_CONSUMER]
+
+        # Vendor e location (una location per vendor)
+        vendor_count = self.scaled(args.vendors, minimum=len(VENDOR_SHARES))
+        vendor_types = []
+        for vendor_type, share in VENDOR_SHARES.items():
+            vendor_types += [vendor_type] * max(1, int(vendor_count * share))
+        owners_role = {
+            "market": ROLE_FARMER, "warehouse": ROLE_FARMER, "restaurant": ROLE_RESTAURANT_OWNER,
+            "event": ROLE_EVENT_ORGANIZER, "workshop": ROLE_WORKSHOP_HOST,
+        }
+        first_location_id = self.next_id(Location.__table__)
+        first_vendor_id = self.next_id(Vendor.__table__)
+        vendors_by_type = {}
+        vendor_rows = []
+        location_rows = []
+        for offset, vendor_type in enumerate(vendor_types):
+            vendor_id = first_vendor_id + offset
+            vendors_by_type.setdefault(vendor_type, []).append(vendor_id)
+            location_rows.append({
+                "id": first_location_id + offset,
+                "lat": round(rng.uniform(36.6, 47.1), 6),
+                "lon": round(rng.uniform(6.6, 18.5), 6),
+                "address": f"Via {rng.choice(LAST_NAMES)} {rng.randint(1, 200)}",
+                "zip": f"{rng.randint(10, 98)}{rng.randint(100, 999)}",
+            })
+            vendor_rows.append({
+                "id": vendor_id,
+                "name": f"{vendor_type.capitalize()} {vendor_id}",
+                "description": f"{vendor_type} generato per test di carico",
+                "location_id": first_location_id + offset,
+                "owner_id": rng.choice(users_by_role[owners_role[vendor_type]]),
+            })
+        self.insert(Location.__table__, location_rows)
+        self.insert(Vendor.__table__, vendor_rows)
+        self.insert(Market.__table__, ({"id": vendor_id} for vendor_id in vendors_by_type["market"]))
+        self.insert(Restaurant.__table__, ({"id": vendor_id} for vendor_id in vendors_by_type["restaurant"]))
+        self.insert(Warehouse.__table__, ({"id": vendor_id} for vendor_id in vendors_by_type["warehouse"]))
+
+        # Prenotazioni totali ripartite per tipo
+        booking_total = self.scaled(args.bookings)
+        booking_counts = {name: int(booking_total * share) for name, share in BOOKING_SHARES.items()}
+
+        # Attività: eventi e workshop (capacità sufficiente per i posti generati)
+        events = vendors_by_type["event"]
+        workshops = vendors_by_type["workshop"]
+        seats_per_event = split(booking_counts["event_seats"], len(events))
+        activity_rows = []
+        for vendor_id, seats in zip(events, seats_per_event):
+            activity_rows.append({"id": vendor_id, "capacity": seats + rng.randint(0, 50),
+                                  "start_time": time(rng.randint(9, 18)), "end_time": time(22)})
+        for vendor_id in workshops:
+            activity_rows.append({"id": vendor_id, "capacity": rng.randint(8, 30),
+                                  "start_time": time(rng.randint(9, 15)), "end_time": time(18)})
+        self.insert(Activity.__table__, activity_rows)
+        self.insert(Event.__table__, (
+            {"id": vendor_id, "date": self.start_date + timedelta(days=rng.randint(0, 180)),
+             "organizer_fee": round(rng.uniform(0, 500), 2)}
+            for vendor_id in events
+        ))
+        self.insert(Workshop.__table__, (
+            {"id": vendor_id, "day_week_id": rng.choice(self.lookup_ids["day_weeks"])} for vendor_id in workshops
+        ))
+        self.insert(WorkshopSeat.__table__, (
+            {"workshop_id": vendor_id, "user_id": rng.choice(consumers)}
+            for vendor_id in workshops for _ in range(rng.randint(0, 8))
+        ))
+        self.insert(EventSeat.__table__, (
+            {"event_id": vendor_id, "user_id": user_id}
+            for vendor_id, seats in zip(events, seats_per_event)
+            for user_id in rng.sample(consumers, min(seats, len(consumers)))
+        ))
+
+        # Prodotti e disponibilità giornaliere (product_id, date) univoche
+        first_product_id = self.next_id(Product.__table__)
+        product_ids = []
+        product_rows = []
+        for market_id in vendors_by_type["market"]:
+            for _ in range(args.products_per_market):
+                product_id = first_product_id + len(product_ids)
+                product_ids.append(product_id)
+                product_rows.append({
+                    "id": product_id, "market_id": market_id,
+                    "name": f"{rng.choice(PRODUCT_NAMES)} {product_id}",
+                    "description": "Prodotto generato per test di carico",
+                    "category_id": rng.choice(self.lookup_ids["product_categories"]),
+                    "unit_weight": rng.choice([0.25, 0.5, 1.0, 2.0]),
+                    "unit_measure_id": rng.choice(self.lookup_ids["unit_measures"]),
+                })
+        self.insert(Product.__table__, product_rows)
+
+        availability_count = self.scaled(args.availability)
+        days_per_product = split(availability_count, len(product_ids))
+        self.insert(ProductDailyAvailability.__table__, (
+            {
+                "product_id": product_id,
+                "date": self.start_date + timedelta(days=day),
+                "available_quantity": rng.randint(0, 200),
+                "daily_price": round(rng.uniform(0.5, 30), 2),
+            }
+            for product_id, days in zip(product_ids, days_per_product) for day in range(days)
+        ))
+
+        # Prenotazioni prodotto: utenti distinti per (prodotto, giorno), slot a rotazione
+        availability_keys = ((product_id, day) for product_id, days in zip(product_ids, days_per_product)
+                             for day in range(days))
+        reservations_per_day = split(booking_counts["product_reservations"], availability_count)
+
+        def product_reservations():
+            for (product_id, day), count in zip(availability_keys, reservations_per_day):
+                for index, user_id in enumerate(rng.sample(consumers, min(count, len(consumers)))):
+                    yield {
+                        "user_id": user_id, "product_id": product_id,
+                        "date": self.start_date + timedelta(days=day),
+                        "time_slot": PRODUCT_SLOTS[index % len(PRODUCT_SLOTS)],
+                        "desired_quantity": rng.randint(1, 10),
+                    }
+        self.insert(ProductReservation.__table__, product_reservations())
+
+        # Ristoranti: tavoli, posti, menu e prenotazioni (posto, giorno, slot) univoche
+        first_table_id = self.next_id(RestaurantTable.__table__)
+        table_rows = [
+            {"id": first_table_id + index, "name": f"Tavolo {index % args.tables_per_restaurant + 1}",
+             "restaurant_id": restaurant_id}
+            for index, restaurant_id in enumerate(
+                restaurant_id for restaurant_id in vendors_by_type["restaurant"]
+                for _ in range(args.tables_per_restaurant)
+            )
+        ]
+        self.insert(RestaurantTable.__table__, table_rows)
+        first_seat_id = self.next_id(RestaurantSeat.__table__)
+        seat_ids = [first_seat_id + index for index in range(len(table_rows) * args.seats_per_table)]
+        self.insert(RestaurantSeat.__table__, (
+            {"id": seat_id, "restaurant_table_id": table_rows[index // args.seats_per_table]["id"]}
+            for index, seat_id in enumerate(seat_ids)
+        ))
+        self.insert(MenuItem.__table__, (
+            {"name": f"Piatto {index + 1}", "price": round(rng.uniform(4, 40), 2),
+             "menu_category_id": rng.choice(self.lookup_ids["menu_categories"]),
+             "description": "Piatto generato per test di carico", "restaurant_id": restaurant_id}
+            for restaurant_id in vendors_by_type["restaurant"] for index in range(args.menu_items_per_restaurant)
+        ))
+        bookings_per_seat = split(booking_counts["restaurant_bookings"], len(seat_ids))
+        self.insert(RestaurantBooking.__table__, (
+            {
+                "user_id": rng.choice(consumers), "restaurant_seat_id": seat_id,
+                "date": self.start_date + timedelta(days=slot_index // len(RESTAURANT_SLOTS)),
+                "time_slot": RESTAURANT_SLOTS[slot_index % len(RESTAURANT_SLOTS)],
+            }
+            for seat_id, count in zip(seat_ids, bookings_per_seat) for slot_index in range(count)
+        ))
+
+        # Magazzini: file, scaffali, postazioni e prenotazioni consecutive non sovrapposte
+        spot_ids = self.generate_warehouse_layout(
+            vendors_by_type["warehouse"], WarehouseRow, WarehouseShelf, WarehouseSpot
+        )
+        farmers = users_by_role[ROLE_FARMER]
+        bookings_per_spot = split(booking_counts["station_bookings"], len(spot_ids))
+        self.insert(StationBooking.__table__, (
+            {
+                "user_id": rng.choice(farmers), "warehouse_spot_id": spot_id,
+                "name": f"Coltura {spot_id}-{index}", "description": "Prenotazione generata per test di carico",
+                "start_date": self.start_date + timedelta(days=index * 7),
+                "end_date": self.start_date + timedelta(days=index * 7 + 6),
+                "crop_type_id": rng.choice(self.lookup_ids["crop_types"]),
+            }
+            for spot_id, count in zip(spot_ids, bookings_per_spot) for index in range(count)
+        ))
+
+        # Recensioni: (utente, vendor) e (utente, prodotto) univoche
+        review_count = self.scaled(args.reviews)
+        reviewed_vendors = [vendor["id"] for vendor in vendor_rows]
+        vendor_review_counts = split(review_count // 2, len(reviewed_vendors))
+        product_review_counts = split(review_count - review_count // 2, len(product_ids))
+        self.generate_reviews(Review, VendorReview, "vendor_id", reviewed_vendors, vendor_review_counts, consumers)
+        self.generate_reviews(Review, ProductReview, "product_id", product_ids, product_review_counts, consumers)
+
+    def generate_warehouse_layout(self, warehouses, WarehouseRow, WarehouseShelf, WarehouseSpot):
+        args = self.args
+        first_row_id = self.next_id(WarehouseRow.__table__)
+        row_rows = [{"id": first_row_id + index, "warehouse_id": warehouse_id}
+                    for index, warehouse_id in enumerate(
+                        warehouse_id for warehouse_id in warehouses for _ in range(args.rows_per_warehouse))]
+        self.insert(WarehouseRow.__table__, row_rows)
+        first_shelf_id = self.next_id(WarehouseShelf.__table__)
+        shelf_rows = [{"id": first_shelf_id + index, "warehouse_row_id": row_id}
+                      for index, row_id in enumerate(
+                          row["id"] for row in row_rows for _ in range(args.shelves_per_row))]
+        self.insert(WarehouseShelf.__table__, shelf_rows)
+        first_spot_id = self.next_id(WarehouseSpot.__table__)
+        spot_ids = []
+        spot_rows = []
+        for shelf in shelf_rows:
+            for _ in range(args.spots_per_shelf):
+                spot_id = first_spot_id + len(spot_ids)
+                spot_ids.append(spot_id)
+                spot_rows.append({"id": spot_id, "equipment_details": "Irrigazione, luce LED",
+                                  "farmer_fee": round(self.rng.uniform(5, 50), 2),
+                                  "warehouse_shelf_id": shelf["id"]})
+        self.insert(WarehouseSpot.__table__, spot_rows)
+        return spot_ids
+
+    def generate_reviews(self, Review, link_model, target_column, targets, counts, consumers):
+        rng = self.rng
+        first_review_id = self.next_id(Review.__table__)
+        review_rows = []
+        link_rows = []
+        for target_id, count in zip(targets, counts):
+            for user_id in rng.sample(consumers, min(count, len(consumers))):
+                review_id = first_review_id + len(review_rows)
+                review_rows.append({
+                    "id": review_id, "rating_id": rng.choice(self.lookup_ids["ratings"]),
+                    "comment": "Recensione generata per test di carico",
+                    "date": self.start_date - timedelta(days=rng.randint(0, 365)),
+                })
+                link_rows.append({"id": review_id, "user_id": user_id, target_column: target_id})
+        self.insert(Review.__table__, review_rows)
+        self.insert(link_model.__table__, link_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Database di destinazione (default: DATABASE_URL)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed del generatore casuale")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date.today(),
+                        help="Primo giorno di disponibilità/prenotazioni (YYYY-MM-DD, default oggi)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Moltiplicatore di tutti i volumi")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Righe per transazione")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--vendors", type=int, default=5_000)
+    parser.add_argument("--availability", type=int, default=1_000_000)
+    parser.add_argument("--bookings", type=int, default=5_000_000)
+    parser.add_argument("--reviews", type=int, default=200_000)
+    parser.add_argument("--products-per-market", type=int, default=20)
+    parser.add_argument("--tables-per-restaurant", type=int, default=10)
+    parser.add_argument("--seats-per-table", type=int, default=4)
+    parser.add_argument("--menu-items-per-restaurant", type=int, default=15)
+    parser.add_argument("--rows-per-warehouse", type=int, default=4)
+    parser.add_argument("--shelves-per-row", type=int, default=5)
+    parser.add_argument("--spots-per-shelf", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    # Nessun log delle query lente durante il caricamento massivo
+    os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+    from sqlalchemy.orm import Session
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.db.migrations import run_migrations
+    from app.services.review_service import rating_summary_service
+    import app.models  # noqa: F401
+
+    print(f"🌱 Generazione dataset (seed={args.seed}, scale={args.scale}, start={args.start_date})")
+    started = clock.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    DatasetGenerator(engine, args).generate()
+    # Le recensioni sono inserite in blocco senza passare dai servizi: riepiloghi ricalcolati a parte
+    with Session(engine) as db:
+        summary_started = clock.perf_counter()
+        summaries = rating_summary_service.rebuild(db)
+    print(f"  ✅ {'rating_summaries':30} {summaries:>10,} righe in {clock.perf_counter() - summary_started:6.1f}s")
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+    print(f"🎉 Dataset generato in {clock.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
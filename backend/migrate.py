@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Script per gestire le migrazioni versionate del database (migrations/versions)
+
+Esempi:
+    python migrate.py status
+    python migrate.py upgrade
+    python migrate.py upgrade --target 1
+"""
+
+import argparse
+import os
+import sys
+
+# Aggiungi il path dell'app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import engine
+from app.db.migrations import MigrationRunner
+
+
+def show_status(runner: MigrationRunner):
+    """Mostra le migrazioni applicate e pendenti"""
+    applied = set(runner.applied_versions())
+    print(f"📌 Versione corrente dello schema: {runner.current_version()}")
+    for migration in runner.discover():
+        marker = "✅" if migration.version in applied else "⏳"
+        print(f"  {marker} {migration.version:04d} {migration.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["status", "upgrade"])
+    parser.add_argument("--target", type=int, default=None, help="Versione massima da applicare")
+    args = parser.parse_args()
+
+    runner = MigrationRunner(engine)
+    if args.command == "status":
+        show_status(runner)
+        return
+
+    applied = runner.upgrade(args.target)
+    if not applied:
+        print("✅ Nessuna migrazione pendente")
+    for migration in applied:
+        print(f"✅ Applicata {migration.version:04d} {migration.name}")
+
+
+if __name__ == "__main__":
+    main()
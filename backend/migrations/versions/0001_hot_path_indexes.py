@@ -0,0 +1,23 @@
+"""
+Indici per i filtri più frequenti di prenotazioni, disponibilità e dashboard
+"""
+
+description = "Indici compositi per prenotazioni/disponibilità e indici sulle foreign key più filtrate"
+
+INDEXES = [
+    ("ix_product_daily_availabilities_date_product_id", "product_daily_availabilities", ["date", "product_id"]),
+    ("ix_restaurant_bookings_seat_date_slot", "restaurant_bookings", ["restaurant_seat_id", "date", "time_slot"]),
+    ("ix_station_bookings_spot_dates", "station_bookings", ["warehouse_spot_id", "start_date", "end_date"]),
+    ("ix_vendors_owner_id", "vendors", ["owner_id"]),
+    ("ix_products_market_id", "products", ["market_id"]),
+    ("ix_vendor_reviews_vendor_id", "vendor_reviews", ["vendor_id"]),
+    ("ix_event_seats_event_id", "event_seats", ["event_id"]),
+]
+
+
+def upgrade(op):
+    """Crea gli indici mancanti e aggiorna le statistiche del planner"""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+    if op.engine.dialect.name == "sqlite":
+        op.execute("ANALYZE")
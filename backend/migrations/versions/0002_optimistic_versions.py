@@ -0,0 +1,13 @@
+"""
+Colonna version per il controllo di concorrenza ottimistico sulle tabelle più aggiornate
+"""
+
+description = "Colonna version su disponibilità giornaliere, voci di menu e spot del magazzino"
+
+VERSIONED_TABLES = ["product_daily_availabilities", "menu_items", "warehouse_spots"]
+
+
+def upgrade(op):
+    """Aggiunge la colonna version (le righe esistenti partono da 1)"""
+    for table in VERSIONED_TABLES:
+        op.add_column(table, "version", "INTEGER NOT NULL DEFAULT 1")
@@ -0,0 +1,18 @@
+"""
+Indice full-text FTS5 (external content + trigger) per la ricerca unificata
+"""
+
+from app.db.search_index import SEARCH_SOURCES, fts5_available, rebuild_statement, search_index_ddl
+
+description = "Tabelle FTS5 per prodotti, vendor, voci di menu, location e utenti con trigger di sincronizzazione"
+
+
+def upgrade(op):
+    """Crea tabelle FTS e trigger, poi indicizza le righe esistenti (niente su database senza FTS5)"""
+    with op.engine.connect() as connection:
+        if not fts5_available(connection):
+            return
+    for source in SEARCH_SOURCES.values():
+        for statement in search_index_ddl(source):
+            op.execute(statement)
+        op.execute(rebuild_statement(source))
@@ -0,0 +1,18 @@
+"""
+Indice spaziale R*Tree sulle coordinate delle location
+"""
+
+from app.db.spatial_index import rebuild_statements, rtree_available, spatial_index_ddl
+
+description = "Tabella R*Tree locations_rtree con trigger di sincronizzazione per ricerche per raggio e più vicini"
+
+
+def upgrade(op):
+    """Crea tabella R*Tree e trigger, poi indicizza le location esistenti (niente su database senza R*Tree)"""
+    with op.engine.connect() as connection:
+        if not rtree_available(connection):
+            return
+    for statement in spatial_index_ddl():
+        op.execute(statement)
+    for statement in rebuild_statements():
+        op.execute(statement)
@@ -0,0 +1,39 @@
+"""
+Discriminatore vendor_type sui vendor (market, restaurant, activity, warehouse)
+"""
+
+description = "Colonna indicizzata vendors.vendor_type, backfill dalle tabelle dei sottotipi e trigger di allineamento"
+
+# Sottotipo -> tabella; in caso di più sottotipi per lo stesso vendor vale il primo
+VENDOR_SUBTYPES = [
+    ("market", "markets"),
+    ("restaurant", "restaurants"),
+    ("activity", "activities"),
+    ("warehouse", "warehouses"),
+]
+
+
+def _exists(table: str) -> str:
+    return f"EXISTS (SELECT 1 FROM {table} WHERE {table}.id = vendors.id)"
+
+
+def upgrade(op):
+    """Aggiunge colonna e indice, popola i vendor esistenti e crea i trigger sulle tabelle dei sottotipi"""
+    op.add_column("vendors", "vendor_type", "VARCHAR")
+    op.create_index("ix_vendors_vendor_type", "vendors", ["vendor_type"])
+
+    cases = " ".join(f"WHEN {_exists(table)} THEN '{vendor_type}'" for vendor_type, table in VENDOR_SUBTYPES)
+    any_subtype = " OR ".join(_exists(table) for _, table in VENDOR_SUBTYPES)
+    op.backfill("vendors", f"vendor_type = CASE {cases} END", f"vendor_type IS NULL AND ({any_subtype})")
+
+    if op.engine.dialect.name != "sqlite":
+        return
+    for vendor_type, table in VENDOR_SUBTYPES:
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_vendor_type_ai AFTER INSERT ON {table} "
+            f"BEGIN UPDATE vendors SET vendor_type = '{vendor_type}' WHERE id = new.id; END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_vendor_type_ad AFTER DELETE ON {table} "
+            f"BEGIN UPDATE vendors SET vendor_type = NULL WHERE id = old.id AND vendor_type = '{vendor_type}'; END"
+        )
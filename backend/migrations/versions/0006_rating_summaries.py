@@ -0,0 +1,17 @@
+"""
+Riepiloghi denormalizzati delle recensioni (conteggio, somma e istogramma per vendor e prodotto)
+"""
+
+from sqlalchemy.orm import Session
+
+from app.models.review import RatingSummary
+from app.services.review_service import rating_summary_service
+
+description = "Tabella rating_summaries popolata dalle recensioni esistenti"
+
+
+def upgrade(op):
+    """Crea la tabella se create_all non l'ha già fatto e la ricostruisce dalle recensioni"""
+    RatingSummary.__table__.create(op.engine, checkfirst=True)
+    with Session(op.engine) as db:
+        rating_summary_service.rebuild(db)
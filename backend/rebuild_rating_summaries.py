@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Script per ricostruire o verificare i riepiloghi delle recensioni (tabella rating_summaries)
+
+I riepiloghi sono aggiornati a ogni recensione creata o eliminata dai servizi; questo script li
+ricalcola da zero dalle recensioni, ad esempio dopo import o modifiche fatte direttamente sul DB.
+
+Esempi:
+    python rebuild_rating_summaries.py --check
+    python rebuild_rating_summaries.py
+"""
+
+import argparse
+import os
+import sys
+
+# Aggiungi il path dell'app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import SessionLocal
+from app.services.review_service import rating_summary_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="Mostra le differenze senza modificare i riepiloghi")
+    parser.add_argument("--limit", type=int, default=20, help="Differenze da mostrare con --check")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if not args.check:
+            count = rating_summary_service.rebuild(db)
+            print(f"✅ Ricostruiti {count} riepiloghi")
+            return
+
+        mismatches = rating_summary_service.check(db)
+        if not mismatches:
+            print("✅ Riepiloghi allineati alle recensioni")
+            return
+        print(f"❌ {len(mismatches)} riepiloghi non allineati")
+        for mismatch in mismatches[:args.limit]:
+            print(f"  {mismatch['entity_type']} {mismatch['entity_id']}: "
+                  f"atteso {mismatch['expected']}, salvato {mismatch['stored']}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()